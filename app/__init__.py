@@ -1,5 +1,16 @@
 """Spa Manager application package."""
 
-from .main import create_app
+from typing import Any
+
+
+def __getattr__(name: str) -> Any:
+    # Deferred so importing `app.models` or `app.core` does not load FastAPI
+    # and every router.
+    if name == "create_app":
+        from .main import create_app
+
+        return create_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ["create_app"]
@@ -0,0 +1,198 @@
+"""
+Structured access log.
+
+`AccessLogMiddleware` records one JSON line per HTTP request: time,
+method, path, route template, status, latency, response size, user, role,
+empresa and client address. Entries go to an `AccessLog`, a `BatchWriter`
+whose thread serializes them and appends them in batches to
+`ACCESS_LOG_FILE` (rotated by size) or to stdout, so a request only pays
+for a tuple and a queue append; no file I/O happens on the event loop.
+
+Logging must never become the bottleneck, so it degrades instead of
+pushing back: `ACCESS_LOG_SAMPLE_RATE` logs that fraction of successful
+requests (errors, status >= 400, are always logged), and once the queue is
+more than half full only `ACCESS_LOG_OVERLOAD_SAMPLE_RATE` of them are.
+A full queue drops entries according to `ACCESS_LOG_OVERFLOW`
+(`drop_newest` or `drop_oldest`; producers never block).
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, List, Literal, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import Settings, get_settings
+from .metrics import _route_label, metrics
+from .writers import BatchWriter, RotatingFile
+
+ACCESS_LOG_RECORDS = metrics.counter(
+    "spa_access_log_records_total",
+    "Access log entries by outcome (written, sampled_out, dropped, failed).",
+    ("outcome",),
+)
+
+# (time, method, path, route, status, seconds, bytes, username, role, empresa, client)
+AccessEntry = Tuple[float, str, str, Optional[str], int, float, int, Optional[str], Optional[str], Optional[int], Optional[str]]
+
+
+class _Stdout:
+    def write(self, data: bytes) -> None:
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+    def close(self) -> None:
+        pass
+
+
+def _format(entry: AccessEntry) -> bytes:
+    timestamp, method, path, route, status, seconds, size, username, role, empresa, client = entry
+    return json.dumps(
+        {
+            "ts": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="milliseconds"),
+            "method": method,
+            "path": path,
+            "route": route,
+            "status": status,
+            "duration_ms": round(seconds * 1000, 3),
+            "bytes": size,
+            "user": username,
+            "role": role,
+            "empresa_id": empresa,
+            "client": client,
+        },
+        separators=(",", ":"),
+    ).encode()
+
+
+class AccessLog(BatchWriter[AccessEntry]):
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        queue_size: int = 10000,
+        overflow: Literal["drop_newest", "drop_oldest"] = "drop_newest",
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        sample_rate: float = 1.0,
+        overload_sample_rate: float = 0.1,
+    ):
+        if overflow == "block":
+            raise ValueError("The access log never blocks requests; use drop_newest or drop_oldest")
+        super().__init__(
+            name="access-log-writer",
+            outcomes=ACCESS_LOG_RECORDS,
+            queue_size=queue_size,
+            overflow=overflow,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+        )
+        self.target = RotatingFile(path, max_bytes, backup_count) if path else _Stdout()
+        self.sample_rate = sample_rate
+        self.overload_sample_rate = overload_sample_rate
+        self._overload_depth = queue_size // 2
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Settings] = None) -> "AccessLog":
+        settings = settings or get_settings()
+        return cls(
+            settings.access_log_file,
+            max_bytes=settings.access_log_max_bytes,
+            backup_count=settings.access_log_backup_count,
+            queue_size=settings.access_log_queue_size,
+            overflow=settings.access_log_overflow,
+            batch_size=settings.access_log_batch_size,
+            flush_interval=settings.access_log_flush_interval_seconds,
+            sample_rate=settings.access_log_sample_rate,
+            overload_sample_rate=settings.access_log_overload_sample_rate,
+        )
+
+    def log(self, entry: AccessEntry) -> None:
+        """Queue `entry` unless sampled out. Never blocks or raises."""
+        if entry[4] < 400:
+            rate = self.overload_sample_rate if len(self._queue) > self._overload_depth else self.sample_rate
+            if rate < 1.0 and random.random() >= rate:
+                ACCESS_LOG_RECORDS.inc(("sampled_out",))
+                return
+        self._put((entry,))
+
+    def write_batch(self, batch: List[AccessEntry]) -> None:
+        self.target.write(b"".join(_format(entry) + b"\n" for entry in batch))
+
+    def close(self) -> None:
+        self.target.close()
+
+
+def register_access_log_metrics(access_log: AccessLog) -> None:
+    metrics.register_collector(
+        "spa_access_log_queue_depth",
+        "Access log entries waiting for the writer.",
+        (),
+        lambda: {(): access_log.depth},
+    )
+
+
+class AccessLogMiddleware:
+    """Pure ASGI middleware queuing one `AccessLog` entry per HTTP request."""
+
+    def __init__(self, app: ASGIApp, access_log: AccessLog):
+        self.app = app
+        self.access_log = access_log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        timestamp = time.time()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            # Set by AuthMiddleware in the shared scope state; absent for docs.
+            state: Any = scope.get("state", {})
+            user = state.get("user")
+            username = (user.username or None) if user is not None else None
+            route = _route_label(scope)
+            client = scope.get("client")
+            self.access_log.log(
+                (
+                    timestamp,
+                    scope["method"],
+                    scope["path"],
+                    None if route == "<unmatched>" else route,
+                    status_code,
+                    elapsed,
+                    size,
+                    username,
+                    user.role.name if username else None,
+                    state.get("empresa_id"),
+                    client[0] if client else None,
+                )
+            )
+
+
+__all__ = [
+    "AccessLog",
+    "AccessLogMiddleware",
+    "register_access_log_metrics",
+]
@@ -0,0 +1,242 @@
+"""
+Admission control and load shedding.
+
+Each route belongs to a class declared with `@admission_class(...)` next to
+`@auth_config`:
+
+- `critical`: booking and login; never competes with reports for capacity.
+- `normal`: the default for every other endpoint.
+- `heavy`: reports, exports and batch operations.
+- `exempt`: health checks, metrics and long-lived streams; never queued.
+
+Every class except `exempt` has its own concurrency limit and a bounded
+FIFO wait queue. A request that finds the queue full is shed immediately
+with `503`; one that waits longer than the class timeout is shed as well.
+Limits are enforced by wrapping each route's ASGI app once at startup
+(`install_admission_control`), so the per-request cost is a counter check
+and requests are rejected before their body or dependencies are processed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Literal, Optional
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .config import Settings, get_settings
+from .metrics import LabelValues, metrics
+
+AdmissionClass = Literal["critical", "normal", "heavy", "exempt"]
+
+ADMISSION_SHED = metrics.counter(
+    "spa_admission_shed_total",
+    "Requests rejected with 503 by admission control.",
+    ("route_class", "reason"),
+)
+
+
+def admission_class(name: AdmissionClass):
+    """Assign an endpoint to an admission class (default `normal`)."""
+
+    def decorator(func):
+        setattr(func, "__admission_class__", name)
+        return func
+
+    return decorator
+
+
+def get_admission_class(endpoint) -> AdmissionClass:
+    return getattr(endpoint, "__admission_class__", "normal")
+
+
+@dataclass
+class GateStats:
+    route_class: str
+    limit: int
+    queue_size: int
+    active: int
+    queued: int
+    admitted: int
+    shed_queue_full: int
+    shed_timeout: int
+
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded FIFO wait queue.
+
+    Runs on the event loop only, so the counters need no lock. Releasing a
+    slot hands it directly to the oldest waiter, which keeps the order fair
+    and prevents newcomers from overtaking queued requests.
+    """
+
+    def __init__(self, route_class: str, limit: int, queue_size: int, timeout: float):
+        self.route_class = route_class
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.shed_queue_full = 0
+        self.shed_timeout = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[str]:
+        """Take a slot. Returns `None` when admitted, else the shed reason."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            self.shed_queue_full += 1
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over as the timeout fired: keep it.
+                self.admitted += 1
+                return None
+            waiter.cancel()
+            self._remove(waiter)
+            self.shed_timeout += 1
+            return "timeout"
+        except BaseException:
+            # Client went away while queued; give back a slot handed to us.
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                self._remove(waiter)
+            raise
+        self.admitted += 1
+        return None
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot over: `active` stays the same.
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _remove(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def stats(self) -> GateStats:
+        return GateStats(
+            route_class=self.route_class,
+            limit=self.limit,
+            queue_size=self.queue_size,
+            active=self.active,
+            queued=self.queued,
+            admitted=self.admitted,
+            shed_queue_full=self.shed_queue_full,
+            shed_timeout=self.shed_timeout,
+        )
+
+
+class AdmissionController:
+    def __init__(self, gates: Dict[str, AdmissionGate]):
+        self.gates = gates
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "AdmissionController":
+        timeout = settings.admission_queue_timeout_seconds
+        return cls(
+            {
+                "critical": AdmissionGate(
+                    "critical", settings.admission_critical_limit, settings.admission_critical_queue, timeout
+                ),
+                "normal": AdmissionGate(
+                    "normal", settings.admission_normal_limit, settings.admission_normal_queue, timeout
+                ),
+                "heavy": AdmissionGate(
+                    "heavy", settings.admission_heavy_limit, settings.admission_heavy_queue, timeout
+                ),
+            }
+        )
+
+    def wrap(self, app: ASGIApp, route_class: AdmissionClass) -> ASGIApp:
+        gate = self.gates.get(route_class)
+        if gate is None:
+            return app
+
+        async def admitted_app(scope: Scope, receive: Receive, send: Send) -> None:
+            reason = await gate.acquire()
+            if reason is not None:
+                ADMISSION_SHED.inc((gate.route_class, reason))
+                response = JSONResponse(
+                    {"detail": "Server busy, retry later"},
+                    status_code=503,
+                    headers={"Retry-After": "1"},
+                )
+                await response(scope, receive, send)
+                return
+            try:
+                await app(scope, receive, send)
+            finally:
+                gate.release()
+
+        return admitted_app
+
+    def stats(self) -> Dict[str, GateStats]:
+        return {name: gate.stats() for name, gate in self.gates.items()}
+
+    def _collect(self, attribute: str) -> Dict[LabelValues, float]:
+        return {(name,): getattr(gate, attribute) for name, gate in self.gates.items()}
+
+
+def install_admission_control(app: FastAPI, controller: Optional[AdmissionController] = None) -> AdmissionController:
+    """
+    Put every API route behind its class's gate (stored on `app.state`).
+
+    Call after all routers are included. Non-API routes (`/openapi.json`,
+    `/docs`) and WebSocket routes are left untouched.
+    """
+    controller = controller or AdmissionController.from_settings(get_settings())
+    app.state.admission = controller
+    for route in app.router.routes:
+        if isinstance(route, APIRoute):
+            route.app = controller.wrap(route.app, get_admission_class(route.endpoint))
+
+    metrics.register_collector(
+        "spa_admission_active",
+        "Requests currently admitted per route class.",
+        ("route_class",),
+        lambda: controller._collect("active"),
+    )
+    metrics.register_collector(
+        "spa_admission_queue_depth",
+        "Requests waiting for admission per route class.",
+        ("route_class",),
+        lambda: controller._collect("queued"),
+    )
+    return controller
+
+
+__all__ = [
+    "AdmissionController",
+    "AdmissionGate",
+    "GateStats",
+    "admission_class",
+    "get_admission_class",
+    "install_admission_control",
+]
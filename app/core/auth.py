@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+from contextvars import ContextVar
 from dataclasses import dataclass
 from enum import IntEnum
 from typing import Awaitable, Callable, Iterable, Optional
 
-from fastapi import HTTPException, Request, status
+from fastapi import HTTPException, Request, WebSocket, WebSocketException, status
 from pydantic import BaseModel, Field
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse
 
+from .config import get_settings
+from .metrics import measure
+from .ratelimit import RateLimit, rate_limit_identity, rate_limiter
 from .security import decode_access_token
+from .tenancy import EMPRESA_HEADER, WORKER_HEADER, TenantPlacement, current_empresa, default_placement
 
 
 class Role(IntEnum):
@@ -30,6 +37,7 @@ class TokenPayload(BaseModel):
     role: Role = Role.GUEST
     scopes: list[str] = Field(default_factory=list)
     full_name: Optional[str] = None
+    empresa_id: Optional[int] = None
 
 
 class AuthenticatedUser(BaseModel):
@@ -37,6 +45,8 @@ class AuthenticatedUser(BaseModel):
     role: Role
     scopes: set[str]
     full_name: Optional[str] = None
+    # Tenant the request runs for; filled in by the auth layer.
+    empresa_id: Optional[int] = None
 
     def has_scope(self, scope: str) -> bool:
         return scope in self.scopes
@@ -48,6 +58,13 @@ class AuthenticatedUser(BaseModel):
         return self.role >= required_role
 
 
+# User of the request being handled, for code below the routes (audit
+# hooks) that has no access to the request. `authorize` returns this same
+# user, but it runs in the threadpool, so it is made current by the
+# middleware (and by `authorize_websocket`) instead.
+current_user: ContextVar[Optional[AuthenticatedUser]] = ContextVar("current_user", default=None)
+
+
 @dataclass(frozen=True)
 class AuthConfig:
     required: bool = True
@@ -80,9 +97,31 @@ def build_user(payload: TokenPayload) -> AuthenticatedUser:
         role=payload.role,
         scopes=set(payload.scopes),
         full_name=payload.full_name,
+        empresa_id=payload.empresa_id,
     )
 
 
+def guest_user(empresa_id: Optional[int] = None) -> AuthenticatedUser:
+    return AuthenticatedUser(
+        username="",
+        role=Role.GUEST,
+        scopes=set(),
+        full_name=None,
+        empresa_id=empresa_id,
+    )
+
+
+def resolve_user(token: Optional[str]) -> AuthenticatedUser:
+    """Decode a bearer token into a user; missing or invalid tokens yield a guest."""
+    if token is None:
+        return guest_user()
+    try:
+        payload = TokenPayload(**decode_access_token(token))
+        return build_user(payload)
+    except Exception:
+        return guest_user()
+
+
 class AuthMiddleware(BaseHTTPMiddleware):
     ALWAYS_PUBLIC_PATHS = {
         "/openapi.json",
@@ -92,6 +131,25 @@ class AuthMiddleware(BaseHTTPMiddleware):
     }
     TOKEN_COOKIE_NAME = "spa_access_token"
 
+    def __init__(
+        self,
+        app,
+        default_limit: Optional[RateLimit] = None,
+        placement: Optional[TenantPlacement] = None,
+    ):
+        super().__init__(app)
+        settings = get_settings()
+        self.placement = placement or default_placement()
+        if default_limit is None:
+            if settings.rate_limit_per_minute > 0:
+                default_limit = RateLimit(
+                    requests=settings.rate_limit_per_minute,
+                    seconds=60.0,
+                    burst=settings.rate_limit_burst or settings.rate_limit_per_minute,
+                )
+        # Applied to every request per user/IP, on top of per-route `@rate_limit`s.
+        self.default_limit = default_limit
+
     async def dispatch(self, request: Request, call_next: Callable[[Request], Awaitable]):
         # Always attempt to extract a token so user info can be injected on every request.
         try:
@@ -99,34 +157,51 @@ class AuthMiddleware(BaseHTTPMiddleware):
         except HTTPException:
             token = None
 
-        if token is not None:
+        # Anonymous/guest user when no valid token is present or it fails to decode.
+        user = resolve_user(token)
+
+        if request.url.path not in self.ALWAYS_PUBLIC_PATHS:
             try:
-                payload = TokenPayload(**decode_access_token(token))
-                user = build_user(payload)
-            except Exception:
-                # On any decoding/validation error, treat as anonymous guest.
-                user = AuthenticatedUser(
-                    username="",
-                    role=Role.GUEST,
-                    scopes=set(),
-                    full_name=None,
-                )
-        else:
-            # Anonymous/guest user when no valid token is present.
-            user = AuthenticatedUser(
-                username="",
-                role=Role.GUEST,
-                scopes=set(),
-                full_name=None,
-            )
+                user = self._with_empresa(request, user)
+            except HTTPException as exc:
+                return JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)
 
         # Inject user info into the request; per-endpoint enforcement is handled via dependencies.
         request.state.user = user
+        current_user.set(user)
+
+        if self.default_limit is not None and request.url.path not in self.ALWAYS_PUBLIC_PATHS:
+            try:
+                rate_limiter.check("default", rate_limit_identity(request), self.default_limit)
+            except HTTPException as exc:
+                # Raised outside the routing layer, so FastAPI's handlers do not see it.
+                return JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)
 
         return await call_next(request)
 
+    def _with_empresa(self, request: Request, user: AuthenticatedUser) -> AuthenticatedUser:
+        """
+        Resolve the request's empresa (token claim, else `X-Empresa-Id` for
+        anonymous requests, else the default) and make it current.
+        """
+        empresa_id = user.empresa_id
+        if empresa_id is None:
+            header = request.headers.get(EMPRESA_HEADER)
+            if header is not None and not user.username:
+                try:
+                    empresa_id = int(header)
+                except ValueError:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid {EMPRESA_HEADER} header")
+            else:
+                empresa_id = self.placement.default
+            user = user.model_copy(update={"empresa_id": empresa_id})
+        check_empresa(self.placement, empresa_id)
+        request.state.empresa_id = empresa_id
+        current_empresa.set(empresa_id)
+        return user
+
     @staticmethod
-    def _extract_token(request: Request) -> str:
+    def _extract_token(request: HTTPConnection) -> str:
         header = request.headers.get("Authorization")
         if header and header.startswith("Bearer "):
             return header.split(" ", 1)[1].strip()
@@ -164,24 +239,72 @@ def authorize(request: Request) -> AuthenticatedUser:
 
     It reads the AuthConfig attached by `@auth_config` on the resolved endpoint
     and applies `required`, `minimum_role` and `scopes` checks against the
-    user injected by AuthMiddleware.
+    user injected by AuthMiddleware, after the endpoint's `@rate_limit` (so
+    rejected credentials also consume tokens).
     """
-    endpoint = request.scope.get("endpoint")
-    config = get_auth_config(endpoint)
-
-    user = get_current_user(request)
-    if user is None:
-        # Should not generally happen because middleware injects a guest user,
-        # but keep a safe default.
-        user = AuthenticatedUser(
-            username="",
-            role=Role.GUEST,
-            scopes=set(),
-            full_name=None,
+    with measure("auth.authorize"):
+        endpoint = request.scope.get("endpoint")
+        config = get_auth_config(endpoint)
+
+        user = get_current_user(request)
+        if user is None:
+            # Should not generally happen because middleware injects a guest user,
+            # but keep a safe default.
+            user = guest_user()
+
+        rate_limiter.enforce(request)
+        check_access(config, user)
+    return user
+
+
+async def authorize_websocket(websocket: WebSocket) -> AuthenticatedUser:
+    """
+    WebSocket counterpart of `authorize`.
+
+    HTTP middleware does not run for WebSocket connections, so the token is
+    resolved here from the `token` query parameter, the Authorization header or
+    the access token cookie, and the empresa is made current here as well
+    (this dependency is async so that it runs in the endpoint's context).
+    Failures close the handshake with policy violation.
+    """
+    token = websocket.query_params.get("token")
+    if token is None:
+        try:
+            token = AuthMiddleware._extract_token(websocket)
+        except HTTPException:
+            token = None
+
+    user = resolve_user(token)
+    placement = default_placement()
+    if user.empresa_id is None:
+        user = user.model_copy(update={"empresa_id": placement.default})
+    websocket.state.user = user
+    try:
+        check_access(get_auth_config(websocket.scope.get("endpoint")), user)
+        check_empresa(placement, user.empresa_id)
+    except HTTPException as exc:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail) from exc
+    current_empresa.set(user.empresa_id)
+    current_user.set(user)
+    return user
+
+
+def check_empresa(placement: TenantPlacement, empresa_id: int) -> None:
+    """Reject empresas this deployment does not know or this worker does not serve."""
+    if not placement.is_known(empresa_id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Unknown empresa")
+    if not placement.serves(empresa_id):
+        raise HTTPException(
+            status_code=status.HTTP_421_MISDIRECTED_REQUEST,
+            detail="Empresa is served by another worker",
+            headers={WORKER_HEADER: placement.worker_for(empresa_id) or ""},
         )
 
+
+def check_access(config: AuthConfig, user: AuthenticatedUser) -> None:
+    """Apply an endpoint's `required`, `minimum_role` and `scopes` checks to `user`."""
     if not config.required:
-        return user
+        return
 
     # If auth is required, a guest user (no username) is considered unauthenticated.
     if not user.username:
@@ -204,5 +327,3 @@ def authorize(request: Request) -> AuthenticatedUser:
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"Missing required scopes: {', '.join(sorted(missing))}",
         )
-
-    return user
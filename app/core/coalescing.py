@@ -0,0 +1,139 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+GET endpoints marked with `@coalesced` share one in-flight computation:
+while a request is being served, identical requests wait for it and replay
+its response (status, headers and serialized body) instead of running the
+endpoint again. Nothing is kept once the leading request completes, so
+this is not a cache; it only collapses bursts.
+
+Requests are identical when they have the same path, query string,
+empresa and authorization class: whether the caller is authenticated, its
+role and its scopes. Only mark endpoints whose response depends on nothing else
+about the caller (e.g. not the staff agenda, which checks the username).
+
+Followers skip the endpoint's dependencies, so the endpoint's
+`@rate_limit` is applied to them here.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import metrics
+from .ratelimit import rate_limiter
+
+CoalesceKey = Tuple[str, bytes, bool, int, FrozenSet[str], Optional[int]]
+
+COALESCED_REQUESTS = metrics.counter(
+    "spa_coalesced_requests_total",
+    "GET requests answered with the response of an identical in-flight request.",
+    ("route",),
+)
+
+
+def coalesced(func):
+    """Let identical concurrent GET requests to this endpoint share one response."""
+    setattr(func, "__coalesce__", True)
+    return func
+
+
+def is_coalesced(endpoint) -> bool:
+    return getattr(endpoint, "__coalesce__", False)
+
+
+def coalesce_key(scope: Scope) -> CoalesceKey:
+    user = scope.get("state", {}).get("user")
+    if user is None:
+        identity = (False, 0, frozenset(), None)
+    else:
+        identity = (bool(user.username), int(user.role), frozenset(user.scopes), user.empresa_id)
+    return (scope["path"], scope.get("query_string", b""), *identity)
+
+
+class RequestCoalescer:
+    """In-flight GET computations keyed by `coalesce_key`. Event loop only."""
+
+    def __init__(self):
+        self._in_flight: Dict[CoalesceKey, "asyncio.Future[Optional[List[Message]]]"] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def wrap(self, app: ASGIApp, route_path: str) -> ASGIApp:
+        labels = (route_path,)
+
+        async def coalesced_app(scope: Scope, receive: Receive, send: Send) -> None:
+            if scope["method"] != "GET":
+                await app(scope, receive, send)
+                return
+
+            key = coalesce_key(scope)
+            leader = self._in_flight.get(key)
+            if leader is not None:
+                messages = await asyncio.shield(leader)
+                if messages is not None:
+                    if await _rate_limited(scope, receive, send):
+                        return
+                    COALESCED_REQUESTS.inc(labels)
+                    for message in messages:
+                        await send(message)
+                    return
+                # The leading request failed: compute our own response.
+                await app(scope, receive, send)
+                return
+
+            future: "asyncio.Future[Optional[List[Message]]]" = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            messages: List[Message] = []
+
+            async def recording_send(message: Message) -> None:
+                messages.append(message)
+                await send(message)
+
+            completed = False
+            try:
+                await app(scope, receive, recording_send)
+                completed = True
+            finally:
+                del self._in_flight[key]
+                future.set_result(messages if completed else None)
+
+        return coalesced_app
+
+
+async def _rate_limited(scope: Scope, receive: Receive, send: Send) -> bool:
+    try:
+        rate_limiter.enforce(Request(scope, receive))
+    except HTTPException as exc:
+        response = JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+        await response(scope, receive, send)
+        return True
+    return False
+
+
+def install_request_coalescing(app: FastAPI) -> RequestCoalescer:
+    """Wrap every `@coalesced` GET route (call after all routers are included)."""
+    coalescer = RequestCoalescer()
+    app.state.coalescer = coalescer
+    for route in app.router.routes:
+        if isinstance(route, APIRoute) and "GET" in route.methods and is_coalesced(route.endpoint):
+            route.app = coalescer.wrap(route.app, route.path)
+    return coalescer
+
+
+__all__ = [
+    "RequestCoalescer",
+    "coalesce_key",
+    "coalesced",
+    "install_request_coalescing",
+    "is_coalesced",
+]
@@ -1,3 +1,7 @@
+from datetime import time
+from functools import lru_cache
+from typing import Literal, Optional
+
 from dotenv import load_dotenv
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -13,6 +17,73 @@ class Settings(BaseSettings):
     jwt_secret_key: str = Field(default="change-me!", validation_alias="JWT_SECRET_KEY")
     jwt_algorithm: str = Field(default="HS256", validation_alias="JWT_ALGORITHM")
     jwt_expiration_minutes: str = Field(default="60", validation_alias="JWT_EXPIRATION_MINUTES")
+    event_history_size: int = Field(default=1000, validation_alias="EVENT_HISTORY_SIZE")
+    event_queue_size: int = Field(default=100, validation_alias="EVENT_QUEUE_SIZE")
+    recurring_horizon_days: int = Field(default=28, validation_alias="RECURRING_HORIZON_DAYS")
+    scheduler_enabled: bool = Field(default=True, validation_alias="SCHEDULER_ENABLED")
+    scheduler_lease_dir: Optional[str] = Field(default=None, validation_alias="SCHEDULER_LEASE_DIR")
+    scheduler_lease_ttl_seconds: int = Field(default=300, validation_alias="SCHEDULER_LEASE_TTL_SECONDS")
+    auto_complete_enabled: bool = Field(default=True, validation_alias="AUTO_COMPLETE_ENABLED")
+    auto_complete_lookback_days: int = Field(default=7, validation_alias="AUTO_COMPLETE_LOOKBACK_DAYS")
+    status_batch_size: int = Field(default=500, validation_alias="STATUS_BATCH_SIZE")
+    metrics_enabled: bool = Field(default=True, validation_alias="METRICS_ENABLED")
+    profiling_enabled: bool = Field(default=False, validation_alias="PROFILING_ENABLED")
+    profiling_sample_rate: float = Field(default=0.0, validation_alias="PROFILING_SAMPLE_RATE")
+    profiling_buffer_size: int = Field(default=20, validation_alias="PROFILING_BUFFER_SIZE")
+    rate_limit_enabled: bool = Field(default=True, validation_alias="RATE_LIMIT_ENABLED")
+    rate_limit_per_minute: int = Field(default=0, validation_alias="RATE_LIMIT_PER_MINUTE")
+    rate_limit_burst: int = Field(default=0, validation_alias="RATE_LIMIT_BURST")
+    rate_limit_shards: int = Field(default=16, validation_alias="RATE_LIMIT_SHARDS")
+    rate_limit_max_buckets: int = Field(default=10000, validation_alias="RATE_LIMIT_MAX_BUCKETS")
+    admission_enabled: bool = Field(default=True, validation_alias="ADMISSION_ENABLED")
+    admission_critical_limit: int = Field(default=64, validation_alias="ADMISSION_CRITICAL_LIMIT")
+    admission_critical_queue: int = Field(default=256, validation_alias="ADMISSION_CRITICAL_QUEUE")
+    admission_normal_limit: int = Field(default=32, validation_alias="ADMISSION_NORMAL_LIMIT")
+    admission_normal_queue: int = Field(default=128, validation_alias="ADMISSION_NORMAL_QUEUE")
+    admission_heavy_limit: int = Field(default=2, validation_alias="ADMISSION_HEAVY_LIMIT")
+    admission_heavy_queue: int = Field(default=4, validation_alias="ADMISSION_HEAVY_QUEUE")
+    admission_queue_timeout_seconds: float = Field(default=5.0, validation_alias="ADMISSION_QUEUE_TIMEOUT_SECONDS")
+    coalescing_enabled: bool = Field(default=True, validation_alias="COALESCING_ENABLED")
+    cache_enabled: bool = Field(default=True, validation_alias="CACHE_ENABLED")
+    cache_max_size: int = Field(default=4096, validation_alias="CACHE_MAX_SIZE")
+    cache_ttl_seconds: float = Field(default=60.0, validation_alias="CACHE_TTL_SECONDS")
+    default_empresa_id: int = Field(default=1, validation_alias="DEFAULT_EMPRESA_ID")
+    tenants: str = Field(default="", validation_alias="TENANTS")
+    tenant_placement: str = Field(default="", validation_alias="TENANT_PLACEMENT")
+    worker_name: Optional[str] = Field(default=None, validation_alias="WORKER_NAME")
+    audit_enabled: bool = Field(default=True, validation_alias="AUDIT_ENABLED")
+    audit_dir: Optional[str] = Field(default=None, validation_alias="AUDIT_DIR")
+    audit_max_bytes: int = Field(default=10 * 1024 * 1024, validation_alias="AUDIT_MAX_BYTES")
+    audit_backup_count: int = Field(default=5, validation_alias="AUDIT_BACKUP_COUNT")
+    audit_memory_records: int = Field(default=10000, validation_alias="AUDIT_MEMORY_RECORDS")
+    audit_queue_size: int = Field(default=10000, validation_alias="AUDIT_QUEUE_SIZE")
+    audit_overflow: Literal["drop_newest", "drop_oldest", "block"] = Field(
+        default="drop_newest", validation_alias="AUDIT_OVERFLOW"
+    )
+    audit_block_timeout_seconds: float = Field(default=0.5, validation_alias="AUDIT_BLOCK_TIMEOUT_SECONDS")
+    audit_batch_size: int = Field(default=500, validation_alias="AUDIT_BATCH_SIZE")
+    audit_flush_interval_seconds: float = Field(default=1.0, validation_alias="AUDIT_FLUSH_INTERVAL_SECONDS")
+    access_log_enabled: bool = Field(default=True, validation_alias="ACCESS_LOG_ENABLED")
+    access_log_file: Optional[str] = Field(default=None, validation_alias="ACCESS_LOG_FILE")
+    access_log_max_bytes: int = Field(default=10 * 1024 * 1024, validation_alias="ACCESS_LOG_MAX_BYTES")
+    access_log_backup_count: int = Field(default=5, validation_alias="ACCESS_LOG_BACKUP_COUNT")
+    access_log_queue_size: int = Field(default=10000, validation_alias="ACCESS_LOG_QUEUE_SIZE")
+    access_log_overflow: Literal["drop_newest", "drop_oldest"] = Field(
+        default="drop_newest", validation_alias="ACCESS_LOG_OVERFLOW"
+    )
+    access_log_batch_size: int = Field(default=500, validation_alias="ACCESS_LOG_BATCH_SIZE")
+    access_log_flush_interval_seconds: float = Field(default=1.0, validation_alias="ACCESS_LOG_FLUSH_INTERVAL_SECONDS")
+    access_log_sample_rate: float = Field(default=1.0, validation_alias="ACCESS_LOG_SAMPLE_RATE")
+    access_log_overload_sample_rate: float = Field(default=0.1, validation_alias="ACCESS_LOG_OVERLOAD_SAMPLE_RATE")
+    lead_buffer_size: int = Field(default=50000, validation_alias="LEAD_BUFFER_SIZE")
+    lead_batch_size: int = Field(default=500, validation_alias="LEAD_BATCH_SIZE")
+    lead_flush_interval_seconds: float = Field(default=0.5, validation_alias="LEAD_FLUSH_INTERVAL_SECONDS")
+    dedup_min_score: float = Field(default=0.6, validation_alias="DEDUP_MIN_SCORE")
+    dedup_max_block_size: int = Field(default=200, validation_alias="DEDUP_MAX_BLOCK_SIZE")
+    work_day_start: time = Field(default=time(8, 0), validation_alias="WORK_DAY_START")
+    work_day_end: time = Field(default=time(20, 0), validation_alias="WORK_DAY_END")
+    # Python weekdays (0 = Monday).
+    work_weekdays: str = Field(default="0,1,2,3,4,5", validation_alias="WORK_WEEKDAYS")
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -22,5 +93,10 @@ class Settings(BaseSettings):
     )
 
 
+@lru_cache
 def get_settings() -> Settings:
+    """
+    The settings, read once from the environment and `.env`. Call
+    `get_settings.cache_clear()` after changing them (tests, tooling).
+    """
     return Settings()
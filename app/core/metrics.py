@@ -0,0 +1,395 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Each metric records into per-thread shards: a thread only ever writes its
+own dictionary, so recording takes no lock and costs a couple of dict
+operations. Shards are summed when `/metrics` is scraped. Store sizes and
+other values that are cheap to read on demand are registered as collectors
+and evaluated at scrape time instead of being tracked on every mutation.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._shards: List[Dict[LabelValues, Any]] = []
+        self._shards_lock = threading.Lock()
+
+    def _new_shard(self) -> Dict[LabelValues, Any]:
+        shard: Dict[LabelValues, Any] = defaultdict(float) if self.kind != "histogram" else {}
+        self._local.values = shard
+        # Taken once per thread, never on the recording path.
+        with self._shards_lock:
+            self._shards.append(shard)
+        return shard
+
+    def _snapshot(self) -> List[Dict[LabelValues, Any]]:
+        with self._shards_lock:
+            return [dict(shard) for shard in self._shards]
+
+    def samples(self) -> Dict[LabelValues, float]:
+        totals: Dict[LabelValues, float] = defaultdict(float)
+        for shard in self._snapshot():
+            for labels, value in shard.items():
+                totals[labels] += value
+        return totals
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        try:
+            values = self._local.values
+        except AttributeError:
+            values = self._new_shard()
+        values[labels] += amount
+
+
+class Gauge(Counter):
+    """Gauge tracked as the sum of per-thread increments (e.g. in-flight requests)."""
+
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args: Any, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(*args)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        try:
+            values = self._local.values
+        except AttributeError:
+            values = self._new_shard()
+        # Per label set: [count per bucket..., count above the last bucket, sum]
+        sample = values.get(labels)
+        if sample is None:
+            sample = values[labels] = [0.0] * (len(self.buckets) + 2)
+        sample[bisect_left(self.buckets, value)] += 1
+        sample[-1] += value
+
+    def samples(self) -> Dict[LabelValues, List[float]]:
+        totals: Dict[LabelValues, List[float]] = {}
+        for shard in self._snapshot():
+            for labels, sample in shard.items():
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = list(sample)
+                else:
+                    for index, count in enumerate(sample):
+                        total[index] += count
+        return totals
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Tuple[str, Sequence[str], Callable[[], Dict[LabelValues, float]]]] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets=buckets))
+
+    def register_collector(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str],
+        collect: Callable[[], Dict[LabelValues, float]],
+    ) -> None:
+        """
+        Gauge whose samples are produced by `collect()` at scrape time.
+        Registering the same name again replaces the previous collector.
+        """
+        self._collectors[name] = (documentation, tuple(labels), collect)
+
+    def render(self, empresa: Optional[str] = None) -> str:
+        """
+        Prometheus text format. With `empresa`, series labelled with another
+        empresa are left out; process-wide series are always included.
+        """
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, value in sorted(metric.samples().items()):
+                if not _visible(metric.labels, labels, empresa):
+                    continue
+                if isinstance(metric, Histogram):
+                    lines.extend(_histogram_lines(metric, labels, value))
+                else:
+                    lines.append(f"{name}{_format_labels(metric.labels, labels)} {_format_value(value)}")
+
+        for name, (documentation, label_names, collect) in self._collectors.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in sorted(collect().items()):
+                if not _visible(label_names, labels, empresa):
+                    continue
+                lines.append(f"{name}{_format_labels(label_names, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _visible(names: Sequence[str], values: LabelValues, empresa: Optional[str]) -> bool:
+    if empresa is None or "empresa" not in names:
+        return True
+    return values[names.index("empresa")] == empresa
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _histogram_lines(metric: Histogram, labels: LabelValues, sample: List[float]) -> List[str]:
+    lines = []
+    cumulative = 0.0
+    for bound, count in zip(metric.buckets + (float("inf"),), sample):
+        cumulative += count
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        names = metric.labels + ("le",)
+        lines.append(f"{metric.name}_bucket{_format_labels(names, labels + (le,))} {_format_value(cumulative)}")
+    lines.append(f"{metric.name}_sum{_format_labels(metric.labels, labels)} {repr(sample[-1])}")
+    lines.append(f"{metric.name}_count{_format_labels(metric.labels, labels)} {_format_value(cumulative)}")
+    return lines
+
+
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter(
+    "spa_http_requests_total",
+    "HTTP requests by route and status code.",
+    ("method", "route", "status"),
+)
+HTTP_ERRORS = metrics.counter(
+    "spa_http_errors_total",
+    "HTTP requests answered with a 4xx/5xx status or an unhandled exception.",
+    ("method", "route", "status"),
+)
+HTTP_LATENCY = metrics.histogram(
+    "spa_http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ("method", "route"),
+)
+TENANT_REQUESTS = metrics.counter(
+    "spa_tenant_requests_total",
+    "HTTP requests by empresa and status code.",
+    ("empresa", "status"),
+)
+TENANT_LATENCY = metrics.histogram(
+    "spa_tenant_request_duration_seconds",
+    "HTTP request latency by empresa.",
+    ("empresa",),
+)
+HTTP_IN_FLIGHT = metrics.gauge(
+    "spa_http_requests_in_flight",
+    "HTTP requests currently being served.",
+    ("method",),
+)
+FUNCTION_LATENCY = metrics.histogram(
+    "spa_function_duration_seconds",
+    "Time spent in instrumented functions (auth and service methods).",
+    ("function",),
+)
+
+
+def timed(name: str, histogram: Histogram = FUNCTION_LATENCY):
+    """Decorator recording the wall time of each call (sync or async) in `histogram`."""
+    labels = (name,)
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(labels, time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(labels, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class measure:
+    """Context manager recording the wall time of a block under `name`."""
+
+    __slots__ = ("_labels", "_histogram", "_start")
+
+    def __init__(self, name: str, histogram: Histogram = FUNCTION_LATENCY):
+        self._labels = (name,)
+        self._histogram = histogram
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._histogram.observe(self._labels, time.perf_counter() - self._start)
+
+
+def instrument_service(service: Any, name: str, exclude: Iterable[str] = ("register_hook",)) -> Any:
+    """
+    Time every public method of `service` under `<name>.<method>`.
+
+    Methods are wrapped on the instance, so the class and other instances
+    are untouched. Methods returning generators are timed up to the
+    generator's creation only.
+    """
+    excluded = set(exclude)
+    for attribute, member in inspect.getmembers(type(service), inspect.isfunction):
+        if attribute.startswith("_") or attribute in excluded:
+            continue
+        setattr(service, attribute, timed(f"{name}.{attribute}")(getattr(service, attribute)))
+    return service
+
+
+def _route_label(scope: Scope) -> str:
+    # Use the route template ("/appointments/{appointment_id}/status") so label
+    # cardinality stays bounded by the number of routes.
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path is not None else "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency, status counters and in-flight requests."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc((method,))
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec((method,))
+            route = _route_label(scope)
+            labels = (method, route, str(status_code))
+            HTTP_REQUESTS.inc(labels)
+            if status_code >= 400:
+                HTTP_ERRORS.inc(labels)
+            HTTP_LATENCY.observe((method, route), elapsed)
+            # Set by AuthMiddleware in the shared scope state; absent for docs.
+            empresa = scope.get("state", {}).get("empresa_id")
+            if empresa is not None:
+                TENANT_REQUESTS.inc((str(empresa), str(status_code)))
+                TENANT_LATENCY.observe((str(empresa),), elapsed)
+
+
+_store_sizes: Dict[str, Dict[str, Callable[[], Dict[str, int]]]] = {}
+
+
+def register_store_sizes(stores: Dict[str, Callable[[], Dict[str, int]]], empresa: str = "") -> None:
+    """
+    Expose `spa_store_items{empresa, service, store}` from each service's
+    `store_sizes()`. Each empresa registers its own services.
+    """
+    _store_sizes[empresa] = dict(stores)
+
+    def collect() -> Dict[LabelValues, float]:
+        samples: Dict[LabelValues, float] = {}
+        for tenant, services in list(_store_sizes.items()):
+            for service, sizes in services.items():
+                for store, size in sizes().items():
+                    samples[(tenant, service, store)] = size
+        return samples
+
+    metrics.register_collector(
+        "spa_store_items",
+        "Number of records held by each in-memory store.",
+        ("empresa", "service", "store"),
+        collect,
+    )
+
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsMiddleware",
+    "MetricsRegistry",
+    "instrument_service",
+    "measure",
+    "metrics",
+    "register_store_sizes",
+    "timed",
+]
@@ -0,0 +1,89 @@
+"""
+Pre-built OpenAPI document.
+
+FastAPI generates the schema on the first `/openapi.json` request and then
+serializes the (large) dict again on every hit. `OpenAPICache` generates it
+once during startup and keeps the serialized JSON and its gzip encoding as
+bytes, so serving the document is a header check and a memory copy.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+from threading import Lock
+from typing import Optional
+
+from fastapi import FastAPI
+from starlette.requests import Request
+from starlette.responses import Response
+
+GZIP_LEVEL = 9
+
+
+def _accepts_gzip(request: Request) -> bool:
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() == "gzip":
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class OpenAPICache:
+    """Serialized (and gzip-compressed) OpenAPI schema of an application."""
+
+    def __init__(self):
+        self.body: Optional[bytes] = None
+        self.gzip_body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+        self._lock = Lock()
+
+    def build(self, app: FastAPI) -> None:
+        schema = app.openapi()
+        body = json.dumps(schema, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # mtime=0 keeps the compressed bytes identical across restarts.
+        gzip_body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        with self._lock:
+            self.body, self.gzip_body, self.etag = body, gzip_body, etag
+
+    def response(self, request: Request) -> Response:
+        if self.body is None:
+            # Startup did not run (e.g. app used without its lifespan).
+            self.build(request.app)
+
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=headers)
+        if _accepts_gzip(request):
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzip_body, media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+def install_openapi_cache(app: FastAPI) -> OpenAPICache:
+    """
+    Serve `app.openapi_url` from an `OpenAPICache` (stored on `app.state`).
+
+    The route FastAPI registers for the schema is replaced; `/docs` and
+    `/redoc` keep pointing at the same URL. Call `cache.build(app)` once all
+    routers are mounted, typically from the lifespan.
+    """
+    cache = OpenAPICache()
+    app.state.openapi_cache = cache
+    if not app.openapi_url:
+        return cache
+
+    app.router.routes[:] = [
+        route for route in app.router.routes if getattr(route, "path", None) != app.openapi_url
+    ]
+
+    async def openapi(request: Request) -> Response:
+        return cache.response(request)
+
+    app.add_route(app.openapi_url, openapi, include_in_schema=False)
+    return cache
+
+
+__all__ = ["OpenAPICache", "install_openapi_cache"]
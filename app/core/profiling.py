@@ -0,0 +1,204 @@
+"""
+On-demand request profiling.
+
+When enabled, `ProfilingMiddleware` runs selected requests under `cProfile`
+and keeps the result in a bounded ring buffer (`profile_store`) that OWNER
+users can list and download through `/admin/profiles`, each seeing only the
+profiles of their own empresa. A request is
+profiled when an OWNER sends the `X-Profile: 1` header, or when it falls in
+the configured sample of traffic.
+
+cProfile is deterministic and per thread: the profile covers the event loop
+thread (middleware, async endpoints and services called from them) while the
+request is in flight. Sync endpoints executed in the threadpool only show
+up as the time spent awaiting them. Only one request is profiled at a time.
+
+The middleware is not installed at all unless `PROFILING_ENABLED` is set,
+so the normal request path is unaffected when the mode is off.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import count
+from threading import Lock
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .auth import Role
+from .config import get_settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+
+@dataclass
+class RequestProfile:
+    id: int
+    method: str
+    path: str
+    route: Optional[str]
+    status_code: int
+    duration_ms: float
+    trigger: str
+    username: Optional[str]
+    empresa_id: Optional[int]
+    created_at: datetime
+    # `pstats` data as produced by `Profile.create_stats()`.
+    stats: Dict[Tuple[str, int, str], Any]
+
+    def dump(self) -> bytes:
+        """Binary `.prof` content, readable by `pstats`/snakeviz."""
+        return marshal.dumps(self.stats)
+
+    def render_text(self, limit: int = 50, sort: str = "cumulative") -> str:
+        """Flat profile followed by the call graph (callers and callees)."""
+        stream = io.StringIO()
+        stats = pstats.Stats(_LoadedStats(self.stats), stream=stream)
+        stats.sort_stats(sort)
+        stats.print_stats(limit)
+        stats.print_callers(limit)
+        stats.print_callees(limit)
+        return stream.getvalue()
+
+
+class _LoadedStats:
+    """Adapter so `pstats.Stats` can load already collected stats."""
+
+    def __init__(self, stats: Dict[Tuple[str, int, str], Any]):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class ProfileStore:
+    """
+    Ring buffer keeping the last `size` request profiles. Reads are scoped to
+    the empresa of the request that was profiled.
+    """
+
+    def __init__(self, size: int = 20):
+        self._profiles: Deque[RequestProfile] = deque(maxlen=size)
+        self._sequence = count(1)
+        self._lock = Lock()
+
+    def next_id(self) -> int:
+        # Reserved before the request runs so it can be sent as a response header.
+        with self._lock:
+            return next(self._sequence)
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list_profiles(self, empresa_id: Optional[int]) -> List[RequestProfile]:
+        with self._lock:
+            return [profile for profile in reversed(self._profiles) if profile.empresa_id == empresa_id]
+
+    def get_profile(self, empresa_id: Optional[int], profile_id: int) -> Optional[RequestProfile]:
+        with self._lock:
+            for profile in self._profiles:
+                if profile.id == profile_id and profile.empresa_id == empresa_id:
+                    return profile
+        return None
+
+
+profile_store = ProfileStore(get_settings().profiling_buffer_size)
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware profiling selected requests.
+
+    Must run inside `AuthMiddleware` so the resolved user is available in
+    `scope["state"]`.
+    """
+
+    def __init__(self, app: ASGIApp, *, store: ProfileStore = profile_store, sample_rate: float = 0.0):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        # cProfile allows a single active profiler per thread.
+        self._busy = Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = self._trigger(scope)
+        if trigger is None or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send, trigger)
+        finally:
+            self._busy.release()
+
+    def _trigger(self, scope: Scope) -> Optional[str]:
+        user = scope.get("state", {}).get("user")
+        if user is not None and user.role >= Role.OWNER:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER and value in (b"1", b"true"):
+                    return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, trigger: str) -> None:
+        profile_id = self.store.next_id()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER, str(profile_id).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - start
+            profiler.create_stats()
+            user = scope.get("state", {}).get("user")
+            route = getattr(scope.get("route"), "path", None)
+            self.store.add(
+                RequestProfile(
+                    id=profile_id,
+                    method=scope["method"],
+                    path=scope["path"],
+                    route=route,
+                    status_code=status_code,
+                    duration_ms=round(duration * 1000, 3),
+                    trigger=trigger,
+                    username=getattr(user, "username", None) or None,
+                    empresa_id=getattr(user, "empresa_id", None),
+                    created_at=datetime.utcnow(),
+                    stats=profiler.stats,
+                )
+            )
+
+
+__all__ = [
+    "ProfileStore",
+    "ProfilingMiddleware",
+    "RequestProfile",
+    "profile_store",
+]
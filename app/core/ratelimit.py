@@ -0,0 +1,207 @@
+"""
+Token-bucket rate limiting.
+
+Limits are declared per endpoint with `@rate_limit(...)`, next to
+`@auth_config`, and enforced by `authorize` (or by the `throttle`
+dependency on endpoints that do not use `authorize`, such as login).
+Requests are keyed by the username resolved by `AuthMiddleware`, or by the
+client IP for anonymous traffic; `key="ip"` always keys by IP.
+
+Buckets live in a sharded in-memory store: each update is a dict lookup
+and a little arithmetic under one shard's lock. A bucket that has been idle
+long enough to refill completely is indistinguishable from a new one, so it
+is evicted; shards are also capped so a flood of distinct keys cannot grow
+memory without bound.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import List, Literal, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from starlette.requests import HTTPConnection
+
+from .config import get_settings
+from .metrics import metrics
+
+RateLimitKey = Literal["user", "ip"]
+
+RATE_LIMITED = metrics.counter(
+    "spa_rate_limited_total",
+    "Requests rejected with 429 by the rate limiter.",
+    ("bucket",),
+)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """`requests` per `seconds`, allowing bursts of up to `burst` requests."""
+
+    requests: int
+    seconds: float
+    burst: int
+    key: RateLimitKey = "user"
+    # Endpoints sharing a name share buckets (e.g. both login endpoints).
+    name: Optional[str] = None
+
+    @property
+    def rate(self) -> float:
+        return self.requests / self.seconds
+
+
+def rate_limit(
+    requests: int,
+    seconds: float = 60.0,
+    *,
+    burst: Optional[int] = None,
+    key: RateLimitKey = "user",
+    name: Optional[str] = None,
+):
+    """Attach a token-bucket limit to an endpoint (see `auth_config`)."""
+    if requests <= 0 or seconds <= 0:
+        raise ValueError("rate_limit requires positive requests and seconds")
+    config = RateLimit(requests=requests, seconds=seconds, burst=burst or requests, key=key, name=name)
+
+    def decorator(func):
+        setattr(func, "__rate_limit__", config)
+        return func
+
+    return decorator
+
+
+def get_rate_limit(endpoint) -> Optional[RateLimit]:
+    return getattr(endpoint, "__rate_limit__", None)
+
+
+class TokenBucketStore:
+    """
+    Sharded token buckets.
+
+    Each shard is an `OrderedDict` kept in last-update order, so idle buckets
+    collect at the front and eviction pops them in O(1) each.
+    """
+
+    def __init__(self, shards: int = 16, max_buckets_per_shard: int = 10_000):
+        self._shards: List[Tuple[Lock, "OrderedDict[str, List[float]]"]] = [
+            (Lock(), OrderedDict()) for _ in range(max(1, shards))
+        ]
+        self._max_buckets = max_buckets_per_shard
+
+    def acquire(self, key: str, rate: float, burst: int, now: Optional[float] = None) -> float:
+        """
+        Take one token from `key`'s bucket. Returns 0 when the request is
+        allowed, otherwise the seconds until a token is available.
+        """
+        now = time.monotonic() if now is None else now
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            # Bucket layout: [tokens, last update, time it is full again]
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [float(burst), now, now]
+            else:
+                buckets.move_to_end(key)
+                bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                retry_after = 0.0
+            else:
+                retry_after = (1.0 - bucket[0]) / rate
+            bucket[2] = now + (burst - bucket[0]) / rate
+
+            self._evict(buckets, now)
+        return retry_after
+
+    def _evict(self, buckets: "OrderedDict[str, List[float]]", now: float) -> None:
+        while buckets:
+            _, oldest = next(iter(buckets.items()))
+            if oldest[2] > now and len(buckets) <= self._max_buckets:
+                break
+            buckets.popitem(last=False)
+
+    def size(self) -> int:
+        total = 0
+        for lock, buckets in self._shards:
+            with lock:
+                total += len(buckets)
+        return total
+
+    def clear(self) -> None:
+        for lock, buckets in self._shards:
+            with lock:
+                buckets.clear()
+
+
+def client_ip(connection: HTTPConnection) -> str:
+    return connection.client.host if connection.client else "unknown"
+
+
+def rate_limit_identity(connection: HTTPConnection, key: RateLimitKey = "user") -> str:
+    """Username of the resolved user, or `ip:<address>` for anonymous traffic."""
+    if key == "user":
+        user = connection.scope.get("state", {}).get("user")
+        if user is not None and user.username:
+            return f"user:{user.username}"
+    return f"ip:{client_ip(connection)}"
+
+
+class RateLimiter:
+    def __init__(self, store: TokenBucketStore, enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+
+    def check(self, bucket: str, identity: str, limit: RateLimit) -> None:
+        """Raise 429 with `Retry-After` when `identity` exhausted `bucket`."""
+        if not self.enabled:
+            return
+        retry_after = self.store.acquire(f"{bucket}|{identity}", limit.rate, limit.burst)
+        if retry_after > 0:
+            RATE_LIMITED.inc((bucket,))
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+    def enforce(self, request: Request) -> None:
+        """Apply the resolved endpoint's `@rate_limit`, if any."""
+        limit = get_rate_limit(request.scope.get("endpoint"))
+        if limit is None:
+            return
+        if limit.name:
+            bucket = limit.name
+        else:
+            route = request.scope.get("route")
+            bucket = f"{request.method} {getattr(route, 'path', request.url.path)}"
+        self.check(bucket, rate_limit_identity(request, limit.key), limit)
+
+
+_settings = get_settings()
+rate_limiter = RateLimiter(
+    TokenBucketStore(_settings.rate_limit_shards, _settings.rate_limit_max_buckets),
+    enabled=_settings.rate_limit_enabled,
+)
+
+
+def throttle(request: Request) -> None:
+    """Dependency enforcing `@rate_limit` on endpoints that do not use `authorize`."""
+    rate_limiter.enforce(request)
+
+
+__all__ = [
+    "RateLimit",
+    "RateLimiter",
+    "TokenBucketStore",
+    "get_rate_limit",
+    "rate_limit",
+    "rate_limit_identity",
+    "rate_limiter",
+    "throttle",
+]
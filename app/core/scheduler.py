@@ -0,0 +1,383 @@
+"""
+In-process asyncio job scheduler.
+
+Jobs live in a binary heap ordered by due time, so scheduling and popping are
+O(log n) and an idle scheduler with thousands of pending jobs costs a single
+sleep. Jobs of the same kind that are due in the same tick are handed to their
+handler as one batch, so handlers can issue a single bulk service call.
+
+When several worker processes run the same schedule, a lease per
+(kind, due time) group makes sure only one of them executes it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import heapq
+import inspect
+import json
+import logging
+import os
+import socket
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Protocol, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+# Clocks
+
+
+class Clock(Protocol):
+    def now(self) -> datetime:
+        ...
+
+    async def sleep(self, seconds: float) -> None:
+        ...
+
+
+class SystemClock:
+    def now(self) -> datetime:
+        return datetime.now()
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class ManualClock:
+    """Clock for tests: time only moves when `advance` is called."""
+
+    def __init__(self, start: datetime):
+        self._now = start
+        self._sleepers: List[Tuple[datetime, asyncio.Future]] = []
+
+    def now(self) -> datetime:
+        return self._now
+
+    async def sleep(self, seconds: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._sleepers.append((self._now + timedelta(seconds=seconds), future))
+        await future
+
+    def advance(self, delta: Union[timedelta, float]) -> None:
+        if not isinstance(delta, timedelta):
+            delta = timedelta(seconds=delta)
+        self._now += delta
+        waiting = []
+        for deadline, future in self._sleepers:
+            if deadline <= self._now:
+                if not future.done():
+                    future.set_result(None)
+            else:
+                waiting.append((deadline, future))
+        self._sleepers = waiting
+
+
+# Leases
+
+
+class LeaseStore(Protocol):
+    def acquire(self, key: str, owner: str, ttl: float, now: datetime) -> bool:
+        ...
+
+    def release(self, key: str, owner: str) -> None:
+        ...
+
+    def prune(self, now: datetime) -> None:
+        """Drop expired leases."""
+        ...
+
+
+class InMemoryLeaseStore:
+    """Leases for a single process (e.g. several schedulers in tests)."""
+
+    def __init__(self):
+        self._leases: Dict[str, Tuple[str, float]] = {}
+
+    def acquire(self, key: str, owner: str, ttl: float, now: datetime) -> bool:
+        current = self._leases.get(key)
+        if current and current[0] != owner and current[1] > now.timestamp():
+            return False
+        self._leases[key] = (owner, now.timestamp() + ttl)
+        return True
+
+    def release(self, key: str, owner: str) -> None:
+        current = self._leases.get(key)
+        if current and current[0] == owner:
+            del self._leases[key]
+
+    def prune(self, now: datetime) -> None:
+        timestamp = now.timestamp()
+        for key in [k for k, (_, expires_at) in self._leases.items() if expires_at <= timestamp]:
+            del self._leases[key]
+
+
+class FileLeaseStore:
+    """
+    Leases shared by processes on the same host, stored as small JSON files in
+    `directory`. Each read-modify-write runs under an exclusive `flock`.
+    """
+
+    def __init__(self, directory: str):
+        if fcntl is None:
+            raise RuntimeError("FileLeaseStore requires fcntl (POSIX); use InMemoryLeaseStore instead")
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._mutex_path = os.path.join(directory, ".lock")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, hashlib.sha1(key.encode()).hexdigest() + ".lease")
+
+    def acquire(self, key: str, owner: str, ttl: float, now: datetime) -> bool:
+        path = self._path(key)
+        with open(self._mutex_path, "a") as mutex:
+            fcntl.flock(mutex, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(path) as handle:
+                        current = json.load(handle)
+                except (FileNotFoundError, ValueError):
+                    current = None
+                if current and current["owner"] != owner and current["expires_at"] > now.timestamp():
+                    return False
+                with open(path, "w") as handle:
+                    json.dump({"key": key, "owner": owner, "expires_at": now.timestamp() + ttl}, handle)
+                return True
+            finally:
+                fcntl.flock(mutex, fcntl.LOCK_UN)
+
+    def release(self, key: str, owner: str) -> None:
+        path = self._path(key)
+        with open(self._mutex_path, "a") as mutex:
+            fcntl.flock(mutex, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(path) as handle:
+                        current = json.load(handle)
+                except (FileNotFoundError, ValueError):
+                    return
+                if current["owner"] == owner:
+                    os.remove(path)
+            finally:
+                fcntl.flock(mutex, fcntl.LOCK_UN)
+
+    def prune(self, now: datetime) -> None:
+        with open(self._mutex_path, "a") as mutex:
+            fcntl.flock(mutex, fcntl.LOCK_EX)
+            try:
+                for entry in os.scandir(self._directory):
+                    if not entry.name.endswith(".lease"):
+                        continue
+                    try:
+                        with open(entry.path) as handle:
+                            expired = json.load(handle)["expires_at"] <= now.timestamp()
+                    except (FileNotFoundError, ValueError, KeyError):
+                        expired = True
+                    if expired:
+                        os.remove(entry.path)
+            finally:
+                fcntl.flock(mutex, fcntl.LOCK_UN)
+
+
+# Scheduler
+
+
+@dataclass
+class Job:
+    key: str
+    kind: str
+    due: datetime
+    payload: Any = None
+    # Returns the next due time after a run (None stops the recurrence).
+    reschedule: Optional[Callable[[datetime], Optional[datetime]]] = None
+
+
+JobHandler = Callable[[List[Job], datetime], Union[Any, Awaitable[Any]]]
+
+
+class Scheduler:
+    def __init__(
+        self,
+        *,
+        clock: Optional[Clock] = None,
+        lease_store: Optional[LeaseStore] = None,
+        owner: Optional[str] = None,
+        lease_ttl: float = 300.0,
+        max_sleep: float = 60.0,
+        retry_delay: float = 60.0,
+    ):
+        self.clock: Clock = clock or SystemClock()
+        self._leases: LeaseStore = lease_store or InMemoryLeaseStore()
+        self._owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self._lease_ttl = lease_ttl
+        self._max_sleep = max_sleep
+        self._retry_delay = timedelta(seconds=retry_delay)
+
+        self._heap: List[Tuple[datetime, int, Job]] = []
+        self._jobs: Dict[str, Job] = {}
+        self._sequence = count()
+        self._handlers: Dict[str, JobHandler] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_prune: Optional[datetime] = None
+
+    def register_handler(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def schedule(
+        self,
+        key: str,
+        kind: str,
+        due: datetime,
+        payload: Any = None,
+        *,
+        reschedule: Optional[Callable[[datetime], Optional[datetime]]] = None,
+    ) -> Job:
+        """Schedule a job; scheduling an existing key replaces the previous job."""
+        job = Job(key=key, kind=kind, due=due, payload=payload, reschedule=reschedule)
+        self._push(job)
+        return job
+
+    def cancel(self, key: str) -> bool:
+        # The heap entry is discarded lazily when it reaches the top.
+        return self._jobs.pop(key, None) is not None
+
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    def pending_by_kind(self) -> Dict[str, int]:
+        counts: Dict[str, int] = defaultdict(int)
+        for job in self._jobs.values():
+            counts[job.kind] += 1
+        return dict(counts)
+
+    def next_due(self) -> Optional[datetime]:
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    async def run_due(self, now: Optional[datetime] = None) -> int:
+        """Run every job due at `now`; returns how many jobs this worker executed."""
+        now = now or self.clock.now()
+        # Leases only need to outlive a batch, so expired ones are pruned once per TTL.
+        if self._last_prune is None or (now - self._last_prune).total_seconds() >= self._lease_ttl:
+            self._leases.prune(now)
+            self._last_prune = now
+
+        due: List[Job] = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, job = heapq.heappop(self._heap)
+            if self._jobs.get(job.key) is not job:
+                continue
+            del self._jobs[job.key]
+            due.append(job)
+        if not due:
+            return 0
+
+        groups: Dict[Tuple[str, datetime], List[Job]] = defaultdict(list)
+        for job in due:
+            groups[(job.kind, job.due)].append(job)
+
+        batches: Dict[str, List[Job]] = defaultdict(list)
+        leases: Dict[str, List[str]] = defaultdict(list)
+        for (kind, job_due), jobs in groups.items():
+            lease_key = f"{kind}:{job_due.isoformat()}"
+            if self._leases.acquire(lease_key, self._owner, self._lease_ttl, now):
+                batches[kind].extend(jobs)
+                leases[kind].append(lease_key)
+            else:
+                # Another worker owns this batch; just keep recurring jobs going.
+                self._reschedule_all(jobs)
+
+        executed = 0
+        for kind, jobs in batches.items():
+            handler = self._handlers.get(kind)
+            try:
+                if handler is None:
+                    raise LookupError(f"No handler registered for job kind {kind!r}")
+                result = handler(jobs, now)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logger.exception("Scheduled batch %s failed (%d jobs); retrying later", kind, len(jobs))
+                for lease_key in leases[kind]:
+                    self._leases.release(lease_key, self._owner)
+                for job in jobs:
+                    if job.key not in self._jobs:
+                        job.due = now + self._retry_delay
+                        self._push(job)
+                continue
+            executed += len(jobs)
+            self._reschedule_all(jobs)
+        return executed
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run_loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    # Internals
+
+    def _push(self, job: Job) -> None:
+        head = self.next_due()
+        self._jobs[job.key] = job
+        heapq.heappush(self._heap, (job.due, next(self._sequence), job))
+        if self._wakeup is not None and (head is None or job.due < head):
+            self._wakeup.set()
+
+    def _reschedule_all(self, jobs: List[Job]) -> None:
+        for job in jobs:
+            if job.reschedule is None or job.key in self._jobs:
+                continue
+            next_due = job.reschedule(job.due)
+            if next_due is not None:
+                self.schedule(job.key, job.kind, next_due, job.payload, reschedule=job.reschedule)
+
+    def _discard_stale(self) -> None:
+        while self._heap and self._jobs.get(self._heap[0][2].key) is not self._heap[0][2]:
+            heapq.heappop(self._heap)
+
+    async def _run_loop(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                now = self.clock.now()
+                next_due = self.next_due()
+                if next_due is not None and next_due <= now:
+                    await self.run_due(now)
+                    continue
+
+                delay = self._max_sleep
+                if next_due is not None:
+                    delay = min(delay, (next_due - now).total_seconds())
+                self._wakeup.clear()
+                sleeper = asyncio.ensure_future(self.clock.sleep(delay))
+                waker = asyncio.ensure_future(self._wakeup.wait())
+                try:
+                    await asyncio.wait({sleeper, waker}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    sleeper.cancel()
+                    waker.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Scheduler loop iteration failed")
+                await asyncio.sleep(1)
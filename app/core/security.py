@@ -5,6 +5,7 @@ from fastapi import HTTPException, status
 import jwt
 
 from .config import get_settings
+from .metrics import timed
 
 def create_access_token(subject: str, *, data: dict[str, Any]) -> str:
     settings = get_settings()
@@ -13,6 +14,7 @@ def create_access_token(subject: str, *, data: dict[str, Any]) -> str:
     return jwt.encode(payload=to_encode, key=settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
 
 
+@timed("security.decode_access_token")
 def decode_access_token(token: str) -> dict[str, Any]:
     settings = get_settings()
     try:
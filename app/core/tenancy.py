@@ -0,0 +1,115 @@
+"""
+Tenant (`empresa`) resolution and placement.
+
+Every request runs on behalf of one empresa. Authenticated requests use the
+`empresa_id` claim of their access token; anonymous requests may choose one
+with the `X-Empresa-Id` header. Both fall back to `DEFAULT_EMPRESA_ID`.
+`AuthMiddleware` resolves the empresa and sets `current_empresa`, which the
+service registry reads to hand out that empresa's own stores and indexes.
+
+Tenants can be spread over worker processes with `TENANT_PLACEMENT`
+(`"worker-a=1,2;worker-b=3"`) and `WORKER_NAME`. A worker only builds and
+schedules jobs for the tenants placed on it, and answers requests for any
+other tenant with `421 Misdirected Request` and an `X-Empresa-Worker`
+header naming the right worker, so a router in front can forward them.
+Without a placement every worker serves every tenant.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple
+
+from .config import Settings, get_settings
+
+EMPRESA_HEADER = "X-Empresa-Id"
+WORKER_HEADER = "X-Empresa-Worker"
+
+# Empresa of the request (or job) being handled; `None` means the default.
+current_empresa: ContextVar[Optional[int]] = ContextVar("current_empresa", default=None)
+
+
+@contextmanager
+def use_empresa(empresa_id: int) -> Iterator[None]:
+    """Run a block (scripts, tooling) on behalf of `empresa_id`."""
+    token = current_empresa.set(empresa_id)
+    try:
+        yield
+    finally:
+        current_empresa.reset(token)
+
+
+def _parse_ids(value: str) -> Tuple[int, ...]:
+    return tuple(dict.fromkeys(int(part) for part in value.split(",") if part.strip()))
+
+
+def parse_placement(value: str) -> Dict[int, str]:
+    """`"worker-a=1,2;worker-b=3"` -> `{1: "worker-a", 2: "worker-a", 3: "worker-b"}`."""
+    workers: Dict[int, str] = {}
+    for entry in value.split(";"):
+        if not entry.strip():
+            continue
+        worker, _, ids = entry.partition("=")
+        if not worker.strip() or not ids.strip():
+            raise ValueError(f"Invalid TENANT_PLACEMENT entry: {entry!r}")
+        for empresa_id in _parse_ids(ids):
+            if empresa_id in workers:
+                raise ValueError(f"Empresa {empresa_id} is placed on more than one worker")
+            workers[empresa_id] = worker.strip()
+    return workers
+
+
+@dataclass(frozen=True)
+class TenantPlacement:
+    tenants: Tuple[int, ...]
+    default: int
+    worker: Optional[str] = None
+    # empresa id -> worker name; empty means every worker serves every tenant.
+    workers: Dict[int, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Settings] = None) -> "TenantPlacement":
+        settings = settings or get_settings()
+        workers = parse_placement(settings.tenant_placement)
+        tenants = tuple(dict.fromkeys((settings.default_empresa_id, *_parse_ids(settings.tenants), *workers)))
+        return cls(
+            tenants=tenants,
+            default=settings.default_empresa_id,
+            worker=settings.worker_name,
+            workers=workers,
+        )
+
+    def is_known(self, empresa_id: int) -> bool:
+        return empresa_id in self.tenants
+
+    def worker_for(self, empresa_id: int) -> Optional[str]:
+        return self.workers.get(empresa_id)
+
+    def serves(self, empresa_id: int) -> bool:
+        if not self.workers or self.worker is None:
+            return True
+        return self.workers.get(empresa_id, self.worker) == self.worker
+
+    @property
+    def served(self) -> Tuple[int, ...]:
+        return tuple(empresa_id for empresa_id in self.tenants if self.serves(empresa_id))
+
+
+@lru_cache
+def default_placement() -> TenantPlacement:
+    """Placement from `get_settings()`, built once; clear both caches together."""
+    return TenantPlacement.from_settings()
+
+
+__all__ = [
+    "EMPRESA_HEADER",
+    "TenantPlacement",
+    "WORKER_HEADER",
+    "current_empresa",
+    "default_placement",
+    "parse_placement",
+    "use_empresa",
+]
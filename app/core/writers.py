@@ -0,0 +1,273 @@
+"""
+Background batch writers and rotated append-only files.
+
+`BatchWriter` is a bounded in-memory queue drained by a writer thread that
+hands items to `write_batch()` in batches, so the code producing them
+(request handlers, service hooks) only pays for an append under a lock. A
+batch is written once `batch_size` items are queued or `flush_interval`
+seconds after the previous one, whichever comes first.
+
+When the queue is full, the `overflow` policy decides what gives:
+`drop_newest` discards the incoming item, `drop_oldest` discards the
+oldest queued one and `block` makes the producer wait up to
+`block_timeout` for room before discarding. Outcomes (`written`,
+`dropped`, `failed`) are counted on the writer's `outcomes` counter.
+
+`RotatingFile` appends bytes to a file and rotates it by size, like
+`logging.handlers.RotatingFileHandler`, but with one write and one flush
+per batch instead of per record.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections import deque
+from threading import Condition, Lock, Thread
+from typing import IO, Any, Deque, Generic, Iterable, List, Literal, Optional, TypeVar
+
+from .metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+OverflowPolicy = Literal["drop_newest", "drop_oldest", "block"]
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+T = TypeVar("T")
+
+
+class BatchWriter(Generic[T]):
+    """
+    Bounded queue drained in batches by a background thread.
+
+    Subclasses implement `write_batch()`, and may override `_prepare()` to
+    turn what producers pass to `_put()` into queued items while the queue
+    lock is held (e.g. to number them in queue order). `start()` launches
+    the writer and `stop()` drains the queue and stops it. Without a
+    running writer (scripts, tooling) items accumulate until `flush()`
+    writes them from the calling thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        outcomes: Counter,
+        queue_size: int = 10000,
+        overflow: OverflowPolicy = "drop_newest",
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        block_timeout: float = 0.5,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy: {overflow!r}")
+        self.name = name
+        self.outcomes = outcomes
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self._queue: Deque[T] = deque()
+        self._condition = Condition()
+        # Items accepted into the queue / written, failed or evicted since.
+        self._accepted = 0
+        self._settled = 0
+        self._flush_requested = False
+        self._stopping = False
+        self._thread: Optional[Thread] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def write_batch(self, batch: List[T]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the destination once the writer has stopped."""
+
+    def _prepare(self, item: Any) -> T:
+        return item
+
+    def _discard(self, item: Any) -> None:
+        """Called, with the queue lock held, for each incoming item that is dropped."""
+
+    def _put(self, items: Iterable[Any]) -> None:
+        """Queue `items`, applying the overflow policy. Never raises."""
+        dropped = 0
+        with self._condition:
+            for item in items:
+                if len(self._queue) >= self.queue_size and not self._make_room():
+                    self._discard(item)
+                    dropped += 1
+                    continue
+                self._queue.append(self._prepare(item))
+                self._accepted += 1
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify_all()
+        if dropped:
+            self.outcomes.inc(("dropped",), dropped)
+
+    def _make_room(self) -> bool:
+        # Called with the condition held and the queue full.
+        if self.overflow == "drop_oldest":
+            self._queue.popleft()
+            self._settled += 1
+            self.outcomes.inc(("dropped",))
+            return True
+        if self.overflow == "block" and self._thread is not None and self._thread.is_alive():
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: len(self._queue) < self.queue_size, self.block_timeout)
+        return False
+
+    def start(self) -> None:
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write everything queued so far and stop the writer."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+        self.flush()
+        self.close()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every item queued so far is written. False on timeout."""
+        if self._thread is None or not self._thread.is_alive():
+            while True:
+                batch = self._take()
+                if not batch:
+                    return True
+                self._write(batch)
+        with self._condition:
+            target = self._accepted
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: self._settled >= target, timeout)
+
+    def _take(self) -> List[T]:
+        with self._condition:
+            return self._take_locked()
+
+    def _take_locked(self) -> List[T]:
+        batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        if not self._queue:
+            self._flush_requested = False
+        # Producers blocked on a full queue can go on.
+        self._condition.notify_all()
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + self.flush_interval
+                while not (
+                    self._stopping
+                    or len(self._queue) >= self.batch_size
+                    or (self._flush_requested and self._queue)
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._take_locked()
+                stopping = self._stopping
+            if batch:
+                self._write(batch)
+            elif stopping:
+                return
+
+    def _write(self, batch: List[T]) -> None:
+        try:
+            self.write_batch(batch)
+        except Exception:
+            logger.exception("%s failed to write %d records", self.name, len(batch))
+            self.outcomes.inc(("failed",), len(batch))
+        else:
+            self.outcomes.inc(("written",), len(batch))
+        with self._condition:
+            self._settled += len(batch)
+            self._condition.notify_all()
+
+
+class RotatingFile:
+    """
+    Append-only file rotated once a write would take it past `max_bytes`:
+    `name` is renamed to `name.1`, older files shift up to
+    `name.<backup_count>` and the oldest is removed. Thread-safe.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file: Optional[IO[bytes]] = None
+        # Held while writing or rotating, so readers never see a half-renamed set.
+        self.lock = Lock()
+
+    def paths(self) -> List[str]:
+        """Current file first, then backups from newest to oldest."""
+        return [self.path] + [f"{self.path}.{index}" for index in range(1, self.backup_count + 1)]
+
+    def write(self, data: bytes) -> None:
+        with self.lock:
+            if self._file is None:
+                self._file = open(self.path, "ab")
+            position = self._file.tell()
+            if self.max_bytes > 0 and position and position + len(data) > self.max_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "ab")
+
+    def read_lines(self) -> List[List[bytes]]:
+        """Lines of every file, in `paths()` order."""
+        with self.lock:
+            return [_read_lines(path) for path in self.paths()]
+
+    def close(self) -> None:
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _read_lines(path: str) -> List[bytes]:
+    try:
+        with open(path, "rb") as handle:
+            return handle.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+
+__all__ = [
+    "BatchWriter",
+    "OVERFLOW_POLICIES",
+    "OverflowPolicy",
+    "RotatingFile",
+]
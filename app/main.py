@@ -1,9 +1,57 @@
+from contextlib import asynccontextmanager
+from importlib import import_module
+
 from fastapi import FastAPI
 
+from .core.accesslog import AccessLog, AccessLogMiddleware, register_access_log_metrics
+from .core.admission import install_admission_control
 from .core.auth import AuthMiddleware
+from .core.coalescing import install_request_coalescing
 from .core.config import get_settings
-from .routes import appointments, auth, clients, public, staff
+from .core.metrics import MetricsMiddleware
+from .core.openapi import install_openapi_cache
+from .core.profiling import ProfilingMiddleware
+from .core.tenancy import TenantPlacement
+from .routes import ROUTERS
+from .services.registry import get_audit_log, get_services
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    # Services (stores and seed data) are built here rather than at import
+    # time, for the tenants placed on this worker only.
+    tenants = [get_services(empresa_id) for empresa_id in TenantPlacement.from_settings(settings).served]
+    for services in tenants:
+        # Seed the materialized counters from whatever the stores hold at startup.
+        await services.dashboard_counters.rebuild()
+    # Generate the OpenAPI document now instead of on the first /docs hit.
+    app.state.openapi_cache.build(app)
 
+    audit_log = get_audit_log()
+    if audit_log is not None:
+        audit_log.start()
+    for services in tenants:
+        services.lead_intake.start()
+    access_log = getattr(app.state, "access_log", None)
+    if access_log is not None:
+        access_log.start()
+    if settings.scheduler_enabled:
+        for services in tenants:
+            services.scheduled_jobs.install()
+            services.scheduler.start()
+    try:
+        yield
+    finally:
+        for services in tenants:
+            await services.scheduler.stop()
+            # Saves the leads still buffered.
+            await services.lead_intake.stop()
+        if audit_log is not None:
+            # After the schedulers, whose jobs may still be auditing changes.
+            audit_log.stop()
+        if access_log is not None:
+            access_log.stop()
 
 
 def create_app() -> FastAPI:
@@ -11,15 +59,34 @@ def create_app() -> FastAPI:
     app = FastAPI(
         title=settings.app_name,
         version=settings.version,
-        description="Backend API for managing spa operations."
+        description="Backend API for managing spa operations.",
+        lifespan=lifespan,
     )
 
+    if settings.profiling_enabled:
+        # Inside AuthMiddleware, which resolves the user it checks for OWNER.
+        app.add_middleware(ProfilingMiddleware, sample_rate=settings.profiling_sample_rate)
     app.add_middleware(AuthMiddleware)
+    if settings.access_log_enabled:
+        # Outside AuthMiddleware, so the user and empresa it resolves are in the scope state.
+        app.state.access_log = AccessLog.from_settings(settings)
+        app.add_middleware(AccessLogMiddleware, access_log=app.state.access_log)
+        if settings.metrics_enabled:
+            register_access_log_metrics(app.state.access_log)
+    if settings.metrics_enabled:
+        # Added last so it wraps every other middleware and sees total latency.
+        app.add_middleware(MetricsMiddleware)
 
-    app.include_router(public.router)
-    app.include_router(auth.router, prefix="/auth", tags=["auth"])
-    app.include_router(appointments.router, prefix="/appointments", tags=["appointments"])
-    app.include_router(clients.router, prefix="/clients", tags=["clients"])
-    app.include_router(staff.router, prefix="/staff", tags=["staff"])
+    for name, prefix, tags in ROUTERS:
+        if name == "metrics" and not settings.metrics_enabled:
+            continue
+        module = import_module(f".routes.{name}", __package__)
+        app.include_router(module.router, prefix=prefix, tags=list(tags))
 
+    if settings.admission_enabled:
+        install_admission_control(app)
+    if settings.coalescing_enabled:
+        # Wraps the admission gate: requests waiting on an identical one take no slot.
+        install_request_coalescing(app)
+    install_openapi_cache(app)
     return app
@@ -8,6 +8,8 @@ from .endereco import (
     EnderecoTipo,
     EnderecoUpdateFields,
 )
+from .payroll import FolhaPagamento
+from .servicos import Servico, ServicoCreate
 from .user import User, UserCreate
 
 __all__ = [
@@ -21,6 +23,9 @@ __all__ = [
     "EnderecoCreate",
     "EnderecoTipo",
     "EnderecoUpdateFields",
+    "FolhaPagamento",
+    "Servico",
+    "ServicoCreate",
     "TokenRequest",
     "TokenResponse",
     "User",
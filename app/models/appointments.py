@@ -1,13 +1,59 @@
 from datetime import datetime
 from enum import Enum
+from typing import Annotated, Dict, FrozenSet, List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import AfterValidator, BaseModel, Field
+
+
+def to_local_naive(value: datetime) -> datetime:
+    # Stores and indexes compare datetimes with each other and with
+    # datetime.now(), so keep everything as naive local time.
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+LocalDateTime = Annotated[datetime, AfterValidator(to_local_naive)]
+
+# Mirrors `agendamento.tipo`: PACOTE appointments consume a `pacote_cliente` session.
+AppointmentTipo = Literal["AVULSO", "PACOTE"]
 
 
 class AppointmentStatus(str, Enum):
-    scheduled = "scheduled"
-    completed = "completed"
-    canceled = "canceled"
+    # Mirrors `agendamento.status` in docs/dbmodel.sql.
+    scheduled = "scheduled"  # AGENDADO
+    confirmed = "confirmed"  # CONFIRMADO
+    completed = "completed"  # CONCLUIDO
+    canceled = "canceled"  # CANCELADO_CLIENTE
+    canceled_by_staff = "canceled_by_staff"  # CANCELADO_PRESTADOR
+    no_show = "no_show"  # NAO_COMPARECEU_CLIENTE
+    staff_no_show = "staff_no_show"  # NAO_COMPARECEU_PRESTADOR
+
+
+# Statuses of appointments that still hold their slot and get reminders.
+ACTIVE_STATUSES: FrozenSet[AppointmentStatus] = frozenset(
+    {AppointmentStatus.scheduled, AppointmentStatus.confirmed}
+)
+CANCELED_STATUSES: FrozenSet[AppointmentStatus] = frozenset(
+    {AppointmentStatus.canceled, AppointmentStatus.canceled_by_staff}
+)
+NO_SHOW_STATUSES: FrozenSet[AppointmentStatus] = frozenset(
+    {AppointmentStatus.no_show, AppointmentStatus.staff_no_show}
+)
+
+_OUTCOMES = frozenset({AppointmentStatus.completed}) | CANCELED_STATUSES | NO_SHOW_STATUSES
+
+# Allowed transitions. Outcomes can only be reopened (set back to
+# `scheduled`) to correct a mistake; they never turn into each other.
+STATUS_TRANSITIONS: Dict[AppointmentStatus, FrozenSet[AppointmentStatus]] = {
+    AppointmentStatus.scheduled: frozenset({AppointmentStatus.confirmed}) | _OUTCOMES,
+    AppointmentStatus.confirmed: frozenset({AppointmentStatus.scheduled}) | _OUTCOMES,
+    **{outcome: frozenset({AppointmentStatus.scheduled}) for outcome in _OUTCOMES},
+}
+
+
+def can_transition(current: AppointmentStatus, new: AppointmentStatus) -> bool:
+    return new in STATUS_TRANSITIONS[current]
 
 
 class Appointment(BaseModel):
@@ -15,14 +61,45 @@ class Appointment(BaseModel):
     client_id: int
     staff_member: str
     service: str
-    start_time: datetime
-    end_time: datetime
+    start_time: LocalDateTime
+    end_time: LocalDateTime
     status: AppointmentStatus = AppointmentStatus.scheduled
+    tipo: AppointmentTipo = "AVULSO"
+    pacote_cliente_id: Optional[int] = None
+    agendamento_recorrente_id: Optional[int] = None
 
 
 class AppointmentCreate(BaseModel):
     client_id: int
     staff_member: str
     service: str
-    start_time: datetime
-    end_time: datetime
+    start_time: LocalDateTime
+    end_time: LocalDateTime
+    tipo: AppointmentTipo = "AVULSO"
+    pacote_cliente_id: Optional[int] = None
+
+
+class AppointmentStatusChange(BaseModel):
+    id: int = Field(gt=0)
+    status: AppointmentStatus
+
+
+class AppointmentBulkStatusUpdate(BaseModel):
+    items: List[AppointmentStatusChange] = Field(min_length=1, max_length=500)
+
+
+# Per-item outcome of a bulk status update.
+StatusChangeOutcome = Literal["updated", "unchanged", "not_found", "invalid_transition", "rejected"]
+
+
+class AppointmentStatusResult(BaseModel):
+    id: int
+    result: StatusChangeOutcome
+    appointment: Optional[Appointment] = None
+    detail: Optional[str] = None
+
+
+class AppointmentBulkStatusResponse(BaseModel):
+    updated: int = 0
+    failed: int = 0
+    results: List[AppointmentStatusResult] = Field(default_factory=list)
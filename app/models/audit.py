@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+AuditEntity = Literal["appointment", "client", "funcionario"]
+
+
+class AuditRecord(BaseModel):
+    id: int
+    # UTC time the mutation was applied (not when the record was written).
+    timestamp: datetime
+    empresa_id: int
+    # `None` for changes made by background jobs.
+    username: Optional[str] = None
+    role: Optional[str] = None
+    action: str
+    entity: AuditEntity
+    entity_id: int
+    # field -> [before, after]; `before` is null for created entities.
+    changes: Dict[str, List[Any]] = Field(default_factory=dict)
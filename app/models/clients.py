@@ -1,8 +1,12 @@
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from .appointments import Appointment
+from .endereco import Endereco
+from .pacotes import PacoteCliente
 
 
 class ClienteBase(BaseModel):
@@ -24,3 +28,50 @@ class Cliente(ClienteBase):
     id: int
     created_at: datetime
     updated_at: datetime
+
+
+class ClienteProfile(BaseModel):
+    """Everything the client detail screen shows, in one response."""
+
+    cliente: Cliente
+    enderecos: List[Endereco]
+    proximos_agendamentos: List[Appointment]
+    pacotes_ativos: List[PacoteCliente]
+    saldo_credito: Optional[Decimal] = None
+
+
+class ClienteDuplicado(BaseModel):
+    """Pair of clients that probably are the same person, for review."""
+
+    # Older record, suggested as the one to keep.
+    cliente_id: int
+    duplicado_id: int
+    score: float
+    # What matched: telefone, email, email_usuario, nome, data_nascimento.
+    motivos: List[str] = Field(default_factory=list)
+
+
+class ClienteMesclagem(BaseModel):
+    duplicado_id: int = Field(gt=0)
+
+
+class ClienteMesclado(BaseModel):
+    """The surviving client and how many records moved to it."""
+
+    cliente: Cliente
+    duplicado_id: int
+    enderecos: int = 0
+    agendamentos: int = 0
+    pacotes: int = 0
+    recorrencias: int = 0
+    assinaturas: int = 0
+
+
+class VarreduraDuplicados(BaseModel):
+    clientes: int
+    blocos: int
+    # Blocks larger than DEDUP_MAX_BLOCK_SIZE, not compared.
+    blocos_ignorados: int
+    pares_avaliados: int
+    candidatos: int
+    duracao_segundos: float
@@ -0,0 +1,64 @@
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .appointments import AppointmentStatus
+
+
+class DashboardStaffBucket(BaseModel):
+    staff_member: str
+    agendamentos: Dict[AppointmentStatus, int] = Field(default_factory=dict)
+    receita: Decimal = Decimal("0.00")
+
+
+class DashboardSummary(BaseModel):
+    dia: date
+    agendamentos: int = 0
+    cancelamentos: int = 0
+    nao_comparecimentos: int = 0
+    concluidos: int = 0
+    receita: Decimal = Decimal("0.00")
+    clientes: int = 0
+    credito_em_aberto: Decimal = Decimal("0.00")
+    por_profissional: List[DashboardStaffBucket] = Field(default_factory=list)
+
+
+class DashboardDrift(BaseModel):
+    consistente: bool
+    divergencias: List[str] = Field(default_factory=list)
+
+
+class OcupacaoProfissional(BaseModel):
+    staff_member: str
+    # Booked minutes inside working hours, and outside them.
+    minutos_agendados: int = 0
+    minutos_fora_do_horario: int = 0
+    minutos_disponiveis: int = 0
+    # Percent of `minutos_disponiveis`; above 100 when bookings overlap.
+    utilizacao: Optional[float] = None
+    # Time buckets booked beyond their capacity.
+    intervalos_sobrecarregados: int = 0
+
+
+class OcupacaoHeatmap(BaseModel):
+    """
+    Utilization percentages (booked / available minutes) by staff, day and
+    time bucket. Cells without working hours are null.
+    """
+
+    inicio: date
+    fim: date
+    intervalo_minutos: int
+    # Start of each time bucket ("08:00") and each day: the heatmap axes.
+    horarios: List[str] = Field(default_factory=list)
+    dias: List[date] = Field(default_factory=list)
+    utilizacao: Optional[float] = None
+    profissionais: List[OcupacaoProfissional] = Field(default_factory=list)
+    # [staff][horario], [staff][dia] and [weekday, Monday first][horario].
+    profissional_horario: List[List[Optional[float]]] = Field(default_factory=list)
+    profissional_dia: List[List[Optional[float]]] = Field(default_factory=list)
+    dia_semana_horario: List[List[Optional[float]]] = Field(default_factory=list)
+    # [staff][dia][horario], only when requested.
+    matriz: Optional[List[List[List[Optional[float]]]]] = None
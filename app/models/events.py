@@ -0,0 +1,12 @@
+from datetime import date
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class AgendaEvent(BaseModel):
+    id: int
+    type: str
+    staff_member: Optional[str] = None
+    dia: Optional[date] = None
+    data: Dict[str, Any] = Field(default_factory=dict)
@@ -0,0 +1,82 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Annotated, Literal, Optional
+
+from pydantic import BaseModel, BeforeValidator, Field
+
+from .funcionarios import chck_cvt_str_dec2
+
+CategoriaDespesa = Literal["SALARIO", "ALUGUEL", "AGUA", "LUZ", "INTERNET", "MATERIAL", "OUTROS"]
+
+
+class AssinaturaMensalBase(BaseModel):
+    cliente_id: int
+    descricao: str
+    valor_mensal: Annotated[Decimal, BeforeValidator(chck_cvt_str_dec2)]
+    dia_cobranca: int = Field(ge=1, le=31)
+    data_inicio: date
+    data_fim: Optional[date] = None
+    ativo: bool = True
+
+
+class AssinaturaMensalCreate(AssinaturaMensalBase):
+    pass
+
+
+class AssinaturaMensal(AssinaturaMensalBase):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class CobrancaAssinatura(BaseModel):
+    id: int
+    assinatura_mensal_id: int
+    cliente_id: int
+    competencia: date
+    valor: Decimal
+    created_at: datetime
+
+
+class DespesaRecorrenteBase(BaseModel):
+    descricao: str
+    categoria: CategoriaDespesa
+    valor_padrao: Annotated[Decimal, BeforeValidator(chck_cvt_str_dec2)]
+    dia_vencimento: int = Field(ge=1, le=31)
+    data_inicio: date
+    data_fim: Optional[date] = None
+    ativo: bool = True
+
+
+class DespesaRecorrenteCreate(DespesaRecorrenteBase):
+    pass
+
+
+class DespesaRecorrente(DespesaRecorrenteBase):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class Despesa(BaseModel):
+    id: int
+    despesa_recorrente_id: Optional[int] = None
+    descricao: str
+    categoria: CategoriaDespesa
+    tipo: Literal["AVULSA", "RECORRENTE"]
+    valor: Decimal
+    data_competencia: date
+    data_vencimento: Optional[date] = None
+    data_pagamento: Optional[date] = None
+    pago: bool = False
+    observacoes: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class LembreteAgendamento(BaseModel):
+    appointment_id: int
+    client_id: int
+    staff_member: str
+    start_time: datetime
+    created_at: datetime
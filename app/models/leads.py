@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+LeadOutcome = Literal["created", "duplicate", "existing_client"]
+
+
+class ComoConheceu(BaseModel):
+    id: int
+    descricao: str
+    ativo: bool = True
+
+
+class LeadCreate(BaseModel):
+    """Public web form payload. Only cheap checks here; the rest happens in the background."""
+
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+    nome: str = Field(min_length=1, max_length=150)
+    email: str = Field(max_length=100, pattern=r"^[^@\s]+@[^@\s]+$")
+    telefone: Optional[str] = Field(default=None, max_length=20)
+    como_conheceu_id: Optional[int] = Field(default=None, gt=0)
+    # Campaign source (e.g. `utm_source`), matched against `como_conheceu` by name.
+    origem: Optional[str] = Field(default=None, max_length=100)
+    servico_buscado_id: Optional[int] = Field(default=None, gt=0)
+    obs: Optional[str] = Field(default=None, max_length=1000)
+
+
+class Lead(BaseModel):
+    id: int
+    nome: str
+    email: str
+    telefone: Optional[str] = None
+    como_conheceu_id: Optional[int] = None
+    servico_buscado_id: Optional[int] = None
+    obs: Optional[str] = None
+    # Times the lead was submitted; repeats are merged into the first one.
+    ocorrencias: int = 1
+    created_at: datetime
+    updated_at: datetime
+
+
+class LeadAccepted(BaseModel):
+    status: Literal["accepted"] = "accepted"
+
+
+class LeadAtribuicao(BaseModel):
+    como_conheceu_id: Optional[int] = None
+    descricao: Optional[str] = None
+    created: int = 0
+    duplicate: int = 0
+    existing_client: int = 0
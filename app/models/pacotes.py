@@ -0,0 +1,59 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Annotated, List, Optional
+
+from pydantic import BaseModel, BeforeValidator, Field
+
+from .funcionarios import chck_cvt_str_dec2
+
+
+class PacoteBase(BaseModel):
+    nome: str
+    descricao: Optional[str] = None
+    servico_id: int
+    quantidade_sessoes: int = Field(default=1, gt=0)
+    valor_total: Annotated[Decimal, BeforeValidator(chck_cvt_str_dec2)] = Decimal("0.00")
+
+
+class PacoteCreate(PacoteBase):
+    pass
+
+
+class Pacote(PacoteBase):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class PacoteClienteCreate(BaseModel):
+    pacote_id: int
+    cliente_id: int
+    data_compra: Optional[date] = None
+    valor_total: Optional[Annotated[Decimal, BeforeValidator(chck_cvt_str_dec2)]] = None
+    observacoes: Optional[str] = None
+
+
+class PacoteCliente(BaseModel):
+    id: int
+    pacote_id: int
+    servico_id: int
+    cliente_id: int
+    data_compra: date
+    quantidade_contratada: int
+    quantidade_utilizada: int = 0
+    valor_total: Decimal
+    valor_utilizado: Decimal = Decimal("0.00")
+    observacoes: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    @property
+    def quantidade_disponivel(self) -> int:
+        return self.quantidade_contratada - self.quantidade_utilizada
+
+
+class ReconciliacaoPacotes(BaseModel):
+    consumos_aplicados: List[int] = Field(default_factory=list)
+    consumos_estornados: List[int] = Field(default_factory=list)
+    pacotes_corrigidos: List[int] = Field(default_factory=list)
+    sem_saldo: List[int] = Field(default_factory=list)
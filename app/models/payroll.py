@@ -0,0 +1,16 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from pydantic import BaseModel
+
+
+class FolhaPagamento(BaseModel):
+    funcionario_id: int
+    competencia: date
+    salario_fixo: Decimal = Decimal("0.00")
+    quantidade_atendimentos: int = 0
+    valor_atendimentos: Decimal = Decimal("0.00")
+    total_comissao: Decimal = Decimal("0.00")
+    total_bruto: Decimal = Decimal("0.00")
+    created_at: datetime
+    updated_at: datetime
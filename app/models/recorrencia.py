@@ -0,0 +1,74 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Annotated, List, Literal, Optional
+
+from pydantic import BaseModel, BeforeValidator, Field, model_validator
+
+from .funcionarios import chck_cvt_str_dec2
+
+LocalAtendimento = Literal["EMPRESA", "CLIENTE_RESIDENCIAL", "CLIENTE_COMERCIAL", "OUTRO"]
+
+
+class AgendamentoRecorrenteBase(BaseModel):
+    profissional_id: int
+    cliente_id: int
+    assinatura_mensal_id: Optional[int] = None
+    servico_id: int
+    dia_semana: int = Field(ge=0, le=6, description="0=domingo ... 6=sábado")
+    hora_inicio: time
+    duracao_minutos: int = Field(default=60, gt=0)
+    data_inicio: date
+    data_fim: Optional[date] = None
+    local: LocalAtendimento = "EMPRESA"
+    endereco_id: Optional[int] = None
+    valor_previsto: Optional[Annotated[Decimal, BeforeValidator(chck_cvt_str_dec2)]] = None
+    ativo: bool = True
+
+
+class AgendamentoRecorrenteCreate(AgendamentoRecorrenteBase):
+    pass
+
+
+class AgendamentoRecorrente(AgendamentoRecorrenteBase):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class AgendamentoRecorrenteUpdate(BaseModel):
+    profissional_id: Optional[int] = None
+    servico_id: Optional[int] = None
+    dia_semana: Optional[int] = Field(default=None, ge=0, le=6)
+    hora_inicio: Optional[time] = None
+    duracao_minutos: Optional[int] = Field(default=None, gt=0)
+    data_fim: Optional[date] = None
+    local: Optional[LocalAtendimento] = None
+    endereco_id: Optional[int] = None
+    valor_previsto: Optional[Annotated[Decimal, BeforeValidator(chck_cvt_str_dec2)]] = None
+    ativo: Optional[bool] = None
+
+    @model_validator(mode="after")
+    def _required_not_null(self) -> "AgendamentoRecorrenteUpdate":
+        # Omitted fields keep their value; only data_fim, endereco_id and valor_previsto can be cleared.
+        nulls = sorted(
+            name
+            for name in self.model_fields_set - {"data_fim", "endereco_id", "valor_previsto"}
+            if getattr(self, name) is None
+        )
+        if nulls:
+            raise ValueError(f"{', '.join(nulls)} cannot be null")
+        return self
+
+
+class OcorrenciaRecorrente(BaseModel):
+    agendamento_recorrente_id: int
+    start_time: datetime
+    end_time: datetime
+    appointment_id: Optional[int] = None
+
+
+class MaterializacaoResultado(BaseModel):
+    criados: int = 0
+    atualizados: int = 0
+    cancelados: int = 0
+    conflitos: List[OcorrenciaRecorrente] = Field(default_factory=list)
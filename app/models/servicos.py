@@ -0,0 +1,92 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Annotated, List, Optional
+
+from pydantic import BaseModel, BeforeValidator, Field
+
+from .funcionarios import chck_cvt_str_dec2
+
+
+class ServicoBase(BaseModel):
+    nome: str
+    descricao: Optional[str] = None
+    duracao_base_min: int = 60
+    preco_base: Annotated[Decimal, BeforeValidator(chck_cvt_str_dec2)] = Decimal("0.00")
+    ativo: bool = True
+
+
+class ServicoCreate(ServicoBase):
+    pass
+
+
+class ServicoUpdate(BaseModel):
+    nome: Optional[str] = None
+    descricao: Optional[str] = None
+    duracao_base_min: Optional[int] = None
+    preco_base: Optional[Annotated[Decimal, BeforeValidator(chck_cvt_str_dec2)]] = None
+    ativo: Optional[bool] = None
+
+
+class Servico(ServicoBase):
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class ServicoPublico(BaseModel):
+    """Public catalog entry (`GET /public/services`)."""
+
+    id: int
+    name: str
+    description: Optional[str] = None
+    duration_minutes: int
+    price: float
+
+
+class PrecoProfissional(BaseModel):
+    funcionario_id: int
+    servico_id: int
+    preco: Decimal
+    duracao_min: int
+    comissao_percentual: Decimal
+    # Whether a `funcionario_servico` override applies.
+    personalizado: bool = False
+
+
+class MatrizPrecos(BaseModel):
+    """Price and duration of every (funcionario, servico) pair at catalog version `versao`."""
+
+    versao: int
+    servicos: List[Servico] = Field(default_factory=list)
+    precos: List[PrecoProfissional] = Field(default_factory=list)
+
+
+class OrcamentoItem(BaseModel):
+    servico_id: int
+    # Without one, the quote uses the service's base price and duration.
+    funcionario_id: Optional[int] = None
+
+
+class OrcamentoCreate(BaseModel):
+    cliente_id: int
+    itens: List[OrcamentoItem] = Field(min_length=1, max_length=50)
+
+
+class OrcamentoLinha(BaseModel):
+    servico_id: int
+    servico: str
+    funcionario_id: Optional[int] = None
+    preco: Decimal
+    duracao_min: int
+    # Session of a client package covering the item (priced at zero).
+    pacote_cliente_id: Optional[int] = None
+
+
+class Orcamento(BaseModel):
+    versao: int
+    cliente_id: int
+    itens: List[OrcamentoLinha] = Field(default_factory=list)
+    total: Decimal = Decimal("0.00")
+    duracao_total_min: int = 0
+    credito_disponivel: Decimal = Decimal("0.00")
+    total_a_pagar: Decimal = Decimal("0.00")
@@ -10,6 +10,8 @@ class User(BaseModel):
     full_name: Optional[str] = None
     role: Role = Role.STAFF
     scopes: list[str] = Field(default_factory=list)
+    # `None` uses the default empresa.
+    empresa_id: Optional[int] = None
 
 
 class UserCreate(BaseModel):
@@ -1,19 +1,73 @@
-from . import appointments, auth, clients, public, staff
-from .appointments import router as appointments_router
-from .auth import router as auth_router
-from .clients import router as clients_router
-from .public import router as public_router
-from .staff import router as staff_router
+"""
+API routers.
+
+Router modules are imported on first access (`app.routes.clients`,
+`app.routes.clients_router`) rather than when the package is imported, so
+importing one router does not pay for all of them. `create_app()` mounts
+them from `ROUTERS`.
+"""
+
+from importlib import import_module
+from typing import Any
+
+# (module, prefix, tags) in mounting order.
+ROUTERS = (
+    ("public", "", ()),
+    ("auth", "/auth", ("auth",)),
+    ("appointments", "/appointments", ("appointments",)),
+    ("clients", "/clients", ("clients",)),
+    ("staff", "/staff", ("staff",)),
+    ("payroll", "/payroll", ("payroll",)),
+    ("dashboard", "/dashboard", ("dashboard",)),
+    ("events", "/events", ("events",)),
+    ("recorrencias", "/recorrencias", ("recorrencias",)),
+    ("financeiro", "/financeiro", ("financeiro",)),
+    ("pacotes", "/pacotes", ("pacotes",)),
+    ("servicos", "/servicos", ("servicos",)),
+    ("leads", "/leads", ("leads",)),
+    ("admin", "/admin", ("admin",)),
+    ("metrics", "", ("metrics",)),
+)
+
+_MODULES = frozenset(name for name, _, _ in ROUTERS)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _MODULES:
+        return import_module(f"{__name__}.{name}")
+    if name.endswith("_router") and name[: -len("_router")] in _MODULES:
+        return import_module(f"{__name__}.{name[: -len('_router')]}").router
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
+    "ROUTERS",
+    "admin",
+    "admin_router",
     "appointments",
     "appointments_router",
     "auth",
     "auth_router",
     "clients",
     "clients_router",
+    "dashboard",
+    "dashboard_router",
+    "events",
+    "events_router",
+    "financeiro",
+    "financeiro_router",
+    "metrics",
+    "metrics_router",
+    "pacotes",
+    "pacotes_router",
+    "payroll",
+    "payroll_router",
     "public",
     "public_router",
+    "recorrencias",
+    "recorrencias_router",
+    "servicos",
+    "servicos_router",
     "staff",
     "staff_router",
 ]
@@ -0,0 +1,167 @@
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, status
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from ..core.admission import admission_class
+from ..core.auth import AuthenticatedUser, Role, auth_config, authorize
+from ..core.profiling import profile_store
+from ..models.audit import AuditEntity, AuditRecord
+from ..services import registry
+from ..services.caching import CachedService
+
+
+router = APIRouter()
+
+
+class SchedulerStatus(BaseModel):
+    pending: int
+    pending_by_kind: Dict[str, int]
+    next_due: Optional[datetime] = None
+
+
+class ProfileSummary(BaseModel):
+    id: int
+    method: str
+    path: str
+    route: Optional[str] = None
+    status_code: int
+    duration_ms: float
+    trigger: str
+    username: Optional[str] = None
+    created_at: datetime
+
+
+class AdmissionClassStats(BaseModel):
+    route_class: str
+    limit: int
+    queue_size: int
+    active: int
+    queued: int
+    admitted: int
+    shed_queue_full: int
+    shed_timeout: int
+
+
+class CacheSummary(BaseModel):
+    name: str
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    expirations: int
+    invalidations: int
+
+
+@router.get("/scheduler", response_model=SchedulerStatus, summary="Background scheduler status")
+@auth_config(minimum_role=Role.ADMIN)
+async def scheduler_status(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return SchedulerStatus(
+        pending=registry.scheduler.pending(),
+        pending_by_kind=registry.scheduler.pending_by_kind(),
+        next_due=registry.scheduler.next_due(),
+    )
+
+
+@router.get("/caches", response_model=List[CacheSummary], summary="Service cache sizes and hit ratios")
+@auth_config(minimum_role=Role.ADMIN)
+async def cache_status(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    services = (registry.client_service, registry.funcionario_service, registry.servico_service)
+    summaries = []
+    for service in services:
+        if isinstance(service, CachedService):
+            stats = service.cache.stats()
+            summaries.append(CacheSummary(hit_ratio=round(stats.hit_ratio, 4), **vars(stats)))
+    return summaries
+
+
+@router.get(
+    "/admission",
+    response_model=List[AdmissionClassStats],
+    summary="Admission control queue depth and shed counts per route class",
+)
+@auth_config(minimum_role=Role.ADMIN)
+@admission_class("exempt")
+async def admission_status(
+    request: Request,
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    controller = getattr(request.app.state, "admission", None)
+    if controller is None:
+        return []
+    return [AdmissionClassStats(**vars(stats)) for stats in controller.stats().values()]
+
+
+@router.get("/profiles", response_model=List[ProfileSummary], summary="List captured request profiles")
+@auth_config(minimum_role=Role.OWNER)
+async def list_profiles(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return [
+        ProfileSummary(
+            id=profile.id,
+            method=profile.method,
+            path=profile.path,
+            route=profile.route,
+            status_code=profile.status_code,
+            duration_ms=profile.duration_ms,
+            trigger=profile.trigger,
+            username=profile.username,
+            created_at=profile.created_at,
+        )
+        for profile in profile_store.list_profiles(current_user.empresa_id)
+    ]
+
+
+@router.get("/profiles/{profile_id}", summary="Download a request profile")
+@auth_config(minimum_role=Role.OWNER)
+async def download_profile(
+    profile_id: int = Path(gt=0),
+    format: Literal["text", "pstats"] = Query(default="text"),
+    limit: int = Query(default=50, gt=0, le=500),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    profile = profile_store.get_profile(current_user.empresa_id, profile_id)
+    if not profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if format == "pstats":
+        return Response(
+            profile.dump(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile.id}.prof"'},
+        )
+    return PlainTextResponse(profile.render_text(limit=limit))
+
+
+@router.get("/audit", response_model=List[AuditRecord], summary="Audit trail of the current empresa")
+@auth_config(minimum_role=Role.ADMIN)
+async def list_audit_records(
+    entity: Optional[AuditEntity] = Query(default=None),
+    entity_id: Optional[int] = Query(default=None, gt=0),
+    inicio: Optional[datetime] = Query(default=None, description="Oldest change to include (UTC if no offset)"),
+    fim: Optional[datetime] = Query(default=None, description="Changes up to, not including, this time"),
+    limit: int = Query(default=100, gt=0, le=1000),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    audit_log = registry.audit_log
+    if audit_log is None:
+        return []
+    # Reading rotated files (and waiting for queued records) blocks.
+    return await run_in_threadpool(
+        audit_log.query,
+        current_user.empresa_id,
+        entity=entity,
+        entity_id=entity_id,
+        inicio=inicio,
+        fim=fim,
+        limit=limit,
+    )
@@ -1,15 +1,25 @@
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Path, status
 from pydantic import BaseModel
 
+from ..core.admission import admission_class
 from ..core.auth import AuthenticatedUser, Role, auth_config, authorize
-from ..models.appointments import Appointment, AppointmentCreate, AppointmentStatus
-from ..services.appointments import InMemoryAppointmentService
+from ..core.coalescing import coalesced
+from ..core.fieldsets import fields_query, fieldset_response, parse_fields
+from ..models.appointments import (
+    Appointment,
+    AppointmentBulkStatusResponse,
+    AppointmentBulkStatusUpdate,
+    AppointmentCreate,
+    AppointmentStatus,
+    AppointmentStatusResult,
+)
+from ..services import registry
+from ..services.appointments import InvalidStatusTransition
 
 
 router = APIRouter()
-appointment_service = InMemoryAppointmentService()
 
 
 class AppointmentStatusUpdate(BaseModel):
@@ -18,19 +28,45 @@ class AppointmentStatusUpdate(BaseModel):
 
 @router.get("/", response_model=List[Appointment])
 @auth_config(minimum_role=Role.STAFF)
+@coalesced
 async def list_appointments(
+    fields: Optional[str] = fields_query(),
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    return list(appointment_service.list_appointments())
+    projection = parse_fields(Appointment, fields)
+    if projection:
+        rows = registry.appointment_service.project_appointments(projection)
+        return fieldset_response(Appointment, projection, rows)
+    return list(registry.appointment_service.list_appointments())
 
 
 @router.post("/", response_model=Appointment, status_code=status.HTTP_201_CREATED)
 @auth_config(minimum_role=Role.MANAGER, scopes={"appointments:write"})
+@admission_class("critical")
 async def create_appointment(
     payload: AppointmentCreate,
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    return appointment_service.create_appointment(payload)
+    if payload.tipo == "PACOTE":
+        servico = registry.servico_service.get_servico_by_nome(payload.service)
+        if payload.pacote_cliente_id is not None:
+            pacote_cliente = registry.pacote_service.get_pacote_cliente(payload.pacote_cliente_id)
+            if (
+                not pacote_cliente
+                or pacote_cliente.cliente_id != payload.client_id
+                or not servico
+                or pacote_cliente.servico_id != servico.id
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Package does not belong to this client and service",
+                )
+        else:
+            pacote_cliente = servico and registry.pacote_service.find_active(payload.client_id, servico.id)
+            if not pacote_cliente:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Client has no active package for this service")
+            payload = payload.model_copy(update={"pacote_cliente_id": pacote_cliente.id})
+    return registry.appointment_service.create_appointment(payload)
 
 
 @router.patch(
@@ -39,12 +75,70 @@ async def create_appointment(
     summary="Update appointment status",
 )
 @auth_config(minimum_role=Role.STAFF, scopes={"appointments:write"})
+@admission_class("critical")
 async def update_status(
     payload: AppointmentStatusUpdate,
     appointment_id: int = Path(gt=0),
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    appointment = appointment_service.update_status(appointment_id, payload.status)
+    current = registry.appointment_service.get_appointment(appointment_id)
+    if (
+        current
+        and current.tipo == "PACOTE"
+        and payload.status == AppointmentStatus.completed
+        and not registry.pacote_service.has_session_for(current)
+    ):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Package has no sessions left")
+    try:
+        appointment = registry.appointment_service.update_status(appointment_id, payload.status)
+    except InvalidStatusTransition as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
     if not appointment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appointment not found")
     return appointment
+
+
+@router.patch(
+    "/status",
+    response_model=AppointmentBulkStatusResponse,
+    summary="Update the status of many appointments",
+)
+@auth_config(minimum_role=Role.MANAGER, scopes={"appointments:write"})
+@admission_class("critical")
+async def update_statuses(
+    payload: AppointmentBulkStatusUpdate,
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    """
+    Apply every transition in one batch. Items are validated independently
+    and reported in request order; a failed item does not stop the others.
+    """
+    # Package balances are shared by the whole batch: checking each item on
+    # its own would let two completions draw the same last session.
+    completing = {}
+    for item in payload.items:
+        if item.status != AppointmentStatus.completed:
+            continue
+        current = registry.appointment_service.get_appointment(item.id)
+        if current and current.tipo == "PACOTE" and current.status != AppointmentStatus.completed:
+            completing[item.id] = current
+    sem_saldo = registry.pacote_service.without_sessions(completing.values())
+    rejected = {
+        identifier: AppointmentStatusResult(
+            id=identifier,
+            result="rejected",
+            appointment=completing[identifier],
+            detail="Package has no sessions left",
+        )
+        for identifier in sem_saldo
+    }
+
+    applied = iter(
+        registry.appointment_service.update_statuses(
+            (item.id, item.status) for item in payload.items if item.id not in rejected
+        )
+    )
+    results = [rejected.get(item.id) or next(applied) for item in payload.items]
+    updated = sum(result.result == "updated" for result in results)
+    failed = sum(result.result not in ("updated", "unchanged") for result in results)
+    return AppointmentBulkStatusResponse(updated=updated, failed=failed, results=results)
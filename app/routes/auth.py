@@ -1,29 +1,49 @@
-from fastapi import APIRouter, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
+from ..core.admission import admission_class
 from ..core.auth import auth_config
+from ..core.ratelimit import RateLimit, rate_limit, rate_limiter, throttle
 from ..core.security import create_access_token
 from ..models.auth import TokenRequest, TokenResponse
-from ..services.users import InMemoryUserService
+from ..services import registry
 
 from ..core.auth import AuthMiddleware
 
 router = APIRouter()
-user_service = InMemoryUserService()
+
+# Brute-force protection: both token endpoints share a per-IP bucket, and
+# attempts against a single username are limited whatever IP they come from.
+login_rate_limit = rate_limit(10, 60, burst=5, key="ip", name="auth.token")
+LOGIN_USERNAME_LIMIT = RateLimit(requests=10, seconds=60, burst=10)
+
 
 def _issue_access_token(payload: TokenRequest) -> str:
-    user = user_service.authenticate(payload.username, payload.password)
+    rate_limiter.check("auth.token.username", f"username:{payload.username}", LOGIN_USERNAME_LIMIT)
+    user = registry.user_service.authenticate(payload.username, payload.password)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     token = create_access_token(
         subject=user.username,
-        data={"role": int(user.role), "scopes": user.scopes, "full_name": user.full_name},
+        data={
+            "role": int(user.role),
+            "scopes": user.scopes,
+            "full_name": user.full_name,
+            "empresa_id": user.empresa_id,
+        },
     )
     return token
 
 
-@router.post("/token", response_model=TokenResponse, summary="Issue demo access token")
+@router.post(
+    "/token",
+    response_model=TokenResponse,
+    summary="Issue demo access token",
+    dependencies=[Depends(throttle)],
+)
 @auth_config(required=False)
+@login_rate_limit
+@admission_class("critical")
 async def issue_token(payload: TokenRequest) -> TokenResponse:
     return TokenResponse(access_token=_issue_access_token(payload))
 
@@ -32,8 +52,11 @@ async def issue_token(payload: TokenRequest) -> TokenResponse:
     "/token/cookie",
     response_model=TokenResponse,
     summary="Issue access token and set it as a secure cookie",
+    dependencies=[Depends(throttle)],
 )
 @auth_config(required=False)
+@login_rate_limit
+@admission_class("critical")
 async def issue_token_cookie(payload: TokenRequest, response: Response) -> TokenResponse:
     token = _issue_access_token(payload)
     response.set_cookie(
@@ -1,19 +1,31 @@
-from typing import List, Literal
+from typing import List, Literal, Optional
 from decimal import Decimal
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Path, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Response, status
 from pydantic import BaseModel, Field
 
 from ..core.auth import AuthenticatedUser, Role, auth_config, authorize
-from ..models.clients import Cliente, ClienteCreate
+from ..core.coalescing import coalesced
+from ..core.fieldsets import fields_query, fieldset_response, parse_fields
+from ..core.ratelimit import rate_limit
+from ..models.clients import (
+    Cliente,
+    ClienteCreate,
+    ClienteDuplicado,
+    ClienteMesclado,
+    ClienteMesclagem,
+    ClienteProfile,
+    VarreduraDuplicados,
+)
 from ..models.endereco import ClienteEnderecosUpdate, Endereco
-from ..services.clients import MockClientService
 from ..models.appointments import Appointment
-from ..services.appointments import InMemoryAppointmentService
+from ..services import registry
+from ..services.dedup import ScanInProgress
+from ..services.loaders import ClientProfileLoader
 
 router = APIRouter()
-client_service = MockClientService()
-appointment_service = InMemoryAppointmentService()
+
+MAX_BATCH_IDS = 100
 
 
 class ClienteSaldoCreditoUpdate(BaseModel):
@@ -22,29 +34,149 @@ class ClienteSaldoCreditoUpdate(BaseModel):
 
 @router.get("/", response_model=List[Cliente], summary="List clients")
 @auth_config(minimum_role=Role.STAFF)
+@rate_limit(120, 60, burst=30)
+@coalesced
 async def list_clients(
+    ids: Optional[str] = Query(
+        default=None,
+        description=f"Comma-separated client ids to fetch in one call (at most {MAX_BATCH_IDS})",
+    ),
+    fields: Optional[str] = fields_query(),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    projection = parse_fields(Cliente, fields)
+    client_ids = None if ids is None else _parse_ids(ids)
+    if projection:
+        rows = await registry.client_service.project_clients(projection, client_ids)
+        return fieldset_response(Cliente, projection, rows)
+    if client_ids is None:
+        return list(await registry.client_service.list_clients())
+    found = await registry.client_service.get_clients(client_ids)
+    return [found[client_id] for client_id in client_ids if client_id in found]
+
+
+def _parse_ids(ids: str) -> List[int]:
+    try:
+        client_ids = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be comma-separated integers")
+    if not client_ids or len(client_ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {MAX_BATCH_IDS} ids are required",
+        )
+    return client_ids
+
+
+def _profile_loader(limite: int) -> ClientProfileLoader:
+    return ClientProfileLoader(
+        registry.client_service,
+        registry.appointment_service,
+        registry.pacote_service,
+        upcoming_limit=limite,
+    )
+
+
+@router.get(
+    "/perfis",
+    response_model=List[ClienteProfile],
+    summary="Composite profiles of several clients",
+)
+@auth_config(minimum_role=Role.STAFF)
+async def list_client_profiles(
+    ids: str = Query(description=f"Comma-separated client ids (at most {MAX_BATCH_IDS})"),
+    limite: int = Query(default=10, ge=0, le=50, description="Upcoming appointments per client"),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    profiles = await _profile_loader(limite).load_many(_parse_ids(ids))
+    return [profile for profile in profiles if profile is not None]
+
+
+@router.get(
+    "/duplicados",
+    response_model=List[ClienteDuplicado],
+    summary="Probable duplicate clients, highest score first",
+)
+@auth_config(minimum_role=Role.MANAGER)
+async def list_duplicate_clients(
+    min_score: Optional[float] = Query(default=None, ge=0, le=1, description="Defaults to DEDUP_MIN_SCORE"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return registry.dedup_service.list_candidates(min_score, limit, offset)
+
+
+@router.post(
+    "/duplicados/varredura",
+    response_model=VarreduraDuplicados,
+    summary="Rescan every client for duplicates",
+)
+@auth_config(minimum_role=Role.ADMIN)
+async def scan_duplicate_clients(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    try:
+        return await registry.dedup_service.scan()
+    except ScanInProgress as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+
+
+@router.delete(
+    "/duplicados/{client_id}/{duplicate_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Dismiss a pair as different people",
+)
+@auth_config(minimum_role=Role.MANAGER, scopes={"clients:write"})
+async def dismiss_duplicate_clients(
+    client_id: int = Path(gt=0),
+    duplicate_id: int = Path(gt=0),
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    return list(await client_service.list_clients())
+    registry.dedup_service.dismiss(client_id, duplicate_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.get("/{client_id}", response_model=Cliente, summary="Retrieve client profile")
 @auth_config(minimum_role=Role.STAFF)
 async def get_client(
     client_id: int = Path(gt=0),
+    fields: Optional[str] = fields_query(),
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    client: Cliente | None = await client_service.get_client(client_id)
+    projection = parse_fields(Cliente, fields)
+    if projection:
+        rows = await registry.client_service.project_clients(projection, [client_id])
+        if not rows:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+        return fieldset_response(Cliente, projection, rows[0])
+    client: Cliente | None = await registry.client_service.get_client(client_id)
     if not client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
     return client
 
+@router.get(
+    "/{client_id}/perfil",
+    response_model=ClienteProfile,
+    summary="Client, addresses, upcoming appointments, active packages and credit in one call",
+)
+@auth_config(minimum_role=Role.STAFF)
+async def get_client_profile(
+    client_id: int = Path(gt=0),
+    limite: int = Query(default=10, ge=0, le=50, description="Upcoming appointments to include"),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    profile = await _profile_loader(limite).load(client_id)
+    if not profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    return profile
+
 @router.post("/", response_model=Cliente, status_code=status.HTTP_201_CREATED)
 @auth_config(minimum_role=Role.MANAGER, scopes={"clients:write"})
 async def create_client(
     payload: ClienteCreate,
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    return await client_service.create_client(payload)
+    return await registry.client_service.create_client(payload)
 
 @router.put(
     "/{client_id}/enderecos",
@@ -57,11 +189,11 @@ async def update_client_addresses(
     payload: ClienteEnderecosUpdate = Body(...),
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    client: Cliente | None = await client_service.get_client(client_id)
+    client: Cliente | None = await registry.client_service.get_client(client_id)
     if not client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
 
-    return list(await client_service.update_client_addresses(client_id, payload))
+    return list(await registry.client_service.update_client_addresses(client_id, payload))
 
 
 @router.post(
@@ -76,7 +208,7 @@ async def update_client_credit(
     current_user: AuthenticatedUser = Depends(authorize),
 ):
     try:
-        updated: Cliente | None = await client_service.update_client_credit(
+        updated: Cliente | None = await registry.client_service.update_client_credit(
             client_id=client_id,
             delta=payload.delta,
             operation=payload.operation,
@@ -93,6 +225,26 @@ async def update_client_credit(
     return updated
 
 
+@router.post(
+    "/{client_id}/mesclar",
+    response_model=ClienteMesclado,
+    summary="Merge a duplicate client into this one",
+)
+@auth_config(minimum_role=Role.MANAGER, scopes={"clients:write"})
+async def merge_clients(
+    client_id: int = Path(gt=0),
+    payload: ClienteMesclagem = Body(...),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    try:
+        merged = await registry.dedup_service.merge(client_id, payload.duplicado_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if not merged:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    return merged
+
+
 @router.get(
     "/{client_id}/appointments",
     response_model=List[Appointment],
@@ -101,10 +253,15 @@ async def update_client_credit(
 @auth_config(minimum_role=Role.STAFF)
 async def list_client_appointments(
     client_id: int = Path(gt=0),
+    fields: Optional[str] = fields_query(),
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    client: Cliente | None = await client_service.get_client(client_id)
+    projection = parse_fields(Appointment, fields)
+    client: Cliente | None = await registry.client_service.get_client(client_id)
     if not client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
 
-    return list(appointment_service.list_client_appointments(client_id))
+    if projection:
+        rows = registry.appointment_service.project_appointments(projection, client_id)
+        return fieldset_response(Appointment, projection, rows)
+    return list(registry.appointment_service.list_client_appointments(client_id))
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from ..core.admission import admission_class
+from ..core.auth import AuthenticatedUser, Role, auth_config, authorize
+from ..core.coalescing import coalesced
+from ..models.dashboard import DashboardDrift, DashboardSummary, OcupacaoHeatmap
+from ..services import registry
+from ..services.occupancy import BUCKET_SIZES
+
+
+router = APIRouter()
+
+
+@router.get("/", response_model=DashboardSummary, summary="Manager dashboard counters")
+@auth_config(minimum_role=Role.MANAGER)
+@coalesced
+async def get_dashboard(
+    dia: Optional[date] = Query(default=None, description="Day to summarize (defaults to today)"),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return registry.dashboard_counters.summary(dia or date.today())
+
+
+@router.post(
+    "/rebuild",
+    response_model=DashboardDrift,
+    summary="Rebuild dashboard counters from the stores and report drift",
+)
+@auth_config(minimum_role=Role.MANAGER)
+@admission_class("heavy")
+async def rebuild_dashboard(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return await registry.dashboard_counters.rebuild()
+
+
+def _current_quarter(today: date) -> Tuple[date, date]:
+    first_month = 3 * ((today.month - 1) // 3) + 1
+    start = today.replace(month=first_month, day=1)
+    next_start = date(start.year + 1, 1, 1) if first_month == 10 else start.replace(month=first_month + 3)
+    return start, next_start - timedelta(days=1)
+
+
+@router.get(
+    "/ocupacao",
+    response_model=OcupacaoHeatmap,
+    summary="Staff utilization heatmaps by day and time of day",
+)
+@auth_config(minimum_role=Role.MANAGER)
+@coalesced
+async def get_ocupacao(
+    inicio: Optional[date] = Query(default=None, description="First day (defaults to the start of the current quarter)"),
+    fim: Optional[date] = Query(default=None, description="Last day, inclusive (defaults to the end of the current quarter)"),
+    intervalo_minutos: int = Query(
+        default=60, description=f"Time bucket in minutes ({', '.join(map(str, BUCKET_SIZES))})"
+    ),
+    staff_member: Optional[str] = Query(default=None, description="Only this professional"),
+    detalhado: bool = Query(default=False, description="Include the staff x day x time matrix"),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    quarter_start, quarter_end = _current_quarter(date.today())
+    try:
+        return registry.occupancy_service.heatmap(
+            inicio or quarter_start,
+            fim or quarter_end,
+            intervalo_minutos=intervalo_minutos,
+            staff_member=staff_member,
+            detalhado=detalhado,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
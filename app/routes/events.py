@@ -0,0 +1,131 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+    WebSocketException,
+    status,
+)
+from fastapi.responses import StreamingResponse
+
+from ..core.admission import admission_class
+from ..core.auth import AuthenticatedUser, Role, auth_config, authorize, authorize_websocket
+from ..models.events import AgendaEvent
+from ..services.events import STREAM_OVERFLOW, EventFilter, SubscriptionClosed
+from ..services import registry
+from .staff import can_view_all_agendas, ensure_agenda_access
+
+
+router = APIRouter()
+
+# Idle streams send a keep-alive so proxies keep the connection open and
+# dead clients are noticed.
+HEARTBEAT_SECONDS = 15.0
+
+
+def _resolve_filter(
+    current_user: AuthenticatedUser,
+    funcionario_id: Optional[int],
+    dia: Optional[date],
+) -> EventFilter:
+    # Same visibility rules as GET /staff/{id}/agenda.
+    staff_member = None
+    if funcionario_id is not None:
+        funcionario = registry.funcionario_service.get_funcionario(funcionario_id)
+        if not funcionario:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Staff not found")
+        ensure_agenda_access(current_user, funcionario)
+        staff_member = funcionario.nome
+    elif not can_view_all_agendas(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="funcionario_id is required to follow your own agenda",
+        )
+    return EventFilter(staff_member=staff_member, dia=dia)
+
+
+def _format_sse(event: AgendaEvent) -> str:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {event.model_dump_json()}\n\n"
+
+
+@router.get("/agenda", summary="Stream agenda changes (Server-Sent Events)")
+@auth_config(minimum_role=Role.STAFF)
+@admission_class("exempt")
+async def stream_agenda(
+    request: Request,
+    funcionario_id: Optional[int] = Query(default=None, gt=0),
+    dia: Optional[date] = Query(default=None),
+    last_event_id: Optional[int] = Query(default=None, ge=0),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    event_filter = _resolve_filter(current_user, funcionario_id, dia)
+
+    # EventSource sends the Last-Event-ID header on reconnect.
+    header = request.headers.get("Last-Event-ID")
+    if last_event_id is None and header and header.isdigit():
+        last_event_id = int(header)
+
+    subscription = registry.event_bus.subscribe(event_filter, last_event_id)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await subscription.next(timeout=HEARTBEAT_SECONDS)
+                except SubscriptionClosed:
+                    yield f"event: {STREAM_OVERFLOW}\ndata: {{}}\n\n"
+                    break
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _format_sse(event)
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/agenda/ws")
+@auth_config(minimum_role=Role.STAFF)
+async def agenda_websocket(
+    websocket: WebSocket,
+    funcionario_id: Optional[int] = Query(default=None, gt=0),
+    dia: Optional[date] = Query(default=None),
+    last_event_id: Optional[int] = Query(default=None, ge=0),
+    current_user: AuthenticatedUser = Depends(authorize_websocket),
+):
+    try:
+        event_filter = _resolve_filter(current_user, funcionario_id, dia)
+    except HTTPException as exc:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail) from exc
+
+    await websocket.accept()
+    subscription = registry.event_bus.subscribe(event_filter, last_event_id)
+    try:
+        while True:
+            try:
+                event = await subscription.next(timeout=HEARTBEAT_SECONDS)
+            except SubscriptionClosed:
+                # Slow consumer: tell it to reconnect with its last processed id.
+                await websocket.send_json({"type": STREAM_OVERFLOW})
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                break
+            if event is None:
+                await websocket.send_json({"type": "keep-alive"})
+                continue
+            await websocket.send_text(event.model_dump_json())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscription.close()
@@ -0,0 +1,96 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from ..core.auth import AuthenticatedUser, Role, auth_config, authorize
+from ..models.financeiro import (
+    AssinaturaMensal,
+    AssinaturaMensalCreate,
+    CobrancaAssinatura,
+    Despesa,
+    DespesaRecorrente,
+    DespesaRecorrenteCreate,
+    LembreteAgendamento,
+)
+from ..services import registry
+
+
+router = APIRouter()
+
+
+@router.get("/assinaturas", response_model=List[AssinaturaMensal], summary="List monthly subscriptions")
+@auth_config(minimum_role=Role.MANAGER)
+async def list_assinaturas(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return list(registry.financeiro_service.list_assinaturas())
+
+
+@router.post(
+    "/assinaturas",
+    response_model=AssinaturaMensal,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create monthly subscription",
+)
+@auth_config(minimum_role=Role.MANAGER, scopes={"clients:write"})
+async def create_assinatura(
+    payload: AssinaturaMensalCreate,
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    if not await registry.client_service.get_client(payload.cliente_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    assinatura = registry.financeiro_service.create_assinatura(payload)
+    registry.scheduled_jobs.schedule_assinatura(assinatura)
+    return assinatura
+
+
+@router.get("/cobrancas", response_model=List[CobrancaAssinatura], summary="List subscription charges")
+@auth_config(minimum_role=Role.MANAGER)
+async def list_cobrancas(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return list(registry.financeiro_service.list_cobrancas())
+
+
+@router.get(
+    "/despesas-recorrentes",
+    response_model=List[DespesaRecorrente],
+    summary="List recurring expense templates",
+)
+@auth_config(minimum_role=Role.MANAGER)
+async def list_despesas_recorrentes(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return list(registry.financeiro_service.list_despesas_recorrentes())
+
+
+@router.post(
+    "/despesas-recorrentes",
+    response_model=DespesaRecorrente,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create recurring expense template",
+)
+@auth_config(minimum_role=Role.MANAGER, scopes={"staff:manage"})
+async def create_despesa_recorrente(
+    payload: DespesaRecorrenteCreate,
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    despesa = registry.financeiro_service.create_despesa_recorrente(payload)
+    registry.scheduled_jobs.schedule_despesa_recorrente(despesa)
+    return despesa
+
+
+@router.get("/despesas", response_model=List[Despesa], summary="List expenses")
+@auth_config(minimum_role=Role.MANAGER)
+async def list_despesas(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return list(registry.financeiro_service.list_despesas())
+
+
+@router.get("/lembretes", response_model=List[LembreteAgendamento], summary="List sent appointment reminders")
+@auth_config(minimum_role=Role.MANAGER)
+async def list_lembretes(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return list(registry.reminder_service.list_reminders())
@@ -0,0 +1,44 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+
+from ..core.auth import AuthenticatedUser, Role, auth_config, authorize
+from ..models.leads import Lead, LeadAtribuicao
+from ..services import registry
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[Lead], summary="List leads, newest first")
+@auth_config(minimum_role=Role.MANAGER)
+async def list_leads(
+    como_conheceu_id: Optional[int] = Query(default=None, gt=0),
+    limit: int = Query(default=100, gt=0, le=1000),
+    offset: int = Query(default=0, ge=0),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return registry.lead_service.list_leads(como_conheceu_id=como_conheceu_id, limit=limit, offset=offset)
+
+
+@router.get(
+    "/atribuicao",
+    response_model=List[LeadAtribuicao],
+    summary="Processed leads per como_conheceu: new, duplicate and existing clients",
+)
+@auth_config(minimum_role=Role.MANAGER)
+async def lead_attribution(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return registry.lead_service.atribuicao()
+
+
+@router.get("/{lead_id}", response_model=Lead, summary="Retrieve lead")
+@auth_config(minimum_role=Role.MANAGER)
+async def get_lead(
+    lead_id: int = Path(gt=0),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    lead = registry.lead_service.get_lead(lead_id)
+    if not lead:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lead not found")
+    return lead
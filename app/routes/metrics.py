@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from ..core.admission import admission_class
+from ..core.auth import AuthenticatedUser, Role, auth_config, authorize
+from ..core.metrics import metrics
+
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Prometheus metrics", include_in_schema=False)
+@auth_config(minimum_role=Role.ADMIN)
+@admission_class("exempt")
+async def get_metrics(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    # An empresa's ADMIN only sees its own per-tenant series.
+    return PlainTextResponse(metrics.render(empresa=str(current_user.empresa_id)), media_type=CONTENT_TYPE)
@@ -0,0 +1,82 @@
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+
+from ..core.admission import admission_class
+from ..core.auth import AuthenticatedUser, Role, auth_config, authorize
+from ..core.coalescing import coalesced
+from ..models.pacotes import Pacote, PacoteCliente, PacoteClienteCreate, PacoteCreate, ReconciliacaoPacotes
+from ..services import registry
+
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[Pacote], summary="List packages")
+@auth_config(minimum_role=Role.STAFF)
+@coalesced
+async def list_pacotes(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return list(registry.pacote_service.list_pacotes())
+
+
+@router.post("/", response_model=Pacote, status_code=status.HTTP_201_CREATED, summary="Create package")
+@auth_config(minimum_role=Role.MANAGER, scopes={"clients:write"})
+async def create_pacote(
+    payload: PacoteCreate,
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    if not registry.servico_service.get_servico(payload.servico_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
+    return registry.pacote_service.create_pacote(payload)
+
+
+@router.post(
+    "/clientes",
+    response_model=PacoteCliente,
+    status_code=status.HTTP_201_CREATED,
+    summary="Sell a package to a client",
+)
+@auth_config(minimum_role=Role.MANAGER, scopes={"clients:write"})
+async def sell_pacote(
+    payload: PacoteClienteCreate,
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    if not await registry.client_service.get_client(payload.cliente_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    pacote_cliente = registry.pacote_service.sell_pacote(payload)
+    if not pacote_cliente:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Package not found")
+    return pacote_cliente
+
+
+@router.get(
+    "/clientes/{cliente_id}",
+    response_model=List[PacoteCliente],
+    summary="List a client's packages",
+)
+@auth_config(minimum_role=Role.STAFF)
+async def list_pacotes_cliente(
+    cliente_id: int = Path(gt=0),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return list(registry.pacote_service.list_pacotes_cliente(cliente_id))
+
+
+@router.post(
+    "/reconciliar",
+    response_model=ReconciliacaoPacotes,
+    summary="Reconcile package sessions with the day's appointments",
+)
+@auth_config(minimum_role=Role.MANAGER, scopes={"clients:write"})
+@admission_class("heavy")
+async def reconcile_pacotes(
+    dia: Optional[date] = Query(default=None),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    start = datetime.combine(dia or date.today(), time.min)
+    return registry.pacote_service.reconcile(
+        registry.appointment_service.list_appointments_between(start, start + timedelta(days=1))
+    )
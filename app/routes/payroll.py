@@ -0,0 +1,42 @@
+from datetime import date
+from typing import List
+
+from fastapi import APIRouter, Depends, Path, Query
+
+from ..core.admission import admission_class
+from ..core.auth import AuthenticatedUser, Role, auth_config, authorize
+from ..models.payroll import FolhaPagamento
+from ..services import registry
+
+
+router = APIRouter()
+
+
+@router.get(
+    "/{ano}/{mes}",
+    response_model=List[FolhaPagamento],
+    summary="List payroll rows for a competencia",
+)
+@auth_config(minimum_role=Role.MANAGER, scopes={"staff:manage"})
+async def list_folhas(
+    ano: int = Path(ge=2000, le=9999),
+    mes: int = Path(ge=1, le=12),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return list(registry.payroll_service.list_folhas(date(ano, mes, 1)))
+
+
+@router.post(
+    "/{ano}/{mes}",
+    response_model=List[FolhaPagamento],
+    summary="Compute payroll for a competencia",
+)
+@auth_config(minimum_role=Role.MANAGER, scopes={"staff:manage"})
+@admission_class("heavy")
+async def run_payroll(
+    ano: int = Path(ge=2000, le=9999),
+    mes: int = Path(ge=1, le=12),
+    full: bool = Query(default=False, description="Ignore previous runs and recompute from scratch"),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return registry.payroll_service.run_payroll(date(ano, mes, 1), full=full)
@@ -1,24 +1,56 @@
 from datetime import datetime as dt
 from datetime import timezone
+from typing import List
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, status
 
+from ..core.admission import admission_class
 from ..core.auth import auth_config
+from ..core.coalescing import coalesced
+from ..core.ratelimit import rate_limit, throttle
+from ..models.leads import ComoConheceu, LeadAccepted, LeadCreate
+from ..models.servicos import ServicoPublico
+from ..services import registry
 
 router = APIRouter(prefix="/public", tags=["public"])
 
 
 @router.get("/health")
 @auth_config(required=False)
+@admission_class("exempt")
 async def health_check():
     return {"status": "ok", "timestamp": dt.now(timezone.utc).isoformat()}
 
 
-@router.get("/services")
+@router.get("/services", response_model=List[ServicoPublico], summary="Active services with base price and duration")
 @auth_config(required=False)
+@coalesced
 async def list_services():
-    return [
-        {"name": "Signature Facial", "duration_minutes": 60, "price": 140},
-        {"name": "Hot Stone Massage", "duration_minutes": 90, "price": 180},
-        {"name": "Body Scrub", "duration_minutes": 45, "price": 95},
-    ]
+    return registry.catalog_service.list_public()
+
+
+@router.get("/como-conheceu", response_model=List[ComoConheceu], summary="Lead source options for web forms")
+@auth_config(required=False)
+@coalesced
+async def list_como_conheceu():
+    return [item for item in registry.lead_service.list_como_conheceu() if item.ativo]
+
+
+@router.post(
+    "/leads",
+    response_model=LeadAccepted,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit a web form lead",
+    dependencies=[Depends(throttle)],
+)
+@auth_config(required=False)
+@rate_limit(30, 60, burst=10, key="ip", name="public.leads")
+async def submit_lead(payload: LeadCreate):
+    # Deduplication and attribution happen in the background (see app.services.leads).
+    if not registry.lead_intake.submit(payload):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Lead intake is busy, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    return LeadAccepted()
@@ -0,0 +1,115 @@
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, status
+
+from ..core.admission import admission_class
+from ..core.auth import AuthenticatedUser, Role, auth_config, authorize
+from ..models.recorrencia import (
+    AgendamentoRecorrente,
+    AgendamentoRecorrenteCreate,
+    AgendamentoRecorrenteUpdate,
+    MaterializacaoResultado,
+    OcorrenciaRecorrente,
+)
+from ..services import registry
+
+
+router = APIRouter()
+
+# Upper bound for a single occurrence listing window.
+MAX_WINDOW_DAYS = 366
+
+
+async def _validate_references(profissional_id: Optional[int], cliente_id: Optional[int], servico_id: Optional[int]):
+    if profissional_id is not None and not registry.funcionario_service.get_funcionario(profissional_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Staff not found")
+    if cliente_id is not None and not await registry.client_service.get_client(cliente_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    if servico_id is not None and not registry.servico_service.get_servico(servico_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
+
+
+@router.get("/", response_model=List[AgendamentoRecorrente], summary="List recurring appointment rules")
+@auth_config(minimum_role=Role.MANAGER)
+async def list_rules(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return list(registry.recurring_service.list_rules())
+
+
+@router.post(
+    "/",
+    response_model=AgendamentoRecorrente,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create recurring appointment rule",
+)
+@auth_config(minimum_role=Role.MANAGER, scopes={"appointments:write"})
+async def create_rule(
+    payload: AgendamentoRecorrenteCreate,
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    await _validate_references(payload.profissional_id, payload.cliente_id, payload.servico_id)
+    rule = registry.recurring_service.create_rule(payload)
+    registry.recurring_service.materialize(rule_ids=[rule.id])
+    return rule
+
+
+@router.put(
+    "/{rule_id}",
+    response_model=MaterializacaoResultado,
+    summary="Update recurring rule and resync its future occurrences",
+)
+@auth_config(minimum_role=Role.MANAGER, scopes={"appointments:write"})
+async def update_rule(
+    rule_id: int = Path(gt=0),
+    payload: AgendamentoRecorrenteUpdate = Body(...),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    await _validate_references(payload.profissional_id, None, payload.servico_id)
+    try:
+        result = registry.recurring_service.update_rule(rule_id, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if not result:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recurring rule not found")
+    _, resultado = result
+    return resultado
+
+
+@router.get(
+    "/{rule_id}/ocorrencias",
+    response_model=List[OcorrenciaRecorrente],
+    summary="Expand recurring rule occurrences for a window",
+)
+@auth_config(minimum_role=Role.STAFF)
+@admission_class("heavy")
+async def list_occurrences(
+    rule_id: int = Path(gt=0),
+    inicio: Optional[date] = Query(default=None, description="Window start (defaults to today)"),
+    fim: Optional[date] = Query(default=None, description="Window end, exclusive (defaults to 4 weeks later)"),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    if not registry.recurring_service.get_rule(rule_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recurring rule not found")
+    inicio = inicio or date.today()
+    fim = fim or inicio + timedelta(days=28)
+    if fim <= inicio or (fim - inicio).days > MAX_WINDOW_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Window must be between 1 and {MAX_WINDOW_DAYS} days",
+        )
+    return list(registry.recurring_service.iter_occurrences(rule_id, inicio, fim))
+
+
+@router.post(
+    "/materializar",
+    response_model=MaterializacaoResultado,
+    summary="Materialize occurrences of all active rules up to the rolling horizon",
+)
+@auth_config(minimum_role=Role.MANAGER, scopes={"appointments:write"})
+@admission_class("heavy")
+async def materialize(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return registry.recurring_service.materialize()
@@ -0,0 +1,83 @@
+import hashlib
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+
+from ..core.auth import AuthenticatedUser, Role, auth_config, authorize
+from ..core.coalescing import coalesced
+from ..models.servicos import MatrizPrecos, Orcamento, OrcamentoCreate, Servico, ServicoCreate, ServicoUpdate
+from ..services import registry
+
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[Servico], summary="List the service catalog")
+@auth_config(minimum_role=Role.STAFF)
+@coalesced
+async def list_servicos(
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    servicos = registry.catalog_service.snapshot().servicos.values()
+    return sorted(servicos, key=lambda servico: servico.nome)
+
+
+@router.post("/", response_model=Servico, status_code=status.HTTP_201_CREATED, summary="Create service")
+@auth_config(minimum_role=Role.MANAGER, scopes={"staff:manage"})
+async def create_servico(
+    payload: ServicoCreate,
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    return registry.servico_service.create_servico(payload)
+
+
+@router.patch("/{servico_id}", response_model=Servico, summary="Update service")
+@auth_config(minimum_role=Role.MANAGER, scopes={"staff:manage"})
+async def update_servico(
+    payload: ServicoUpdate,
+    servico_id: int = Path(gt=0),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    servico = registry.servico_service.update_servico(servico_id, payload)
+    if not servico:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Service not found")
+    return servico
+
+
+# Not coalesced: the answer depends on If-None-Match.
+@router.get(
+    "/precos",
+    response_model=MatrizPrecos,
+    summary="Price and duration of every service per funcionario",
+    responses={304: {"description": "The caller's copy (ETag) is still current"}},
+)
+@auth_config(minimum_role=Role.MANAGER)
+async def get_matriz_precos(
+    request: Request,
+    response: Response,
+    funcionario_id: Optional[int] = Query(default=None, gt=0, description="Only this funcionario"),
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    matriz = registry.catalog_service.matriz(funcionario_id)
+    # Hash of the body: `versao` restarts with the process, so it cannot be the ETag on its own.
+    etag = '"' + hashlib.sha256(matriz.model_dump_json().encode()).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return matriz
+
+
+@router.post("/orcamento", response_model=Orcamento, summary="Quote a basket of services for a client")
+@auth_config(minimum_role=Role.STAFF)
+async def create_orcamento(
+    payload: OrcamentoCreate,
+    current_user: AuthenticatedUser = Depends(authorize),
+):
+    try:
+        orcamento = await registry.catalog_service.quote(payload.cliente_id, payload.itens)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if orcamento is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    return orcamento
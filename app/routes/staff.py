@@ -9,6 +9,7 @@ from ..core.auth import (
     authorize,
     get_current_user,
 )
+from ..core.coalescing import coalesced
 from ..models.funcionarios import (
     Funcionario,
     FuncionarioCreate,
@@ -18,21 +19,42 @@ from ..models.funcionarios import (
     FuncionarioUpdate,
 )
 from ..models.appointments import Appointment
-from ..services.appointments import InMemoryAppointmentService
-from ..services.funcionarios import MockFuncionarioService
+from ..services import registry
 
 
 router = APIRouter()
-funcionario_service = MockFuncionarioService()
-appointment_service = InMemoryAppointmentService()
+
+
+def can_view_all_agendas(current_user: AuthenticatedUser) -> bool:
+    """
+    Access rules:
+    - MANAGER and above can see all agendas.
+    - Funcionarios of tipo ADMINISTRATIVO can see all agendas.
+    - Other staff can only see their own agenda.
+    """
+    if current_user.role >= Role.MANAGER:
+        return True
+
+    if current_user.full_name:
+        # Try to resolve the current user as a funcionario to inspect tipo_funcionario.
+        funcionario = registry.funcionario_service.get_funcionario_by_nome(current_user.full_name)
+        if funcionario:
+            return funcionario.tipo_funcionario == "ADMINISTRATIVO"
+    return False
+
+
+def ensure_agenda_access(current_user: AuthenticatedUser, funcionario: Funcionario) -> None:
+    if not can_view_all_agendas(current_user) and current_user.full_name != funcionario.nome:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden to access other agendas")
 
 
 @router.get("/", response_model=List[Funcionario], summary="List funcionarios")
 @auth_config(minimum_role=Role.MANAGER)
+@coalesced
 async def list_funcionarios(
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    return list(funcionario_service.list_funcionarios())
+    return list(registry.funcionario_service.list_funcionarios())
 
 
 @router.get(
@@ -45,7 +67,7 @@ async def get_funcionario(
     funcionario_id: int = Path(gt=0),
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    funcionario = funcionario_service.get_funcionario(funcionario_id)
+    funcionario = registry.funcionario_service.get_funcionario(funcionario_id)
     if not funcionario:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Staff not found")
     return funcionario
@@ -62,7 +84,7 @@ async def create_funcionario(
     payload: FuncionarioCreate,
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    return funcionario_service.create_funcionario(payload)
+    return registry.funcionario_service.create_funcionario(payload)
 
 
 @router.put(
@@ -76,7 +98,7 @@ async def update_funcionario(
     payload: FuncionarioUpdate = Body(...),
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    funcionario = funcionario_service.update_funcionario(funcionario_id, payload)
+    funcionario = registry.funcionario_service.update_funcionario(funcionario_id, payload)
     if not funcionario:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Staff not found")
     return funcionario
@@ -93,7 +115,7 @@ async def update_funcionario_status(
     payload: FuncionarioStatusUpdate = Body(...),
     current_user: AuthenticatedUser = Depends(authorize),
 ):
-    funcionario = funcionario_service.update_status(funcionario_id, payload)
+    funcionario = registry.funcionario_service.update_status(funcionario_id, payload)
     if not funcionario:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Staff not found")
     return funcionario
@@ -110,10 +132,10 @@ async def list_funcionario_servicos(
     current_user: AuthenticatedUser = Depends(authorize),
 ):
     # Ensure funcionario exists
-    funcionario = funcionario_service.get_funcionario(funcionario_id)
+    funcionario = registry.funcionario_service.get_funcionario(funcionario_id)
     if not funcionario:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Staff not found")
-    return list(funcionario_service.list_funcionario_servicos(funcionario_id))
+    return list(registry.funcionario_service.list_funcionario_servicos(funcionario_id))
 
 
 @router.post(
@@ -134,11 +156,11 @@ async def create_funcionario_servico(
             detail="Body funcionario_id must match path parameter",
         )
 
-    funcionario = funcionario_service.get_funcionario(funcionario_id)
+    funcionario = registry.funcionario_service.get_funcionario(funcionario_id)
     if not funcionario:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Funcionario not found")
 
-    return funcionario_service.create_or_update_funcionario_servico(payload)
+    return registry.funcionario_service.create_or_update_funcionario_servico(payload)
 
 
 @router.get(
@@ -154,28 +176,13 @@ async def list_funcionario_agenda(
 ):
     # For now, we approximate agenda by filtering appointments whose staff_member
     # name matches the funcionario's nome in the mock data.
-    funcionario = funcionario_service.get_funcionario(funcionario_id)
+    funcionario = registry.funcionario_service.get_funcionario(funcionario_id)
     if not funcionario:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Staff not found")
 
-    # Access rules:
-    # - MANAGER and above can see all agendas.
-    # - Funcionarios of tipo ADMINISTRATIVO can see all agendas.
-    # - Other staff can only see their own agenda.
-    is_manager = current_user.role >= Role.MANAGER
-    is_admin_staff = False
-
-    if not is_manager and current_user.full_name:
-        # Try to resolve the current user as a funcionario to inspect tipo_funcionario.
-        for f in funcionario_service.list_funcionarios():
-            if f.nome == current_user.full_name:
-                is_admin_staff = f.tipo_funcionario == "ADMINISTRATIVO"
-                break
-
-    if not (is_manager or is_admin_staff) and current_user.full_name != funcionario.nome:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden to access other agendas")
+    ensure_agenda_access(current_user, funcionario)
 
-    all_appointments = appointment_service.list_appointments()
+    all_appointments = registry.appointment_service.list_appointments()
     return [
         appt
         for appt in all_appointments
@@ -2,10 +2,16 @@
 
 from .appointments import InMemoryAppointmentService
 from .clients import MockClientService
+from .funcionarios import MockFuncionarioService
+from .payroll import PayrollService
+from .servicos import MockServicoService
 from .users import InMemoryUserService
 
 __all__ = [
     "InMemoryAppointmentService",
     "MockClientService",
+    "MockFuncionarioService",
+    "MockServicoService",
     "InMemoryUserService",
+    "PayrollService",
 ]
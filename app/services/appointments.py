@@ -1,12 +1,39 @@
 from __future__ import annotations
 
+import asyncio
+from bisect import bisect_left, insort
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta
 from itertools import count
-from typing import Dict, Iterable, Optional
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
-from ..models.appointments import Appointment, AppointmentCreate, AppointmentStatus
+from ..core.fieldsets import project
+from ..models.appointments import (
+    ACTIVE_STATUSES,
+    CANCELED_STATUSES,
+    Appointment,
+    AppointmentCreate,
+    AppointmentStatus,
+    AppointmentStatusResult,
+    can_transition,
+)
+from .hooks import AppointmentHooks
 
 
+class InvalidStatusTransition(ValueError):
+    """The appointment cannot move from its current status to the requested one."""
+
+    def __init__(self, current: AppointmentStatus, requested: AppointmentStatus):
+        super().__init__(f"Cannot change status from {current.value} to {requested.value}")
+        self.current = current
+        self.requested = requested
+
+
+def _window(index: List[Tuple[datetime, int]], start: datetime, end: datetime) -> List[Tuple[datetime, int]]:
+    # Both ends are bisected so only the entries in `[start, end)` are copied.
+    return index[bisect_left(index, (start,)) : bisect_left(index, (end,))]
+
 
 class InMemoryAppointmentService:
     def __init__(self):
@@ -34,25 +61,338 @@ class InMemoryAppointmentService:
         }
         self._sequence = count(len(self._appointments) + 1)
 
+        # Time index: (start_time, id) pairs kept sorted for range queries.
+        self._time_index: List[Tuple[datetime, int]] = sorted(
+            (appt.start_time, appt.id) for appt in self._appointments.values()
+        )
+        # Per-staff agenda index, same layout as the time index.
+        self._staff_index: Dict[str, List[Tuple[datetime, int]]] = defaultdict(list)
+        for appt in self._appointments.values():
+            insort(self._staff_index[appt.staff_member], (appt.start_time, appt.id))
+        # Per-client history index, same layout as the time index.
+        self._client_index: Dict[int, List[Tuple[datetime, int]]] = defaultdict(list)
+        for appt in self._appointments.values():
+            insort(self._client_index[appt.client_id], (appt.start_time, appt.id))
+
+        # Change log: appointment id -> revision of its last mutation, ordered
+        # from oldest to newest so consumers can read only recent changes.
+        self._revision = 0
+        self._changes: "OrderedDict[int, int]" = OrderedDict()
+
+        # Serializes mutations so hooks observe every transition exactly once.
+        self._lock = RLock()
+        self._hooks: List[AppointmentHooks] = []
+
+    def register_hook(self, hook: AppointmentHooks) -> None:
+        self._hooks.append(hook)
+
+    @property
+    def revision(self) -> int:
+        """Monotonic counter bumped on every appointment mutation."""
+        return self._revision
+
+    def _record_change(self, appointment_id: int) -> None:
+        self._revision += 1
+        self._changes[appointment_id] = self._revision
+        self._changes.move_to_end(appointment_id)
+
+    def changed_since(self, revision: int) -> List[int]:
+        """Return ids of appointments mutated after `revision`, oldest first."""
+        changed: List[int] = []
+        for appointment_id, appointment_revision in reversed(self._changes.items()):
+            if appointment_revision <= revision:
+                break
+            changed.append(appointment_id)
+        changed.reverse()
+        return changed
+
     def list_appointments(self) -> Iterable[Appointment]:
         return sorted(self._appointments.values(), key=lambda appt: appt.start_time)
 
+    def project_appointments(
+        self,
+        fields: Sequence[str],
+        client_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Appointments (all, or those of `client_id`) ordered by start time, as
+        dicts holding only `fields`.
+        """
+        index = self._time_index if client_id is None else self._client_index.get(client_id, [])
+        appointments = self._appointments
+        return project((appointments[appointment_id] for _, appointment_id in index), tuple(fields))
+
+    def list_appointments_between(self, start: datetime, end: datetime) -> Iterable[Appointment]:
+        """Appointments starting in `[start, end)`, ordered by start time."""
+        for _, appointment_id in _window(self._time_index, start, end):
+            yield self._appointments[appointment_id]
+
+    def list_staff_appointments_between(
+        self,
+        staff_member: str,
+        start: datetime,
+        end: datetime,
+    ) -> Iterable[Appointment]:
+        """Appointments of `staff_member` starting in `[start, end)`, ordered by start time."""
+        for _, appointment_id in _window(self._staff_index.get(staff_member, []), start, end):
+            yield self._appointments[appointment_id]
+
+    def find_conflicts(
+        self,
+        staff_member: str,
+        start: datetime,
+        end: datetime,
+        *,
+        ignore_id: Optional[int] = None,
+    ) -> List[Appointment]:
+        """Non-canceled appointments of `staff_member` overlapping `[start, end)`."""
+        # Appointments never span more than a day, so look back one day for overlaps.
+        return [
+            appt
+            for appt in self.list_staff_appointments_between(staff_member, start - timedelta(days=1), end)
+            if appt.end_time > start
+            and appt.id != ignore_id
+            and appt.status not in CANCELED_STATUSES
+        ]
+
     def list_client_appointments(self, client_id: int) -> Iterable[Appointment]:
-        return sorted(
-            (appt for appt in self._appointments.values() if appt.client_id == client_id),
-            key=lambda appt: appt.start_time,
-        )
+        return [self._appointments[appointment_id] for _, appointment_id in self._client_index.get(client_id, [])]
+
+    def list_clients_appointments_between(
+        self,
+        client_ids: Iterable[int],
+        start: datetime,
+        end: datetime,
+    ) -> Dict[int, List[Appointment]]:
+        """Appointments of each client starting in `[start, end)`, ordered by start time."""
+        result: Dict[int, List[Appointment]] = {}
+        for client_id in client_ids:
+            result[client_id] = [
+                self._appointments[appointment_id]
+                for _, appointment_id in _window(self._client_index.get(client_id, []), start, end)
+            ]
+        return result
+
+    def get_appointment(self, appointment_id: int) -> Optional[Appointment]:
+        return self._appointments.get(appointment_id)
 
     def create_appointment(self, request: AppointmentCreate) -> Appointment:
-        identifier = next(self._sequence)
-        appointment = Appointment(id=identifier, status=AppointmentStatus.scheduled, **request.model_dump())
-        self._appointments[identifier] = appointment
+        with self._lock:
+            identifier = next(self._sequence)
+            appointment = Appointment(id=identifier, status=AppointmentStatus.scheduled, **request.model_dump())
+            self._insert(appointment)
+            for hook in self._hooks:
+                hook.appointment_created(appointment)
         return appointment
 
+    def bulk_create_appointments(
+        self,
+        requests: Iterable[AppointmentCreate],
+        *,
+        agendamento_recorrente_id: Optional[int] = None,
+    ) -> List[Appointment]:
+        """Create many appointments under a single lock acquisition."""
+        created: List[Appointment] = []
+        with self._lock:
+            for request in requests:
+                appointment = Appointment(
+                    id=next(self._sequence),
+                    status=AppointmentStatus.scheduled,
+                    agendamento_recorrente_id=agendamento_recorrente_id,
+                    **request.model_dump(),
+                )
+                self._insert(appointment)
+                created.append(appointment)
+            for hook in self._hooks:
+                for appointment in created:
+                    hook.appointment_created(appointment)
+        return created
+
+    def bulk_load(self, appointments: Iterable[Appointment]) -> int:
+        """
+        Load already-built appointments (fixtures, synthetic data) keeping their ids.
+
+        Indexes are rebuilt with one sort instead of an insertion per row, and
+        hooks are not called: consumers with derived state (e.g. dashboard
+        counters) must be rebuilt afterwards. Returns the number of rows loaded.
+        """
+        with self._lock:
+            loaded: List[int] = []
+            for appointment in appointments:
+                self._appointments[appointment.id] = appointment
+                loaded.append(appointment.id)
+            self._time_index = sorted((appt.start_time, appt.id) for appt in self._appointments.values())
+            staff_index: Dict[str, List[Tuple[datetime, int]]] = defaultdict(list)
+            client_index: Dict[int, List[Tuple[datetime, int]]] = defaultdict(list)
+            for start_time, appointment_id in self._time_index:
+                appointment = self._appointments[appointment_id]
+                staff_index[appointment.staff_member].append((start_time, appointment_id))
+                client_index[appointment.client_id].append((start_time, appointment_id))
+            self._staff_index = staff_index
+            self._client_index = client_index
+            # One revision for the whole load; every loaded row counts as changed.
+            self._revision += 1
+            for appointment_id in loaded:
+                self._changes[appointment_id] = self._revision
+                self._changes.move_to_end(appointment_id)
+            self._sequence = count(max(self._appointments, default=0) + 1)
+        return len(loaded)
+
+    def update_appointment(self, appointment_id: int, **fields: Any) -> Optional[Appointment]:
+        """Update scheduling fields (staff_member, service, start_time, end_time) in place."""
+        with self._lock:
+            appointment = self._appointments.get(appointment_id)
+            if not appointment:
+                return None
+            updated = appointment.model_copy(update=fields)
+            self._unindex(appointment)
+            self._appointments[appointment_id] = updated
+            self._index(updated)
+            self._record_change(appointment_id)
+            for hook in self._hooks:
+                hook.appointment_updated(appointment, updated)
+        return updated
+
+    def reassign_client(self, client_id: int, new_client_id: int) -> List[Appointment]:
+        """
+        Move every appointment of `client_id` to `new_client_id` (client
+        merges) under one lock acquisition. Hooks see each move as an
+        `appointment_updated`. Returns the moved appointments.
+        """
+        moved: List[Tuple[Appointment, Appointment]] = []
+        with self._lock:
+            index = self._client_index.pop(client_id, [])
+            if not index:
+                return []
+            for _, appointment_id in index:
+                appointment = self._appointments[appointment_id]
+                updated = appointment.model_copy(update={"client_id": new_client_id})
+                self._appointments[appointment_id] = updated
+                self._record_change(appointment_id)
+                moved.append((appointment, updated))
+            self._client_index[new_client_id] = sorted(self._client_index.get(new_client_id, []) + index)
+            for hook in self._hooks:
+                for previous, updated in moved:
+                    hook.appointment_updated(previous, updated)
+        return [updated for _, updated in moved]
+
+    def _insert(self, appointment: Appointment) -> None:
+        self._appointments[appointment.id] = appointment
+        self._index(appointment)
+        self._record_change(appointment.id)
+
+    def _index(self, appointment: Appointment) -> None:
+        insort(self._time_index, (appointment.start_time, appointment.id))
+        insort(self._staff_index[appointment.staff_member], (appointment.start_time, appointment.id))
+        insort(self._client_index[appointment.client_id], (appointment.start_time, appointment.id))
+
+    def _unindex(self, appointment: Appointment) -> None:
+        key = (appointment.start_time, appointment.id)
+        indexes = (
+            self._time_index,
+            self._staff_index[appointment.staff_member],
+            self._client_index[appointment.client_id],
+        )
+        for index in indexes:
+            position = bisect_left(index, key)
+            if position < len(index) and index[position] == key:
+                del index[position]
+
     def update_status(self, appointment_id: int, status: AppointmentStatus) -> Optional[Appointment]:
-        appointment = self._appointments.get(appointment_id)
-        if not appointment:
-            return None
-        updated = appointment.model_copy(update={"status": status})
-        self._appointments[appointment_id] = updated
+        """
+        Change one appointment's status. Setting the current status again is a
+        no-op; disallowed transitions raise `InvalidStatusTransition`.
+        """
+        with self._lock:
+            appointment = self._appointments.get(appointment_id)
+            if not appointment:
+                return None
+            if appointment.status == status:
+                return appointment
+            if not can_transition(appointment.status, status):
+                raise InvalidStatusTransition(appointment.status, status)
+            updated = appointment.model_copy(update={"status": status})
+            self._appointments[appointment_id] = updated
+            self._record_change(appointment_id)
+            for hook in self._hooks:
+                hook.appointment_status_changed(appointment, updated)
         return updated
+
+    def update_statuses(self, changes: Iterable[Tuple[int, AppointmentStatus]]) -> List[AppointmentStatusResult]:
+        """
+        Apply many `(appointment_id, status)` changes under one lock
+        acquisition and one revision, returning a result per change in order.
+
+        Each change is validated like `update_status` and failures do not
+        stop the batch. Hooks receive the applied changes as a single
+        `appointments_status_changed` call.
+        """
+        results: List[AppointmentStatusResult] = []
+        applied: List[Tuple[Appointment, Appointment]] = []
+        with self._lock:
+            for appointment_id, status in changes:
+                appointment = self._appointments.get(appointment_id)
+                if not appointment:
+                    results.append(AppointmentStatusResult(id=appointment_id, result="not_found"))
+                    continue
+                if appointment.status == status:
+                    results.append(AppointmentStatusResult(id=appointment_id, result="unchanged", appointment=appointment))
+                    continue
+                if not can_transition(appointment.status, status):
+                    results.append(
+                        AppointmentStatusResult(
+                            id=appointment_id,
+                            result="invalid_transition",
+                            appointment=appointment,
+                            detail=str(InvalidStatusTransition(appointment.status, status)),
+                        )
+                    )
+                    continue
+                updated = appointment.model_copy(update={"status": status})
+                self._appointments[appointment_id] = updated
+                applied.append((appointment, updated))
+                results.append(AppointmentStatusResult(id=appointment_id, result="updated", appointment=updated))
+
+            if applied:
+                self._revision += 1
+                for _, updated in applied:
+                    self._changes[updated.id] = self._revision
+                    self._changes.move_to_end(updated.id)
+                for hook in self._hooks:
+                    hook.appointments_status_changed(applied)
+        return results
+
+    async def sweep_past_appointments(
+        self,
+        start: datetime,
+        end: datetime,
+        *,
+        status: AppointmentStatus = AppointmentStatus.completed,
+        batch_size: int = 500,
+    ) -> int:
+        """
+        Move appointments that started in `[start, end)`, ended by `end` and
+        are still scheduled or confirmed to `status`, `batch_size` at a time,
+        yielding to the event loop between batches so requests can interleave.
+        Returns how many changed.
+        """
+        due = [
+            appointment.id
+            for appointment in self.list_appointments_between(start, end)
+            if appointment.status in ACTIVE_STATUSES and appointment.end_time <= end
+        ]
+        changed = 0
+        for offset in range(0, len(due), batch_size):
+            if offset:
+                await asyncio.sleep(0)
+            results = self.update_statuses((appointment_id, status) for appointment_id in due[offset : offset + batch_size])
+            changed += sum(result.result == "updated" for result in results)
+        return changed
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        return {
+            "appointments": len(self._appointments),
+            "staff_agendas": len(self._staff_index),
+            "client_histories": len(self._client_index),
+        }
@@ -0,0 +1,396 @@
+"""
+Audit trail of mutations (credit balances, client merges, staff records
+and salaries, appointment statuses).
+
+Services report mutations through their hooks; `AuditHooks` turns each one
+into an entry on the `AuditLog` queue, tagged with the empresa and the user
+of the request (`app.core.auth.current_user`, the user `authorize` returns;
+`None` for background jobs). Queuing is all the request pays for: a writer
+thread drains the queue in batches, computes the field changes and appends
+the records to the sink, so handlers like `update_client_credit` never wait
+on serialization or I/O.
+
+The queue is a bounded `app.core.writers.BatchWriter`: when it is full,
+`AUDIT_OVERFLOW` decides whether the incoming record (`drop_newest`,
+default) or the oldest queued one (`drop_oldest`) is discarded, or whether
+the mutating call waits up to `AUDIT_BLOCK_TIMEOUT_SECONDS` for room
+(`block`). Record ids are assigned on arrival, so dropped records show up
+as gaps in the ids, and as `spa_audit_records_total{outcome="dropped"}`.
+
+Sinks are append-only: `FileAuditSink` writes JSON lines to `audit.jsonl`
+in `AUDIT_DIR`, rotated by size; without a directory `MemoryAuditSink`
+keeps the most recent records in memory. Both answer the queries behind
+`GET /admin/audit`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import count
+from threading import Lock
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from ..core.auth import AuthenticatedUser, current_user
+from ..core.metrics import metrics
+from ..core.writers import BatchWriter, OverflowPolicy, RotatingFile
+from ..models.appointments import Appointment
+from ..models.audit import AuditRecord
+from ..models.clients import Cliente
+from ..models.endereco import Endereco
+from ..models.funcionarios import Funcionario
+from .hooks import AppointmentHooks, ClientHooks, FuncionarioHooks
+
+AUDIT_RECORDS = metrics.counter(
+    "spa_audit_records_total",
+    "Audit records by outcome (written, dropped on overflow, failed to write).",
+    ("outcome",),
+)
+
+# Bookkeeping fields that change with every write.
+IGNORED_FIELDS = frozenset({"id", "created_at", "updated_at"})
+
+
+@dataclass(frozen=True)
+class AuditQuery:
+    empresa_id: int
+    entity: Optional[str] = None
+    entity_id: Optional[int] = None
+    inicio: Optional[datetime] = None
+    fim: Optional[datetime] = None
+
+    def matches(self, empresa_id: int, entity: str, entity_id: int) -> bool:
+        if empresa_id != self.empresa_id:
+            return False
+        if self.entity is not None and entity != self.entity:
+            return False
+        if self.entity_id is not None and entity_id != self.entity_id:
+            return False
+        return True
+
+    def before_range(self, timestamp: datetime) -> bool:
+        return self.inicio is not None and timestamp < self.inicio
+
+    def after_range(self, timestamp: datetime) -> bool:
+        return self.fim is not None and timestamp >= self.fim
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Records carry naive UTC timestamps.
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class MemoryAuditSink:
+    """Keeps the latest `max_records` records in memory."""
+
+    def __init__(self, max_records: int = 10000):
+        self._records: Deque[AuditRecord] = deque(maxlen=max_records)
+        self._lock = Lock()
+
+    def last_id(self) -> int:
+        with self._lock:
+            return self._records[-1].id if self._records else 0
+
+    def write(self, records: Sequence[AuditRecord]) -> None:
+        with self._lock:
+            self._records.extend(records)
+
+    def query(self, query: AuditQuery, limit: int) -> List[AuditRecord]:
+        with self._lock:
+            records = list(self._records)
+        found: List[AuditRecord] = []
+        for record in reversed(records):
+            if query.before_range(record.timestamp):
+                break
+            if query.after_range(record.timestamp):
+                continue
+            if query.matches(record.empresa_id, record.entity, record.entity_id):
+                found.append(record)
+                if len(found) >= limit:
+                    break
+        return found
+
+    def close(self) -> None:
+        pass
+
+
+class FileAuditSink:
+    """
+    Appends records as JSON lines to `<directory>/audit.jsonl`, rotated to
+    `audit.jsonl.1` ... `audit.jsonl.<backup_count>` by size.
+    """
+
+    FILENAME = "audit.jsonl"
+
+    def __init__(self, directory: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        self.file = RotatingFile(os.path.join(directory, self.FILENAME), max_bytes, backup_count)
+
+    def last_id(self) -> int:
+        for lines in self.file.read_lines():
+            if lines:
+                return json.loads(lines[-1])["id"]
+        return 0
+
+    def write(self, records: Sequence[AuditRecord]) -> None:
+        self.file.write(b"".join(record.model_dump_json().encode() + b"\n" for record in records))
+
+    def query(self, query: AuditQuery, limit: int) -> List[AuditRecord]:
+        # Records are appended in id (and so time) order: scan newest first
+        # and stop at the first record older than the range.
+        found: List[AuditRecord] = []
+        for lines in self.file.read_lines():
+            for line in reversed(lines):
+                raw = json.loads(line)
+                timestamp = datetime.fromisoformat(raw["timestamp"])
+                if query.before_range(timestamp):
+                    return found
+                if query.after_range(timestamp):
+                    continue
+                if query.matches(raw["empresa_id"], raw["entity"], raw["entity_id"]):
+                    found.append(AuditRecord.model_validate(raw))
+                    if len(found) >= limit:
+                        return found
+        return found
+
+    def close(self) -> None:
+        self.file.close()
+
+
+@dataclass
+class _Entry:
+    id: int
+    timestamp: Optional[datetime]
+    empresa_id: int
+    user: Optional[AuthenticatedUser]
+    action: str
+    entity: str
+    entity_id: int
+    previous: Optional[BaseModel]
+    updated: BaseModel
+    # Fields to compare; `None` compares every field.
+    fields: Optional[Tuple[str, ...]]
+
+
+def _changes(previous: Optional[BaseModel], updated: BaseModel, fields: Optional[Tuple[str, ...]]) -> Dict[str, List[Any]]:
+    include = set(fields) if fields is not None else None
+    after = updated.model_dump(mode="json", include=include)
+    if previous is None:
+        return {name: [None, value] for name, value in after.items() if name not in IGNORED_FIELDS}
+    before = previous.model_dump(mode="json", include=include)
+    return {
+        name: [before.get(name), value]
+        for name, value in after.items()
+        if name not in IGNORED_FIELDS and before.get(name) != value
+    }
+
+
+def _build(entry: _Entry) -> AuditRecord:
+    user = entry.user
+    return AuditRecord(
+        id=entry.id,
+        timestamp=entry.timestamp,
+        empresa_id=entry.empresa_id,
+        username=(user.username or None) if user is not None else None,
+        role=user.role.name if user is not None and user.username else None,
+        action=entry.action,
+        entity=entry.entity,
+        entity_id=entry.entity_id,
+        changes=_changes(entry.previous, entry.updated, entry.fields),
+    )
+
+
+# (entity id, previous, updated) for one mutation; `previous` is None on creation.
+Change = Tuple[int, Optional[BaseModel], BaseModel]
+
+
+class AuditLog(BatchWriter[_Entry]):
+    """
+    Audit entries queued by `AuditHooks`, written to `sink` in batches by a
+    background thread (see `BatchWriter` for `start`, `stop` and `flush`).
+    """
+
+    def __init__(
+        self,
+        sink: Any,
+        *,
+        queue_size: int = 10000,
+        overflow: OverflowPolicy = "drop_newest",
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        block_timeout: float = 0.5,
+    ):
+        super().__init__(
+            name="audit-writer",
+            outcomes=AUDIT_RECORDS,
+            queue_size=queue_size,
+            overflow=overflow,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            block_timeout=block_timeout,
+        )
+        self.sink = sink
+        self._sequence = count(sink.last_id() + 1)
+
+    def record(
+        self,
+        empresa_id: int,
+        action: str,
+        entity: str,
+        change: Change,
+        fields: Optional[Tuple[str, ...]] = None,
+    ) -> None:
+        self.record_many(empresa_id, action, entity, (change,), fields)
+
+    def record_many(
+        self,
+        empresa_id: int,
+        action: str,
+        entity: str,
+        changes: Iterable[Change],
+        fields: Optional[Tuple[str, ...]] = None,
+    ) -> None:
+        """Queue one entry per change, attributed to the current user. Never raises."""
+        user = current_user.get()
+        self._put(
+            _Entry(
+                id=0,
+                timestamp=None,
+                empresa_id=empresa_id,
+                user=user,
+                action=action,
+                entity=entity,
+                entity_id=entity_id,
+                previous=previous,
+                updated=updated,
+                fields=fields,
+            )
+            for entity_id, previous, updated in changes
+        )
+
+    def _prepare(self, entry: _Entry) -> _Entry:
+        # Numbered and stamped in queue order, so files stay sorted by both.
+        entry.id = next(self._sequence)
+        entry.timestamp = datetime.utcnow()
+        return entry
+
+    def _discard(self, entry: _Entry) -> None:
+        # Burn an id so the loss shows as a gap.
+        next(self._sequence)
+
+    def write_batch(self, batch: List[_Entry]) -> None:
+        self.sink.write([_build(entry) for entry in batch])
+
+    def close(self) -> None:
+        self.sink.close()
+
+    # Queries
+
+    def query(
+        self,
+        empresa_id: int,
+        *,
+        entity: Optional[str] = None,
+        entity_id: Optional[int] = None,
+        inicio: Optional[datetime] = None,
+        fim: Optional[datetime] = None,
+        limit: int = 100,
+    ) -> List[AuditRecord]:
+        """Records of `empresa_id` matching the filters, newest first."""
+        # Include what is still queued; a stalled writer only delays the answer.
+        self.flush(timeout=self.flush_interval)
+        return self.sink.query(AuditQuery(empresa_id, entity, entity_id, _naive_utc(inicio), _naive_utc(fim)), limit)
+
+
+def register_audit_metrics(log: AuditLog) -> None:
+    metrics.register_collector(
+        "spa_audit_queue_depth",
+        "Audit records waiting for the writer.",
+        (),
+        lambda: {(): log.depth},
+    )
+
+
+class AuditHooks(AppointmentHooks, ClientHooks, FuncionarioHooks):
+    """Queues the mutations of one empresa's services on an `AuditLog`."""
+
+    def __init__(self, log: AuditLog, empresa_id: int):
+        self._log = log
+        self._empresa_id = empresa_id
+
+    def appointment_created(self, appointment: Appointment) -> None:
+        self._log.record(self._empresa_id, "appointment.created", "appointment", (appointment.id, None, appointment))
+
+    def appointment_status_changed(self, previous: Appointment, updated: Appointment) -> None:
+        self._log.record(
+            self._empresa_id,
+            "appointment.status_changed",
+            "appointment",
+            (updated.id, previous, updated),
+            fields=("status",),
+        )
+
+    def appointments_status_changed(self, changes: List[Tuple[Appointment, Appointment]]) -> None:
+        self._log.record_many(
+            self._empresa_id,
+            "appointment.status_changed",
+            "appointment",
+            ((updated.id, previous, updated) for previous, updated in changes),
+            fields=("status",),
+        )
+
+    def appointment_updated(self, previous: Appointment, updated: Appointment) -> None:
+        self._log.record(self._empresa_id, "appointment.updated", "appointment", (updated.id, previous, updated))
+
+    def client_created(self, client: Cliente) -> None:
+        self._log.record(self._empresa_id, "client.created", "client", (client.id, None, client))
+
+    def client_credit_changed(self, previous: Cliente, updated: Cliente) -> None:
+        self._log.record(
+            self._empresa_id,
+            "client.credit_changed",
+            "client",
+            (updated.id, previous, updated),
+            fields=("saldo_credito",),
+        )
+
+    def client_merged(self, previous: Cliente, updated: Cliente, duplicate: Cliente) -> None:
+        self._log.record(self._empresa_id, "client.merged", "client", (updated.id, previous, updated))
+        # Compared with the survivor, so the record shows where each value went.
+        self._log.record(self._empresa_id, "client.merged_into", "client", (duplicate.id, duplicate, updated))
+
+    def client_addresses_updated(self, client_id: int, previous: List[Endereco], updated: List[Endereco]) -> None:
+        # One record per created or changed address, filed under the client.
+        before = {endereco.id: endereco for endereco in previous}
+        self._log.record_many(
+            self._empresa_id,
+            "client.address_updated",
+            "client",
+            (
+                (client_id, before.get(endereco.id), endereco)
+                for endereco in updated
+                if before.get(endereco.id) != endereco
+            ),
+        )
+
+    def funcionario_created(self, funcionario: Funcionario) -> None:
+        self._log.record(self._empresa_id, "funcionario.created", "funcionario", (funcionario.id, None, funcionario))
+
+    def funcionario_updated(self, previous: Funcionario, updated: Funcionario) -> None:
+        self._log.record(self._empresa_id, "funcionario.updated", "funcionario", (updated.id, previous, updated))
+
+
+__all__ = [
+    "AuditHooks",
+    "AuditLog",
+    "AuditQuery",
+    "FileAuditSink",
+    "MemoryAuditSink",
+    "register_audit_metrics",
+]
@@ -0,0 +1,385 @@
+"""
+Read-through caching for service interfaces.
+
+`CachedService` wraps a service (e.g. an `abc_ClientService`) and serves
+the read methods named in its `CacheSpec` from a bounded LRU cache with
+TTLs. Write methods named in the spec invalidate exactly the keys they
+affect. Everything else (hooks registration, `revision`, `store_sizes`)
+is delegated to the wrapped service unchanged.
+
+Keys are `(method name, *positional args)`, so `("get_client", 7)` is the
+entry for `get_client(7)`. `None` results are cached too: a miss for an id
+that does not exist is as expensive as a hit once storage is remote, so
+writes that create entities invalidate the entity's keys as well.
+
+A read that overlaps a write may have computed its value from the state
+before the write. To avoid caching that stale value after the write has
+invalidated the key, each read only stores its result if no invalidation
+happened while it was running.
+"""
+
+from __future__ import annotations
+
+import inspect
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from ..core.metrics import metrics
+
+CacheKey = Tuple[Hashable, ...]
+_MISSING = object()
+
+
+@dataclass
+class CacheStats:
+    name: str
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry time to live."""
+
+    def __init__(self, name: str, max_size: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def epoch(self) -> int:
+        """Bumped by every invalidation."""
+        return self._epoch
+
+    def get(self, key: CacheKey) -> Any:
+        """Cached value, or `_MISSING`."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: CacheKey, value: Any, epoch: int, ttl: Optional[float] = None) -> None:
+        """Store `value` unless an invalidation happened since `epoch` was read."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, keys: Iterable[CacheKey]) -> None:
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                name=self.name,
+                size=len(self._entries),
+                max_size=self.max_size,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                expirations=self.expirations,
+                invalidations=self.invalidations,
+            )
+
+
+# Invalidation callbacks receive the wrapped service and the call's
+# positional args (`before`), or the result and the args (`after`).
+BeforeWrite = Callable[..., Iterable[CacheKey]]
+AfterWrite = Callable[..., Iterable[CacheKey]]
+
+
+@dataclass(frozen=True)
+class Invalidates:
+    after: Optional[AfterWrite] = None
+    # Keys that depend on the state before the write (e.g. an old name).
+    before: Optional[BeforeWrite] = None
+
+
+@dataclass(frozen=True)
+class CacheSpec:
+    # Read method name -> TTL override (None uses the cache default).
+    reads: Dict[str, Optional[float]]
+    writes: Dict[str, Invalidates]
+    # Batch read method -> single read whose entries it shares. The batch
+    # method takes an iterable of ids and returns `{id: value}` for the ids
+    # that exist; only ids missing from the cache are fetched.
+    batches: Dict[str, str] = field(default_factory=dict)
+    # Methods after which the whole cache is dropped (bulk loads).
+    clears: Tuple[str, ...] = ()
+    max_size: int = 1024
+    ttl: float = 60.0
+
+
+class _FrozenList(tuple):
+    pass
+
+
+def _freeze(value: Any) -> Any:
+    # Lists are cached as tuples and copied on the way out, so callers
+    # can't mutate the cached value.
+    return _FrozenList(value) if isinstance(value, list) else value
+
+
+def _thaw(value: Any) -> Any:
+    return list(value) if isinstance(value, _FrozenList) else value
+
+
+@dataclass
+class _Bound:
+    signatures: Dict[str, inspect.Signature] = field(default_factory=dict)
+
+    def args(self, service: Any, name: str, args: tuple, kwargs: dict) -> tuple:
+        if not kwargs:
+            return args
+        signature = self.signatures.get(name)
+        if signature is None:
+            signature = self.signatures[name] = inspect.signature(getattr(service, name))
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return bound.args
+
+
+class CachedService:
+    """
+    Read-through cache in front of `service`, configured by `spec`.
+
+    `max_size` and `ttl` override the spec's defaults. Wrap the service
+    after any instrumentation, since methods are looked up once here.
+    """
+
+    def __init__(
+        self,
+        service: Any,
+        spec: CacheSpec,
+        name: str,
+        *,
+        max_size: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        self._service = service
+        self._spec = spec
+        self._bound = _Bound()
+        self.cache = LRUCache(
+            name,
+            max_size=spec.max_size if max_size is None else max_size,
+            ttl=spec.ttl if ttl is None else ttl,
+        )
+        for method_name, ttl in spec.reads.items():
+            setattr(self, method_name, self._read(method_name, ttl))
+        for method_name, single in spec.batches.items():
+            setattr(self, method_name, self._batch_read(method_name, single, spec.reads.get(single)))
+        for method_name, invalidates in spec.writes.items():
+            setattr(self, method_name, self._write(method_name, invalidates))
+        for method_name in spec.clears:
+            setattr(self, method_name, self._clearing(method_name))
+
+    @property
+    def wrapped(self) -> Any:
+        return self._service
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._service, name)
+
+    def _read(self, name: str, ttl: Optional[float]) -> Callable:
+        method = getattr(self._service, name)
+        cache = self.cache
+        bound = self._bound
+        service = self._service
+
+        if inspect.iscoroutinefunction(method):
+
+            async def async_read(*args: Any, **kwargs: Any) -> Any:
+                key = (name, *bound.args(service, name, args, kwargs))
+                value = cache.get(key)
+                if value is not _MISSING:
+                    return _thaw(value)
+                epoch = cache.epoch
+                result = await method(*args, **kwargs)
+                cache.set(key, _freeze(result), epoch, ttl)
+                return result
+
+            return async_read
+
+        def read(*args: Any, **kwargs: Any) -> Any:
+            key = (name, *bound.args(service, name, args, kwargs))
+            value = cache.get(key)
+            if value is not _MISSING:
+                return _thaw(value)
+            epoch = cache.epoch
+            result = method(*args, **kwargs)
+            cache.set(key, _freeze(result), epoch, ttl)
+            return result
+
+        return read
+
+    def _batch_read(self, name: str, single: str, ttl: Optional[float]) -> Callable:
+        method = getattr(self._service, name)
+        cache = self.cache
+
+        def lookup(ids: Iterable[Hashable]) -> Tuple[Dict[Hashable, Any], list]:
+            found: Dict[Hashable, Any] = {}
+            missing = []
+            for identifier in dict.fromkeys(ids):
+                value = cache.get((single, identifier))
+                if value is _MISSING:
+                    missing.append(identifier)
+                elif value is not None:
+                    found[identifier] = value
+            return found, missing
+
+        def store(found: Dict[Hashable, Any], missing: list, loaded: Dict[Hashable, Any], epoch: int) -> None:
+            for identifier in missing:
+                value = loaded.get(identifier)
+                # Absent ids are cached as `None`, like the single read does.
+                cache.set((single, identifier), value, epoch, ttl)
+                if value is not None:
+                    found[identifier] = value
+
+        if inspect.iscoroutinefunction(method):
+
+            async def async_batch_read(ids: Iterable[Hashable]) -> Dict[Hashable, Any]:
+                found, missing = lookup(ids)
+                if missing:
+                    epoch = cache.epoch
+                    store(found, missing, await method(missing), epoch)
+                return found
+
+            return async_batch_read
+
+        def batch_read(ids: Iterable[Hashable]) -> Dict[Hashable, Any]:
+            found, missing = lookup(ids)
+            if missing:
+                epoch = cache.epoch
+                store(found, missing, method(missing), epoch)
+            return found
+
+        return batch_read
+
+    def _write(self, name: str, invalidates: Invalidates) -> Callable:
+        method = getattr(self._service, name)
+        cache = self.cache
+        bound = self._bound
+        service = self._service
+
+        def keys_for(before: Iterable[CacheKey], result: Any, args: tuple) -> Iterable[CacheKey]:
+            keys = list(before)
+            if invalidates.after is not None:
+                keys.extend(invalidates.after(result, *args))
+            return keys
+
+        if inspect.iscoroutinefunction(method):
+
+            async def async_write(*args: Any, **kwargs: Any) -> Any:
+                positional = bound.args(service, name, args, kwargs)
+                before = list(invalidates.before(service, *positional)) if invalidates.before else []
+                result = await method(*args, **kwargs)
+                cache.invalidate(keys_for(before, result, positional))
+                return result
+
+            return async_write
+
+        def write(*args: Any, **kwargs: Any) -> Any:
+            positional = bound.args(service, name, args, kwargs)
+            before = list(invalidates.before(service, *positional)) if invalidates.before else []
+            result = method(*args, **kwargs)
+            cache.invalidate(keys_for(before, result, positional))
+            return result
+
+        return write
+
+    def _clearing(self, name: str) -> Callable:
+        method = getattr(self._service, name)
+        cache = self.cache
+
+        def clearing(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return method(*args, **kwargs)
+            finally:
+                cache.clear()
+
+        return clearing
+
+
+_caches: Dict[str, List[LRUCache]] = {}
+
+
+def register_cache_metrics(caches: Iterable[LRUCache], empresa: str = "") -> None:
+    """
+    Expose `spa_cache_*{empresa, cache}` gauges read from each cache's stats
+    at scrape time. Each empresa registers its own caches.
+    """
+    _caches[empresa] = list(caches)
+    for attribute, documentation in (
+        ("size", "Entries held by each service cache."),
+        ("hits", "Service cache hits."),
+        ("misses", "Service cache misses."),
+        ("evictions", "Entries evicted to respect the cache size bound."),
+        ("expirations", "Entries dropped because their TTL elapsed."),
+        ("invalidations", "Entries dropped by writes."),
+    ):
+        metrics.register_collector(
+            f"spa_cache_{attribute}",
+            documentation,
+            ("empresa", "cache"),
+            lambda attribute=attribute: {
+                (tenant, cache.name): getattr(cache.stats(), attribute)
+                for tenant, caches in list(_caches.items())
+                for cache in caches
+            },
+        )
+
+
+__all__ = [
+    "CacheSpec",
+    "CacheStats",
+    "CachedService",
+    "Invalidates",
+    "LRUCache",
+    "register_cache_metrics",
+]
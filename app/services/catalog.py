@@ -0,0 +1,325 @@
+"""
+Service catalog and the (funcionario, servico) price matrix.
+
+`CatalogService` publishes the `servico` table together with the effective
+price, duration and commission of every service for every funcionario
+(their `funcionario_servico` override, else the service's base values; see
+`pricing.effective_price`) as an immutable `CatalogSnapshot`. Readers take
+the current snapshot without locking and get a consistent view of a single
+`versao`.
+
+The matrix is maintained from the funcionario and servico hooks: a changed
+`funcionario_servico` recomputes one cell, a created or updated service one
+column, a new funcionario one row, each published as a new snapshot (rows
+are copied on write, the rest is shared with the previous one). Mutations
+that bypass the hooks (`bulk_load`) are caught by comparing the services'
+revisions on read, which rebuilds the whole matrix.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from decimal import Decimal
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+from ..models.funcionarios import Funcionario, FuncionarioServico
+from ..models.servicos import (
+    MatrizPrecos,
+    Orcamento,
+    OrcamentoItem,
+    OrcamentoLinha,
+    PrecoProfissional,
+    Servico,
+    ServicoPublico,
+)
+from .hooks import FuncionarioHooks, ServicoHooks
+from .pricing import ServicePrice, effective_price
+
+ZERO = Decimal("0.00")
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    versao: int
+    funcionario_revision: int
+    servico_revision: int
+    servicos: Mapping[int, Servico] = field(default_factory=dict)
+    funcionarios: Mapping[int, Funcionario] = field(default_factory=dict)
+    # funcionario_id -> servico_id -> override / effective price
+    overrides: Mapping[int, Mapping[int, FuncionarioServico]] = field(default_factory=dict)
+    precos: Mapping[int, Mapping[int, ServicePrice]] = field(default_factory=dict)
+
+    def price(self, funcionario_id: int, servico_id: int) -> Optional[ServicePrice]:
+        return self.precos.get(funcionario_id, {}).get(servico_id)
+
+
+class CatalogService(FuncionarioHooks, ServicoHooks):
+    """Versioned snapshots of the service catalog and price matrix, and quotes."""
+
+    def __init__(self, funcionario_service: Any, servico_service: Any, client_service: Any, pacote_service: Any):
+        self._funcionario_service = funcionario_service
+        self._servico_service = servico_service
+        self._client_service = client_service
+        self._pacote_service = pacote_service
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = Lock()
+
+    # Snapshots
+
+    def snapshot(self) -> CatalogSnapshot:
+        """The current snapshot, rebuilt first if the stores changed behind the hooks."""
+        snapshot = self._snapshot
+        if (
+            snapshot is None
+            or snapshot.funcionario_revision != self._funcionario_service.revision
+            or snapshot.servico_revision != self._servico_service.revision
+        ):
+            with self._lock:
+                snapshot = self._rebuild()
+        return snapshot
+
+    def _rebuild(self) -> CatalogSnapshot:
+        # Called with the lock held.
+        funcionario_revision = self._funcionario_service.revision
+        servico_revision = self._servico_service.revision
+        current = self._snapshot
+        if (
+            current is not None
+            and current.funcionario_revision == funcionario_revision
+            and current.servico_revision == servico_revision
+        ):
+            return current
+        servicos = {servico.id: servico for servico in self._servico_service.list_servicos()}
+        funcionarios = {funcionario.id: funcionario for funcionario in self._funcionario_service.list_funcionarios()}
+        overrides: Dict[int, Dict[int, FuncionarioServico]] = {}
+        for assignment in self._funcionario_service.list_all_funcionario_servicos():
+            overrides.setdefault(assignment.funcionario_id, {})[assignment.servico_id] = assignment
+        precos = {
+            funcionario_id: self._row(funcionario_id, servicos, overrides.get(funcionario_id, {}))
+            for funcionario_id in funcionarios
+        }
+        self._snapshot = CatalogSnapshot(
+            versao=current.versao + 1 if current else 1,
+            funcionario_revision=funcionario_revision,
+            servico_revision=servico_revision,
+            servicos=servicos,
+            funcionarios=funcionarios,
+            overrides=overrides,
+            precos=precos,
+        )
+        return self._snapshot
+
+    @staticmethod
+    def _row(
+        funcionario_id: int,
+        servicos: Mapping[int, Servico],
+        overrides: Mapping[int, FuncionarioServico],
+    ) -> Dict[int, ServicePrice]:
+        return {
+            servico_id: effective_price(funcionario_id, servico, overrides.get(servico_id))
+            for servico_id, servico in servicos.items()
+        }
+
+    def _publish(self, **changes: Any) -> None:
+        # Called with the lock held, right after the mutation the hook reports.
+        self._snapshot = replace(
+            self._snapshot,
+            versao=self._snapshot.versao + 1,
+            funcionario_revision=self._funcionario_service.revision,
+            servico_revision=self._servico_service.revision,
+            **changes,
+        )
+
+    def _apply(self, update: Callable[[CatalogSnapshot], None]) -> None:
+        with self._lock:
+            current = self._snapshot
+            if current is None:
+                return
+            if (
+                current.funcionario_revision + current.servico_revision + 1
+                != self._funcionario_service.revision + self._servico_service.revision
+            ):
+                # Not the only change since the snapshot; the next read rebuilds it.
+                return
+            update(current)
+
+    # FuncionarioHooks / ServicoHooks
+
+    def funcionario_created(self, funcionario: Funcionario) -> None:
+        def update(current: CatalogSnapshot) -> None:
+            self._publish(
+                funcionarios={**current.funcionarios, funcionario.id: funcionario},
+                precos={**current.precos, funcionario.id: self._row(funcionario.id, current.servicos, {})},
+            )
+
+        self._apply(update)
+
+    def funcionario_updated(self, previous: Funcionario, updated: Funcionario) -> None:
+        def update(current: CatalogSnapshot) -> None:
+            self._publish(funcionarios={**current.funcionarios, updated.id: updated})
+
+        self._apply(update)
+
+    def funcionario_servico_changed(self, previous: Optional[FuncionarioServico], updated: FuncionarioServico) -> None:
+        funcionario_id, servico_id = updated.funcionario_id, updated.servico_id
+
+        def update(current: CatalogSnapshot) -> None:
+            changes: Dict[str, Any] = {
+                "overrides": {
+                    **current.overrides,
+                    funcionario_id: {**current.overrides.get(funcionario_id, {}), servico_id: updated},
+                }
+            }
+            servico = current.servicos.get(servico_id)
+            if servico is not None and funcionario_id in current.precos:
+                changes["precos"] = {
+                    **current.precos,
+                    funcionario_id: {
+                        **current.precos[funcionario_id],
+                        servico_id: effective_price(funcionario_id, servico, updated),
+                    },
+                }
+            self._publish(**changes)
+
+        self._apply(update)
+
+    def servico_created(self, servico: Servico) -> None:
+        self._servico_changed(servico)
+
+    def servico_updated(self, previous: Servico, updated: Servico) -> None:
+        self._servico_changed(updated)
+
+    def _servico_changed(self, servico: Servico) -> None:
+        def update(current: CatalogSnapshot) -> None:
+            self._publish(
+                servicos={**current.servicos, servico.id: servico},
+                precos={
+                    funcionario_id: {
+                        **row,
+                        servico.id: effective_price(
+                            funcionario_id, servico, current.overrides.get(funcionario_id, {}).get(servico.id)
+                        ),
+                    }
+                    for funcionario_id, row in current.precos.items()
+                },
+            )
+
+        self._apply(update)
+
+    # Queries
+
+    def list_public(self) -> List[ServicoPublico]:
+        """Active services, by name."""
+        servicos = self.snapshot().servicos.values()
+        return [
+            ServicoPublico(
+                id=servico.id,
+                name=servico.nome,
+                description=servico.descricao,
+                duration_minutes=servico.duracao_base_min,
+                price=float(servico.preco_base),
+            )
+            for servico in sorted(servicos, key=lambda servico: servico.nome)
+            if servico.ativo
+        ]
+
+    def matriz(self, funcionario_id: Optional[int] = None) -> MatrizPrecos:
+        """Prices of active funcionarios (or just `funcionario_id`) for every service."""
+        snapshot = self.snapshot()
+        if funcionario_id is not None:
+            funcionario_ids: Iterable[int] = [funcionario_id] if funcionario_id in snapshot.precos else []
+        else:
+            funcionario_ids = sorted(
+                identifier for identifier, funcionario in snapshot.funcionarios.items() if funcionario.ativo
+            )
+        return MatrizPrecos(
+            versao=snapshot.versao,
+            servicos=sorted(snapshot.servicos.values(), key=lambda servico: servico.id),
+            precos=[
+                PrecoProfissional(
+                    funcionario_id=price.funcionario_id,
+                    servico_id=price.servico_id,
+                    preco=price.preco,
+                    duracao_min=price.duracao_min,
+                    comissao_percentual=price.comissao_percentual,
+                    personalizado=price.servico_id in snapshot.overrides.get(identifier, {}),
+                )
+                for identifier in funcionario_ids
+                for _, price in sorted(snapshot.precos[identifier].items())
+            ],
+        )
+
+    async def quote(self, cliente_id: int, itens: List[OrcamentoItem]) -> Optional[Orcamento]:
+        """
+        Price a basket for a client against one snapshot. Items covered by
+        one of the client's packages (oldest first, one session each) cost
+        nothing, and the client's credit is deducted from the total. Returns
+        None for an unknown client and raises `ValueError` for an unknown or
+        inactive service or funcionario.
+        """
+        cliente = await self._client_service.get_client(cliente_id)
+        if cliente is None:
+            return None
+        snapshot = self.snapshot()
+        # servico_id -> [pacote_cliente_id, sessions left] in consumption order
+        sessoes: Dict[int, List[List[int]]] = {}
+        pacotes = sorted(
+            self._pacote_service.list_pacotes_cliente(cliente_id),
+            key=lambda pacote: (pacote.data_compra, pacote.id),
+        )
+        for pacote in pacotes:
+            if pacote.quantidade_disponivel > 0:
+                sessoes.setdefault(pacote.servico_id, []).append([pacote.id, pacote.quantidade_disponivel])
+
+        linhas: List[OrcamentoLinha] = []
+        for position, item in enumerate(itens, start=1):
+            servico = snapshot.servicos.get(item.servico_id)
+            if servico is None or not servico.ativo:
+                raise ValueError(f"Item {position}: service {item.servico_id} is not available")
+            if item.funcionario_id is None:
+                preco, duracao = servico.preco_base, servico.duracao_base_min
+            else:
+                funcionario = snapshot.funcionarios.get(item.funcionario_id)
+                price = snapshot.price(item.funcionario_id, item.servico_id)
+                if funcionario is None or not funcionario.ativo or price is None:
+                    raise ValueError(f"Item {position}: funcionario {item.funcionario_id} is not available")
+                preco, duracao = price.preco, price.duracao_min
+            pacote_cliente_id = None
+            disponiveis = sessoes.get(servico.id)
+            if disponiveis:
+                pacote_cliente_id = disponiveis[0][0]
+                disponiveis[0][1] -= 1
+                if not disponiveis[0][1]:
+                    disponiveis.pop(0)
+                preco = ZERO
+            linhas.append(
+                OrcamentoLinha(
+                    servico_id=servico.id,
+                    servico=servico.nome,
+                    funcionario_id=item.funcionario_id,
+                    preco=preco,
+                    duracao_min=duracao,
+                    pacote_cliente_id=pacote_cliente_id,
+                )
+            )
+
+        total = sum((linha.preco for linha in linhas), ZERO)
+        credito = max(cliente.saldo_credito or ZERO, ZERO)
+        return Orcamento(
+            versao=snapshot.versao,
+            cliente_id=cliente_id,
+            itens=linhas,
+            total=total,
+            duracao_total_min=sum(linha.duracao_min for linha in linhas),
+            credito_disponivel=credito,
+            total_a_pagar=max(total - credito, ZERO),
+        )
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        snapshot = self._snapshot
+        return {"catalogo_precos": sum(len(row) for row in snapshot.precos.values()) if snapshot else 0}
+
+
+__all__ = ["CatalogService", "CatalogSnapshot"]
@@ -1,10 +1,14 @@
 from abc import ABC, abstractmethod
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Dict, Iterable, Optional, Literal
+from typing import Any, Dict, Iterable, List, Optional, Literal, Sequence
 
 from ..models.clients import Cliente, ClienteCreate
 from ..models.endereco import ClienteEnderecosUpdate, Endereco
+from ..core.fieldsets import project
+from .caching import CacheSpec, Invalidates
+from .contacts import contact_keys
+from .hooks import ClientHooks
 
 
 class abc_ClientService(ABC):
@@ -16,6 +20,37 @@ class abc_ClientService(ABC):
     async def get_client(self, client_id: int) -> Optional[Cliente]:
         ...
 
+    @abstractmethod
+    async def get_clients(self, client_ids: Iterable[int]) -> Dict[int, Cliente]:
+        """Clients found among `client_ids`, keyed by id (missing ids are absent)."""
+        ...
+
+    @abstractmethod
+    async def list_client_enderecos(self, client_ids: Iterable[int]) -> Dict[int, List[Endereco]]:
+        """Addresses of each existing client among `client_ids`, keyed by client id."""
+        ...
+
+    @abstractmethod
+    async def project_clients(
+        self,
+        fields: Sequence[str],
+        client_ids: Optional[Iterable[int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Clients as dicts holding only `fields`: all of them ordered like
+        `list_clients`, or the existing ones among `client_ids` in that order.
+        Backends should select only the requested columns.
+        """
+        ...
+
+    @abstractmethod
+    async def find_clients_by_contact(self, contacts: Iterable[str]) -> Dict[str, int]:
+        """
+        Ids of the clients owning each of `contacts` (normalized e-mails and
+        phones, see `app.services.contacts`); contacts no client has are absent.
+        """
+        ...
+
     @abstractmethod
     async def create_client(self, request: ClienteCreate) -> Cliente:
         ...
@@ -37,6 +72,40 @@ class abc_ClientService(ABC):
     ) -> Optional[Cliente]:
         ...
 
+    @abstractmethod
+    async def merge_clients(self, client_id: int, duplicate_id: int) -> Optional[Cliente]:
+        """
+        Fold `duplicate_id` into `client_id` and delete it: its addresses
+        move to the client, credit balances are added up and fields the
+        client lacks are taken from the duplicate. Returns the updated
+        client, or None when either does not exist.
+        """
+        ...
+
+
+CLIENT_CACHE_SPEC = CacheSpec(
+    reads={"get_client": None, "list_clients": None},
+    batches={"get_clients": "get_client"},
+    writes={
+        "create_client": Invalidates(
+            after=lambda client, request: [("get_client", client.id), ("list_clients",)],
+        ),
+        # Addresses are not part of `Cliente`, so no cached read depends on them.
+        "update_client_addresses": Invalidates(),
+        "update_client_credit": Invalidates(
+            after=lambda client, client_id, *_: [("get_client", client_id), ("list_clients",)],
+        ),
+        "merge_clients": Invalidates(
+            after=lambda client, client_id, duplicate_id: [
+                ("get_client", client_id),
+                ("get_client", duplicate_id),
+                ("list_clients",),
+            ],
+        ),
+    },
+    clears=("bulk_load",),
+)
+
 
 class ClientService(abc_ClientService):
     async def list_clients(self) -> Iterable[Cliente]:
@@ -45,6 +114,22 @@ class ClientService(abc_ClientService):
     async def get_client(self, client_id: int) -> Optional[Cliente]:
         ...
 
+    async def get_clients(self, client_ids: Iterable[int]) -> Dict[int, Cliente]:
+        ...
+
+    async def list_client_enderecos(self, client_ids: Iterable[int]) -> Dict[int, List[Endereco]]:
+        ...
+
+    async def project_clients(
+        self,
+        fields: Sequence[str],
+        client_ids: Optional[Iterable[int]] = None,
+    ) -> List[Dict[str, Any]]:
+        ...
+
+    async def find_clients_by_contact(self, contacts: Iterable[str]) -> Dict[str, int]:
+        ...
+
     async def create_client(self, request: ClienteCreate) -> Cliente:
         ...
 
@@ -63,6 +148,9 @@ class ClientService(abc_ClientService):
     ) -> Optional[Cliente]:
         ...
 
+    async def merge_clients(self, client_id: int, duplicate_id: int) -> Optional[Cliente]:
+        ...
+
 
 class MockClientService(abc_ClientService):
     def __init__(self):
@@ -189,6 +277,18 @@ class MockClientService(abc_ClientService):
             for item in self._clients.values()
             for endereco in item["enderecos"]
         )
+        self._hooks: List[ClientHooks] = []
+        # Normalized e-mail/phone -> client id, for lead deduplication.
+        self._by_contact: Dict[str, int] = {}
+        for data in self._clients.values():
+            self._index_contacts(data["cliente"])
+
+    def _index_contacts(self, client: Cliente) -> None:
+        for key in contact_keys(client.email, client.telefone):
+            self._by_contact.setdefault(key, client.id)
+
+    def register_hook(self, hook: ClientHooks) -> None:
+        self._hooks.append(hook)
 
     async def list_clients(self) -> Iterable[Cliente]:
         return sorted(
@@ -202,6 +302,37 @@ class MockClientService(abc_ClientService):
             return None
         return data["cliente"]
 
+    async def get_clients(self, client_ids: Iterable[int]) -> Dict[int, Cliente]:
+        clients: Dict[int, Cliente] = {}
+        for client_id in client_ids:
+            data = self._clients.get(client_id)
+            if data:
+                clients[client_id] = data["cliente"]
+        return clients
+
+    async def list_client_enderecos(self, client_ids: Iterable[int]) -> Dict[int, List[Endereco]]:
+        enderecos: Dict[int, List[Endereco]] = {}
+        for client_id in client_ids:
+            data = self._clients.get(client_id)
+            if data:
+                enderecos[client_id] = list(data["enderecos"])
+        return enderecos
+
+    async def project_clients(
+        self,
+        fields: Sequence[str],
+        client_ids: Optional[Iterable[int]] = None,
+    ) -> List[Dict[str, Any]]:
+        if client_ids is None:
+            clients = await self.list_clients()
+        else:
+            clients = [data["cliente"] for data in map(self._clients.get, client_ids) if data]
+        return project(clients, tuple(fields))
+
+    async def find_clients_by_contact(self, contacts: Iterable[str]) -> Dict[str, int]:
+        by_contact = self._by_contact
+        return {contact: by_contact[contact] for contact in contacts if contact in by_contact}
+
     async def create_client(self, request: ClienteCreate) -> Cliente:
         self._sequence += 1
         now = datetime.utcnow()
@@ -215,8 +346,29 @@ class MockClientService(abc_ClientService):
             "cliente": client,
             "enderecos": [],
         }
+        self._index_contacts(client)
+        for hook in self._hooks:
+            hook.client_created(client)
         return client
 
+    def bulk_load(self, clients: Iterable[Cliente], enderecos: Iterable[Endereco] = ()) -> int:
+        """
+        Load already-built clients and addresses (fixtures, synthetic data)
+        keeping their ids. Hooks are not called. Returns the number of clients loaded.
+        """
+        loaded = 0
+        for client in clients:
+            self._clients[client.id] = {"cliente": client, "enderecos": []}
+            self._index_contacts(client)
+            loaded += 1
+        for endereco in enderecos:
+            data = self._clients.get(endereco.cliente_id)
+            if data is not None:
+                data["enderecos"].append(endereco)
+                self._endereco_sequence = max(self._endereco_sequence, endereco.id)
+        self._sequence = max(self._clients.keys(), default=0)
+        return loaded
+
     async def update_client_addresses(
         self,
         client_id: int,
@@ -226,7 +378,7 @@ class MockClientService(abc_ClientService):
         if not data:
             return []
 
-        enderecos = data["enderecos"]
+        enderecos = list(data["enderecos"])
         now = datetime.utcnow()
 
         def upsert(tipo: str, fields_attr: str) -> None:
@@ -274,7 +426,11 @@ class MockClientService(abc_ClientService):
         upsert("COMERCIAL", "comercial")
         upsert("OUTRO", "outro")
 
+        previous = data["enderecos"]
         data["enderecos"] = enderecos
+        if enderecos != previous:
+            for hook in self._hooks:
+                hook.client_addresses_updated(client_id, previous, enderecos)
         return enderecos
 
     async def update_client_credit(
@@ -314,4 +470,47 @@ class MockClientService(abc_ClientService):
         )
         data["cliente"] = updated
         self._clients[client_id] = data
+        for hook in self._hooks:
+            hook.client_credit_changed(client, updated)
+        return updated
+
+    async def merge_clients(self, client_id: int, duplicate_id: int) -> Optional[Cliente]:
+        if client_id == duplicate_id:
+            raise ValueError("A client cannot be merged into itself")
+        data = self._clients.get(client_id)
+        duplicate_data = self._clients.get(duplicate_id)
+        if not data or not duplicate_data:
+            return None
+
+        client: Cliente = data["cliente"]
+        duplicate: Cliente = duplicate_data["cliente"]
+        update: Dict[str, Any] = {
+            name: getattr(duplicate, name)
+            for name in ("sexo", "data_nascimento", "como_conheceu_id", "telefone", "email", "observacoes")
+            if getattr(client, name) is None
+        }
+        if client.observacoes and duplicate.observacoes and client.observacoes != duplicate.observacoes:
+            update["observacoes"] = f"{client.observacoes}\n{duplicate.observacoes}"
+        if duplicate.saldo_credito is not None:
+            update["saldo_credito"] = ((client.saldo_credito or Decimal("0.00")) + duplicate.saldo_credito).quantize(
+                Decimal("0.01")
+            )
+        update["updated_at"] = datetime.utcnow()
+        updated = client.model_copy(update=update)
+
+        data["cliente"] = updated
+        data["enderecos"] = data["enderecos"] + [
+            endereco.model_copy(update={"cliente_id": client_id}) for endereco in duplicate_data["enderecos"]
+        ]
+        del self._clients[duplicate_id]
+        for key in contact_keys(duplicate.email, duplicate.telefone):
+            if self._by_contact.get(key) == duplicate_id:
+                self._by_contact[key] = client_id
+        self._index_contacts(updated)
+        for hook in self._hooks:
+            hook.client_merged(client, updated, duplicate)
         return updated
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        return {"clients": len(self._clients)}
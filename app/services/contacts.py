@@ -0,0 +1,42 @@
+"""
+Contact normalization shared by client and lead deduplication.
+
+E-mails compare case-insensitively without surrounding spaces; phone
+numbers compare by their digits only ("(11) 5555-0001" == "11 55550001").
+Normalized e-mails always contain "@" and phones never do, so both kinds
+of key can share one index. Names compare accent-folded and lowercased
+("Célia" == "celia").
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from typing import List, Optional
+
+
+def fold_text(value: str) -> str:
+    """Lowercase `value` and strip accents and surrounding spaces."""
+    decomposed = unicodedata.normalize("NFKD", value.strip().lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def normalize_email(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    value = value.strip().lower()
+    return value if "@" in value else None
+
+
+def normalize_telefone(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    digits = "".join(char for char in value if char.isdigit())
+    return digits or None
+
+
+def contact_keys(email: Optional[str], telefone: Optional[str]) -> List[str]:
+    """Normalized e-mail and phone of a record, whichever are present."""
+    return [key for key in (normalize_email(email), normalize_telefone(telefone)) if key]
+
+
+__all__ = ["contact_keys", "fold_text", "normalize_email", "normalize_telefone"]
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from threading import Lock
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from ..models.appointments import CANCELED_STATUSES, NO_SHOW_STATUSES, Appointment, AppointmentStatus
+from ..models.clients import Cliente
+from ..models.dashboard import DashboardDrift, DashboardStaffBucket, DashboardSummary
+from .appointments import InMemoryAppointmentService
+from .clients import abc_ClientService
+from .hooks import AppointmentHooks, ClientHooks
+from .pricing import ServicePriceResolver
+
+ZERO = Decimal("0.00")
+
+
+@dataclass
+class _Counters:
+    # day -> (staff_member, status) -> count
+    appointments: Dict[date, Dict[Tuple[str, AppointmentStatus], int]] = field(
+        default_factory=lambda: defaultdict(lambda: defaultdict(int))
+    )
+    # day -> staff_member -> revenue of completed appointments (PACOTE
+    # sessions are not revenue: the package was paid when it was sold)
+    revenue: Dict[date, Dict[str, Decimal]] = field(
+        default_factory=lambda: defaultdict(lambda: defaultdict(lambda: ZERO))
+    )
+    # appointment id -> (day, staff_member, value) booked as revenue
+    revenue_lines: Dict[int, Tuple[date, str, Decimal]] = field(default_factory=dict)
+    clients: int = 0
+    credit: Decimal = ZERO
+
+
+class DashboardCounters(AppointmentHooks, ClientHooks):
+    """
+    Materialized dashboard counters bucketed by day, staff and status.
+
+    Registered as a hook on the appointment and client services so each write
+    updates the counters in O(1). `rebuild` recomputes everything from the
+    stores and reports any drift against the incremental values. Revenue is
+    booked at the price in effect when the appointment completed, so a later
+    price change is not reported as drift.
+    """
+
+    def __init__(
+        self,
+        appointment_service: InMemoryAppointmentService,
+        client_service: abc_ClientService,
+        resolver: ServicePriceResolver,
+    ):
+        self._appointment_service = appointment_service
+        self._client_service = client_service
+        self._resolver = resolver
+        self._counters = _Counters()
+        self._lock = Lock()
+
+    # Hooks
+
+    def appointment_created(self, appointment: Appointment) -> None:
+        with self._lock:
+            self._add_appointment(self._counters, appointment)
+
+    def appointment_status_changed(self, previous: Appointment, updated: Appointment) -> None:
+        with self._lock:
+            self._remove_appointment(self._counters, previous)
+            self._add_appointment(self._counters, updated)
+
+    def appointments_status_changed(self, changes: List[Tuple[Appointment, Appointment]]) -> None:
+        with self._lock:
+            for previous, updated in changes:
+                self._remove_appointment(self._counters, previous)
+                self._add_appointment(self._counters, updated)
+
+    def appointment_updated(self, previous: Appointment, updated: Appointment) -> None:
+        self.appointment_status_changed(previous, updated)
+
+    def client_created(self, client: Cliente) -> None:
+        with self._lock:
+            self._counters.clients += 1
+            self._counters.credit += client.saldo_credito or ZERO
+
+    def client_credit_changed(self, previous: Cliente, updated: Cliente) -> None:
+        with self._lock:
+            self._counters.credit += (updated.saldo_credito or ZERO) - (previous.saldo_credito or ZERO)
+
+    def client_merged(self, previous: Cliente, updated: Cliente, duplicate: Cliente) -> None:
+        # The duplicate's credit moved to the client, so the total is unchanged.
+        with self._lock:
+            self._counters.clients -= 1
+
+    # Reads
+
+    def summary(self, dia: date) -> DashboardSummary:
+        with self._lock:
+            counts = dict(self._counters.appointments.get(dia, {}))
+            revenue = dict(self._counters.revenue.get(dia, {}))
+            clients = self._counters.clients
+            credit = self._counters.credit
+
+        buckets: Dict[str, DashboardStaffBucket] = {}
+        for (staff_member, status), value in counts.items():
+            if not value:
+                continue
+            bucket = buckets.setdefault(staff_member, DashboardStaffBucket(staff_member=staff_member))
+            bucket.agendamentos[status] = value
+        for staff_member, value in revenue.items():
+            if not value:
+                continue
+            bucket = buckets.setdefault(staff_member, DashboardStaffBucket(staff_member=staff_member))
+            bucket.receita = value
+
+        return DashboardSummary(
+            dia=dia,
+            agendamentos=sum(counts.values()),
+            cancelamentos=sum(v for (_, s), v in counts.items() if s in CANCELED_STATUSES),
+            nao_comparecimentos=sum(v for (_, s), v in counts.items() if s in NO_SHOW_STATUSES),
+            concluidos=sum(v for (_, s), v in counts.items() if s == AppointmentStatus.completed),
+            receita=sum(revenue.values(), ZERO),
+            clientes=clients,
+            credito_em_aberto=credit,
+            por_profissional=sorted(buckets.values(), key=lambda b: b.staff_member),
+        )
+
+    # Rebuild
+
+    async def rebuild(self) -> DashboardDrift:
+        """Recompute every counter from the stores and swap them in, reporting drift."""
+        clients = list(await self._client_service.list_clients())
+
+        with self._lock:
+            fresh = _Counters()
+            for appointment in self._appointment_service.list_appointments():
+                self._add_appointment(fresh, appointment, self._counters.revenue_lines)
+            for client in clients:
+                fresh.clients += 1
+                fresh.credit += client.saldo_credito or ZERO
+
+            divergencias = self._diff(self._counters, fresh)
+            self._counters = fresh
+        return DashboardDrift(consistente=not divergencias, divergencias=divergencias)
+
+    @staticmethod
+    def _diff(current: _Counters, fresh: _Counters) -> List[str]:
+        divergencias: List[str] = []
+        for dia in set(current.appointments) | set(fresh.appointments):
+            before = current.appointments.get(dia, {})
+            after = fresh.appointments.get(dia, {})
+            for key in set(before) | set(after):
+                if before.get(key, 0) != after.get(key, 0):
+                    staff_member, status = key
+                    divergencias.append(
+                        f"agendamentos {dia} {staff_member} {status.value}: "
+                        f"{before.get(key, 0)} != {after.get(key, 0)}"
+                    )
+        for dia in set(current.revenue) | set(fresh.revenue):
+            before = current.revenue.get(dia, {})
+            after = fresh.revenue.get(dia, {})
+            for staff_member in set(before) | set(after):
+                if before.get(staff_member, ZERO) != after.get(staff_member, ZERO):
+                    divergencias.append(
+                        f"receita {dia} {staff_member}: "
+                        f"{before.get(staff_member, ZERO)} != {after.get(staff_member, ZERO)}"
+                    )
+        if current.clients != fresh.clients:
+            divergencias.append(f"clientes: {current.clients} != {fresh.clients}")
+        if current.credit != fresh.credit:
+            divergencias.append(f"credito_em_aberto: {current.credit} != {fresh.credit}")
+        return sorted(divergencias)
+
+    # Helpers (callers hold the lock)
+
+    def _add_appointment(
+        self,
+        counters: _Counters,
+        appointment: Appointment,
+        recorded: Optional[Mapping[int, Tuple[date, str, Decimal]]] = None,
+    ) -> None:
+        dia = appointment.start_time.date()
+        counters.appointments[dia][(appointment.staff_member, appointment.status)] += 1
+        if appointment.status == AppointmentStatus.completed and appointment.tipo != "PACOTE":
+            line = recorded.get(appointment.id) if recorded else None
+            if line:
+                # Keep the value booked at completion.
+                value = line[2]
+            else:
+                price = self._resolver.resolve_appointment(appointment)
+                value = price.preco if price else ZERO
+            counters.revenue[dia][appointment.staff_member] += value
+            counters.revenue_lines[appointment.id] = (dia, appointment.staff_member, value)
+
+    @staticmethod
+    def _remove_appointment(counters: _Counters, appointment: Appointment) -> None:
+        dia = appointment.start_time.date()
+        counters.appointments[dia][(appointment.staff_member, appointment.status)] -= 1
+        line = counters.revenue_lines.pop(appointment.id, None)
+        if line:
+            line_day, staff_member, value = line
+            counters.revenue[line_day][staff_member] -= value
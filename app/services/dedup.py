@@ -0,0 +1,388 @@
+"""
+Client deduplication and merges.
+
+Comparing every pair of clients is quadratic, so `ClientDedupService` only
+compares clients that share a blocking key:
+
+- `tel:` the last 8 digits of the phone,
+- `email:` the local part of the e-mail, without dots or `+tag`,
+- `nome:` each accent-folded token of the name with 3+ letters.
+
+Blocks larger than `DEDUP_MAX_BLOCK_SIZE` (common first names, shared
+mailboxes like `contato@`) are not compared: real duplicates nearly always
+share a smaller block too. Each pair is scored once, from 0 to 1, on phone,
+e-mail, name similarity and birth date; pairs scoring `DEDUP_MIN_SCORE` or
+more are candidates for review (`GET /clients/duplicados`) until merged or
+dismissed.
+
+The index is kept in two modes. As a client hook it scores each new client
+against its blocks when the client is created (incremental), and `scan()`
+rebuilds index and candidates from every client (full batch: nightly, and
+`POST /clients/duplicados/varredura` after bulk loads). Scans run off the
+event loop; clients created or merged meanwhile are replayed onto the
+result.
+
+`merge()` folds a duplicate into the client to keep: the client service
+moves addresses and credit and deletes the duplicate, then appointments,
+packages, recurrence rules and subscriptions move over. Routes and jobs
+run on the event loop and these steps never yield to it, so no request
+sees a half-merged client.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from difflib import SequenceMatcher
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..models.clients import Cliente, ClienteDuplicado, ClienteMesclado, VarreduraDuplicados
+from .appointments import InMemoryAppointmentService
+from .contacts import fold_text, normalize_email, normalize_telefone
+from .financeiro import MockFinanceiroService
+from .hooks import ClientHooks
+from .pacotes import MockPacoteService
+from .recorrencia import RecurringAppointmentService
+
+# Local numbers without country/area code still match.
+PHONE_DIGITS = 8
+MIN_PHONE_DIGITS = 7
+MIN_NAME_TOKEN = 3
+NAME_STOPWORDS = frozenset({"das", "dos"})
+
+# Score weights. Matching contacts alone are not enough (families share
+# phones and e-mails), and neither is a name alone (homonyms).
+PHONE_WEIGHT = 0.4
+EMAIL_WEIGHT = 0.4
+EMAIL_USER_WEIGHT = 0.2
+NAME_WEIGHT = 0.5
+SAME_BIRTH_DATE = 0.15
+OTHER_BIRTH_DATE = -0.3
+# Name similarity from which `nome` is reported as a reason.
+NAME_MATCH = 0.8
+
+Pair = Tuple[int, int]
+
+
+class ScanInProgress(RuntimeError):
+    """A full scan is already running for this empresa."""
+
+
+@dataclass(frozen=True)
+class _Profile:
+    """The normalized fields of a client that matching looks at."""
+
+    id: int
+    nome: str
+    telefone: Optional[str]
+    email: Optional[str]
+    email_usuario: Optional[str]
+    data_nascimento: Optional[date]
+
+    @classmethod
+    def of(cls, client: Cliente) -> "_Profile":
+        telefone = normalize_telefone(client.telefone)
+        email = normalize_email(client.email)
+        usuario = email.split("@", 1)[0].split("+", 1)[0].replace(".", "") if email else None
+        return cls(
+            id=client.id,
+            nome=" ".join(fold_text(client.nome).split()),
+            telefone=telefone[-PHONE_DIGITS:] if telefone and len(telefone) >= MIN_PHONE_DIGITS else None,
+            email=email,
+            email_usuario=usuario or None,
+            data_nascimento=client.data_nascimento,
+        )
+
+    def keys(self) -> List[str]:
+        keys = []
+        if self.telefone:
+            keys.append(f"tel:{self.telefone}")
+        if self.email_usuario:
+            keys.append(f"email:{self.email_usuario}")
+        keys.extend(
+            f"nome:{token}"
+            for token in dict.fromkeys(self.nome.split())
+            if len(token) >= MIN_NAME_TOKEN and token not in NAME_STOPWORDS
+        )
+        return keys
+
+
+def _score(a: _Profile, b: _Profile, min_score: float) -> Optional[Tuple[float, List[str]]]:
+    """Score and reasons of a pair, or None when it scores below `min_score`."""
+    score = 0.0
+    motivos: List[str] = []
+    if a.telefone and a.telefone == b.telefone:
+        score += PHONE_WEIGHT
+        motivos.append("telefone")
+    if a.email and a.email == b.email:
+        score += EMAIL_WEIGHT
+        motivos.append("email")
+    elif a.email_usuario and a.email_usuario == b.email_usuario:
+        score += EMAIL_USER_WEIGHT
+        motivos.append("email_usuario")
+    if a.data_nascimento and b.data_nascimento:
+        if a.data_nascimento == b.data_nascimento:
+            score += SAME_BIRTH_DATE
+            motivos.append("data_nascimento")
+        else:
+            score += OTHER_BIRTH_DATE
+    # Name similarity is the expensive part; skip it when even identical
+    # names could not reach the threshold.
+    if score + NAME_WEIGHT < min_score:
+        return None
+    similarity = SequenceMatcher(None, a.nome, b.nome).ratio()
+    score += NAME_WEIGHT * similarity
+    if score < min_score:
+        return None
+    if similarity >= NAME_MATCH:
+        motivos.insert(0, "nome")
+    return min(score, 1.0), motivos
+
+
+class _Index:
+    """Profiles, blocks and candidate pairs; callers serialize access."""
+
+    def __init__(self, min_score: float, max_block_size: int, dismissed: Set[Pair]):
+        self.min_score = min_score
+        self.max_block_size = max_block_size
+        self.dismissed = dismissed
+        self.profiles: Dict[int, _Profile] = {}
+        self.blocks: Dict[str, Set[int]] = defaultdict(set)
+        self.candidates: Dict[Pair, ClienteDuplicado] = {}
+        # client id -> candidate pairs it belongs to
+        self.pairs_of: Dict[int, Set[Pair]] = defaultdict(set)
+        self.pairs_scored = 0
+
+    def add(self, profile: _Profile) -> None:
+        """Index `profile` (replacing the client's previous one) and score it against its blocks."""
+        self.remove(profile.id)
+        self.profiles[profile.id] = profile
+        others: Set[int] = set()
+        for key in profile.keys():
+            block = self.blocks[key]
+            if len(block) < self.max_block_size:
+                others.update(block)
+            block.add(profile.id)
+        for other_id in others:
+            self.compare(self.profiles[other_id], profile)
+
+    def remove(self, client_id: int) -> None:
+        profile = self.profiles.pop(client_id, None)
+        if profile is None:
+            return
+        for key in profile.keys():
+            block = self.blocks.get(key)
+            if block is not None:
+                block.discard(client_id)
+                if not block:
+                    del self.blocks[key]
+        for pair in self.pairs_of.pop(client_id, ()):
+            self.candidates.pop(pair, None)
+            other = pair[1] if pair[0] == client_id else pair[0]
+            self.pairs_of[other].discard(pair)
+
+    def compare(self, a: _Profile, b: _Profile) -> None:
+        pair = (a.id, b.id) if a.id < b.id else (b.id, a.id)
+        if pair in self.dismissed:
+            return
+        self.pairs_scored += 1
+        result = _score(a, b, self.min_score)
+        if result is None:
+            return
+        score, motivos = result
+        self.candidates[pair] = ClienteDuplicado(
+            cliente_id=pair[0],
+            duplicado_id=pair[1],
+            score=round(score, 3),
+            motivos=motivos,
+        )
+        self.pairs_of[pair[0]].add(pair)
+        self.pairs_of[pair[1]].add(pair)
+
+    def discard_pair(self, pair: Pair) -> bool:
+        if self.candidates.pop(pair, None) is None:
+            return False
+        self.pairs_of[pair[0]].discard(pair)
+        self.pairs_of[pair[1]].discard(pair)
+        return True
+
+
+def _build_index(
+    clients: Iterable[Cliente],
+    min_score: float,
+    max_block_size: int,
+    dismissed: Set[Pair],
+) -> Tuple[_Index, VarreduraDuplicados]:
+    start = time.perf_counter()
+    index = _Index(min_score, max_block_size, dismissed)
+    for client in clients:
+        profile = _Profile.of(client)
+        index.profiles[profile.id] = profile
+        for key in profile.keys():
+            index.blocks[key].add(profile.id)
+
+    ignored = 0
+    seen: Set[Pair] = set()
+    profiles = index.profiles
+    for block in index.blocks.values():
+        if len(block) > max_block_size:
+            ignored += 1
+            continue
+        if len(block) < 2:
+            continue
+        members = sorted(block)
+        for position, first in enumerate(members):
+            for second in members[position + 1 :]:
+                if (first, second) not in seen:
+                    seen.add((first, second))
+                    index.compare(profiles[first], profiles[second])
+
+    return index, VarreduraDuplicados(
+        clientes=len(profiles),
+        blocos=len(index.blocks),
+        blocos_ignorados=ignored,
+        pares_avaliados=index.pairs_scored,
+        candidatos=len(index.candidates),
+        duracao_segundos=round(time.perf_counter() - start, 3),
+    )
+
+
+class ClientDedupService(ClientHooks):
+    """Duplicate candidates of one empresa's clients, and client merges."""
+
+    def __init__(
+        self,
+        client_service: Any,
+        appointment_service: InMemoryAppointmentService,
+        pacote_service: MockPacoteService,
+        recurring_service: RecurringAppointmentService,
+        financeiro_service: MockFinanceiroService,
+        *,
+        min_score: float = 0.6,
+        max_block_size: int = 200,
+    ):
+        self._client_service = client_service
+        self._appointment_service = appointment_service
+        self._pacote_service = pacote_service
+        self._recurring_service = recurring_service
+        self._financeiro_service = financeiro_service
+        self.min_score = min_score
+        self.max_block_size = max_block_size
+        # Pairs reviewed as different people; never suggested again.
+        self._dismissed: Set[Pair] = set()
+        self._index = _Index(min_score, max_block_size, self._dismissed)
+        # Changes (and dismissals) made while a scan runs, replayed onto its index.
+        self._pending: Optional[List[Tuple[str, Any]]] = None
+        self._lock = Lock()
+
+    # Client hooks (incremental mode)
+
+    def client_created(self, client: Cliente) -> None:
+        self._apply("add", _Profile.of(client))
+
+    def client_merged(self, previous: Cliente, updated: Cliente, duplicate: Cliente) -> None:
+        self._apply("remove", duplicate.id)
+        self._apply("add", _Profile.of(updated))
+
+    def _apply(self, operation: str, value: Any) -> None:
+        with self._lock:
+            self._replay(self._index, operation, value)
+            if self._pending is not None:
+                self._pending.append((operation, value))
+
+    @staticmethod
+    def _replay(index: _Index, operation: str, value: Any) -> None:
+        if operation == "add":
+            index.add(value)
+        elif operation == "dismiss":
+            index.discard_pair(value)
+        else:
+            index.remove(value)
+
+    # Full mode
+
+    async def scan(self) -> VarreduraDuplicados:
+        """Rebuild the index and candidates from every client, in a worker thread."""
+        with self._lock:
+            if self._pending is not None:
+                raise ScanInProgress("A duplicate scan is already running")
+            self._pending = []
+        try:
+            clients = list(await self._client_service.list_clients())
+            index, resultado = await asyncio.to_thread(
+                _build_index, clients, self.min_score, self.max_block_size, self._dismissed
+            )
+            with self._lock:
+                for operation, value in self._pending:
+                    self._replay(index, operation, value)
+                self._index = index
+                resultado.candidatos = len(index.candidates)
+        finally:
+            with self._lock:
+                self._pending = None
+        return resultado
+
+    # Review
+
+    def list_candidates(
+        self,
+        min_score: Optional[float] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> List[ClienteDuplicado]:
+        """Candidate pairs, highest score first."""
+        threshold = self.min_score if min_score is None else min_score
+        with self._lock:
+            candidates = [candidate for candidate in self._index.candidates.values() if candidate.score >= threshold]
+        candidates.sort(key=lambda candidate: (-candidate.score, candidate.cliente_id, candidate.duplicado_id))
+        return candidates[offset : offset + limit]
+
+    def dismiss(self, cliente_id: int, duplicado_id: int) -> bool:
+        """Mark a pair as different people. False when it was not a candidate."""
+        pair = (cliente_id, duplicado_id) if cliente_id < duplicado_id else (duplicado_id, cliente_id)
+        with self._lock:
+            self._dismissed.add(pair)
+            # A running scan may have scored the pair before it was dismissed.
+            if self._pending is not None:
+                self._pending.append(("dismiss", pair))
+            return self._index.discard_pair(pair)
+
+    # Merges
+
+    async def merge(self, cliente_id: int, duplicado_id: int) -> Optional[ClienteMesclado]:
+        """
+        Fold `duplicado_id` into `cliente_id` and delete it. Returns None
+        when either client does not exist; raises `ValueError` when both
+        ids are the same.
+        """
+        if cliente_id == duplicado_id:
+            raise ValueError("A client cannot be merged into itself")
+        enderecos = (await self._client_service.list_client_enderecos([duplicado_id])).get(duplicado_id, [])
+        cliente = await self._client_service.merge_clients(cliente_id, duplicado_id)
+        if cliente is None:
+            return None
+        return ClienteMesclado(
+            cliente=cliente,
+            duplicado_id=duplicado_id,
+            enderecos=len(enderecos),
+            agendamentos=len(self._appointment_service.reassign_client(duplicado_id, cliente_id)),
+            pacotes=len(self._pacote_service.reassign_cliente(duplicado_id, cliente_id)),
+            recorrencias=len(self._recurring_service.reassign_cliente(duplicado_id, cliente_id)),
+            assinaturas=len(self._financeiro_service.reassign_cliente(duplicado_id, cliente_id)),
+        )
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        with self._lock:
+            return {
+                "dedup_profiles": len(self._index.profiles),
+                "dedup_blocks": len(self._index.blocks),
+                "dedup_candidates": len(self._index.candidates),
+            }
+
+
+__all__ = ["ClientDedupService", "ScanInProgress"]
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import date
+from threading import Lock
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from ..models.appointments import Appointment
+from ..models.clients import Cliente
+from ..models.endereco import Endereco
+from ..models.events import AgendaEvent
+from .hooks import AppointmentHooks, ClientHooks
+
+STREAM_RESET = "stream.reset"
+STREAM_OVERFLOW = "stream.overflow"
+
+
+@dataclass(frozen=True)
+class EventFilter:
+    """Subscriber filter; `None` fields match everything."""
+
+    staff_member: Optional[str] = None
+    dia: Optional[date] = None
+
+    def matches(self, event: AgendaEvent) -> bool:
+        if self.staff_member is not None and event.staff_member != self.staff_member:
+            return False
+        if self.dia is not None and event.dia != self.dia:
+            return False
+        return True
+
+
+class SubscriptionClosed(Exception):
+    """Raised when a subscription was dropped for falling behind."""
+
+
+class Subscription:
+    """
+    Bounded per-subscriber queue. A consumer that lets the queue fill up is
+    disconnected rather than slowing down publishers; it can reconnect with
+    the last event id it processed and resume from the bus history.
+    """
+
+    def __init__(self, bus: "EventBus", event_filter: EventFilter, maxsize: int):
+        self.filter = event_filter
+        self._bus = bus
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._loop = asyncio.get_running_loop()
+        self.closed = False
+
+    def _offer(self, event: AgendaEvent) -> None:
+        if self.closed:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.closed = True
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+
+    def deliver(self, event: AgendaEvent) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._offer(event)
+        else:
+            self._loop.call_soon_threadsafe(self._offer, event)
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[AgendaEvent]:
+        """Next event, or `None` on timeout. Raises `SubscriptionClosed` on overflow."""
+        try:
+            event = await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if event is None:
+            raise SubscriptionClosed()
+        return event
+
+    def close(self) -> None:
+        self.closed = True
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    In-process publish/subscribe bus for agenda and client changes.
+
+    Keeps a bounded history so reconnecting subscribers can resume from a
+    `Last-Event-ID`; if the requested id already fell out of the history the
+    subscriber receives a `stream.reset` event and should refetch full lists.
+
+    Ids continue from a per-process epoch (the start time in milliseconds,
+    times 1000) rather than from 1, so an id handed out before a restart is
+    older than anything this bus has and also gets a `stream.reset`.
+    """
+
+    def __init__(self, history_size: int = 1000, queue_size: int = 100, *, epoch: Optional[int] = None):
+        self._history: Deque[AgendaEvent] = deque(maxlen=history_size)
+        self._queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+        self._sequence = time.time_ns() // 1_000_000 * 1000 if epoch is None else epoch
+        self._lock = Lock()
+
+    @property
+    def last_event_id(self) -> int:
+        return self._sequence
+
+    def publish(
+        self,
+        type: str,
+        data: Dict[str, Any],
+        *,
+        staff_member: Optional[str] = None,
+        dia: Optional[date] = None,
+    ) -> AgendaEvent:
+        with self._lock:
+            self._sequence += 1
+            event = AgendaEvent(id=self._sequence, type=type, staff_member=staff_member, dia=dia, data=data)
+            self._history.append(event)
+            subscribers = [s for s in self._subscribers if s.filter.matches(event)]
+        for subscriber in subscribers:
+            subscriber.deliver(event)
+        return event
+
+    def subscribe(self, event_filter: EventFilter, last_event_id: Optional[int] = None) -> Subscription:
+        subscription = Subscription(self, event_filter, self._queue_size)
+        with self._lock:
+            # Replay and registration happen under the lock so no event is missed in between.
+            if last_event_id is not None:
+                self._replay(subscription, last_event_id)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _replay(self, subscription: Subscription, last_event_id: int) -> None:
+        oldest = self._history[0].id if self._history else self._sequence + 1
+        missed = [e for e in self._history if e.id > last_event_id and subscription.filter.matches(e)]
+        # An id ahead of the sequence was not issued by this bus (clock moved back).
+        if last_event_id + 1 < oldest or last_event_id > self._sequence or len(missed) >= self._queue_size:
+            subscription._offer(AgendaEvent(id=self._sequence, type=STREAM_RESET))
+            return
+        for event in missed:
+            subscription._offer(event)
+
+
+class EventBusHooks(AppointmentHooks, ClientHooks):
+    """Publishes appointment and client mutations to an `EventBus`."""
+
+    def __init__(self, bus: EventBus):
+        self._bus = bus
+
+    def _publish_appointment(self, type: str, appointment: Appointment, **extra: Any) -> None:
+        self._bus.publish(
+            type,
+            {"appointment": appointment.model_dump(mode="json"), **extra},
+            staff_member=appointment.staff_member,
+            dia=appointment.start_time.date(),
+        )
+
+    def appointment_created(self, appointment: Appointment) -> None:
+        self._publish_appointment("appointment.created", appointment)
+
+    def appointment_status_changed(self, previous: Appointment, updated: Appointment) -> None:
+        self._publish_appointment(
+            "appointment.status_changed",
+            updated,
+            previous_status=previous.status.value,
+        )
+
+    def appointment_updated(self, previous: Appointment, updated: Appointment) -> None:
+        self._publish_appointment("appointment.updated", updated)
+        if (previous.staff_member, previous.start_time.date()) != (updated.staff_member, updated.start_time.date()):
+            # Let subscribers filtered on the old staff/day drop the entry.
+            self._publish_appointment("appointment.moved_out", previous)
+
+    def client_created(self, client: Cliente) -> None:
+        self._bus.publish("client.created", {"client": client.model_dump(mode="json")})
+
+    def client_credit_changed(self, previous: Cliente, updated: Cliente) -> None:
+        self._bus.publish(
+            "client.credit_changed",
+            {
+                "client_id": updated.id,
+                "saldo_credito": str(updated.saldo_credito),
+                "previous_saldo_credito": str(previous.saldo_credito),
+            },
+        )
+
+    def client_merged(self, previous: Cliente, updated: Cliente, duplicate: Cliente) -> None:
+        self._bus.publish(
+            "client.merged",
+            {"client": updated.model_dump(mode="json"), "duplicate_id": duplicate.id},
+        )
+
+    def client_addresses_updated(self, client_id: int, previous: List[Endereco], updated: List[Endereco]) -> None:
+        self._bus.publish(
+            "client.addresses_updated",
+            {"client_id": client_id, "enderecos": [endereco.model_dump(mode="json") for endereco in updated]},
+        )
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import calendar
+from datetime import date, datetime
+from itertools import count
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models.financeiro import (
+    AssinaturaMensal,
+    AssinaturaMensalCreate,
+    CobrancaAssinatura,
+    Despesa,
+    DespesaRecorrente,
+    DespesaRecorrenteCreate,
+)
+
+
+def day_in_month(year: int, month: int, day: int) -> date:
+    """`date(year, month, day)` clamped to the last day of short months."""
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def next_monthly_date(day: int, after: date) -> date:
+    """First date on or after `after` falling on `day` of its month (clamped)."""
+    candidate = day_in_month(after.year, after.month, day)
+    if candidate >= after:
+        return candidate
+    year, month = (after.year + 1, 1) if after.month == 12 else (after.year, after.month + 1)
+    return day_in_month(year, month, day)
+
+
+class MockFinanceiroService:
+    """
+    In-memory mock for `assinatura_mensal`, `despesa_recorrente` and the rows
+    they generate (subscription charges and `despesa`).
+
+    Generation is bulk and idempotent per (source, competencia), so the
+    scheduler can safely retry a batch.
+    """
+
+    def __init__(self):
+        self._assinaturas: Dict[int, AssinaturaMensal] = {}
+        self._assinatura_sequence = count(1)
+        self._cobrancas: Dict[Tuple[int, date], CobrancaAssinatura] = {}
+        self._cobranca_sequence = count(1)
+
+        self._despesas_recorrentes: Dict[int, DespesaRecorrente] = {}
+        self._despesa_recorrente_sequence = count(1)
+        self._despesas: Dict[int, Despesa] = {}
+        self._despesa_sequence = count(1)
+        self._despesas_geradas: Dict[Tuple[int, date], int] = {}
+
+        self._lock = Lock()
+
+    # Assinaturas
+
+    def list_assinaturas(self) -> Iterable[AssinaturaMensal]:
+        return sorted(self._assinaturas.values(), key=lambda a: a.id)
+
+    def get_assinatura(self, assinatura_id: int) -> Optional[AssinaturaMensal]:
+        return self._assinaturas.get(assinatura_id)
+
+    def create_assinatura(self, payload: AssinaturaMensalCreate) -> AssinaturaMensal:
+        identifier = next(self._assinatura_sequence)
+        now = datetime.utcnow()
+        assinatura = AssinaturaMensal(id=identifier, created_at=now, updated_at=now, **payload.model_dump())
+        self._assinaturas[identifier] = assinatura
+        return assinatura
+
+    def list_cobrancas(self) -> Iterable[CobrancaAssinatura]:
+        return sorted(self._cobrancas.values(), key=lambda c: c.id)
+
+    def charge_subscriptions(self, assinatura_ids: Iterable[int], competencia: date) -> List[CobrancaAssinatura]:
+        """Create the charge of `competencia` for every given subscription, once."""
+        competencia = competencia.replace(day=1)
+        now = datetime.utcnow()
+        created: List[CobrancaAssinatura] = []
+        with self._lock:
+            for assinatura_id in assinatura_ids:
+                assinatura = self._assinaturas.get(assinatura_id)
+                key = (assinatura_id, competencia)
+                if not assinatura or not assinatura.ativo or key in self._cobrancas:
+                    continue
+                cobranca = CobrancaAssinatura(
+                    id=next(self._cobranca_sequence),
+                    assinatura_mensal_id=assinatura_id,
+                    cliente_id=assinatura.cliente_id,
+                    competencia=competencia,
+                    valor=assinatura.valor_mensal,
+                    created_at=now,
+                )
+                self._cobrancas[key] = cobranca
+                created.append(cobranca)
+        return created
+
+    def reassign_cliente(self, cliente_id: int, novo_cliente_id: int) -> List[AssinaturaMensal]:
+        """
+        Move the subscriptions of `cliente_id`, and the charges already made
+        to it, to `novo_cliente_id` (client merges). Returns the moved subscriptions.
+        """
+        now = datetime.utcnow()
+        moved: List[AssinaturaMensal] = []
+        with self._lock:
+            for assinatura in list(self._assinaturas.values()):
+                if assinatura.cliente_id == cliente_id:
+                    updated = assinatura.model_copy(update={"cliente_id": novo_cliente_id, "updated_at": now})
+                    self._assinaturas[assinatura.id] = updated
+                    moved.append(updated)
+            for key, cobranca in list(self._cobrancas.items()):
+                if cobranca.cliente_id == cliente_id:
+                    self._cobrancas[key] = cobranca.model_copy(update={"cliente_id": novo_cliente_id})
+        return moved
+
+    # Despesas
+
+    def list_despesas_recorrentes(self) -> Iterable[DespesaRecorrente]:
+        return sorted(self._despesas_recorrentes.values(), key=lambda d: d.id)
+
+    def get_despesa_recorrente(self, despesa_recorrente_id: int) -> Optional[DespesaRecorrente]:
+        return self._despesas_recorrentes.get(despesa_recorrente_id)
+
+    def create_despesa_recorrente(self, payload: DespesaRecorrenteCreate) -> DespesaRecorrente:
+        identifier = next(self._despesa_recorrente_sequence)
+        now = datetime.utcnow()
+        despesa = DespesaRecorrente(id=identifier, created_at=now, updated_at=now, **payload.model_dump())
+        self._despesas_recorrentes[identifier] = despesa
+        return despesa
+
+    def list_despesas(self) -> Iterable[Despesa]:
+        return sorted(self._despesas.values(), key=lambda d: (d.data_competencia, d.id))
+
+    def generate_recurring_expenses(self, despesa_recorrente_ids: Iterable[int], competencia: date) -> List[Despesa]:
+        """Create the `despesa` row of `competencia` for every given template, once."""
+        competencia = competencia.replace(day=1)
+        now = datetime.utcnow()
+        created: List[Despesa] = []
+        with self._lock:
+            for recorrente_id in despesa_recorrente_ids:
+                recorrente = self._despesas_recorrentes.get(recorrente_id)
+                key = (recorrente_id, competencia)
+                if not recorrente or not recorrente.ativo or key in self._despesas_geradas:
+                    continue
+                despesa = Despesa(
+                    id=next(self._despesa_sequence),
+                    despesa_recorrente_id=recorrente_id,
+                    descricao=recorrente.descricao,
+                    categoria=recorrente.categoria,
+                    tipo="RECORRENTE",
+                    valor=recorrente.valor_padrao,
+                    data_competencia=competencia,
+                    data_vencimento=day_in_month(competencia.year, competencia.month, recorrente.dia_vencimento),
+                    created_at=now,
+                    updated_at=now,
+                )
+                self._despesas[despesa.id] = despesa
+                self._despesas_geradas[key] = despesa.id
+                created.append(despesa)
+        return created
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        return {
+            "assinaturas": len(self._assinaturas),
+            "cobrancas": len(self._cobrancas),
+            "despesas_recorrentes": len(self._despesas_recorrentes),
+            "despesas": len(self._despesas),
+        }
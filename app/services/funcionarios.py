@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from itertools import count
-from typing import Dict, Iterable, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from decimal import Decimal
 
@@ -14,6 +14,46 @@ from ..models.funcionarios import (
     FuncionarioStatusUpdate,
     FuncionarioUpdate,
 )
+from .caching import CacheSpec, Invalidates
+from .hooks import FuncionarioHooks
+
+
+def _funcionario_keys(funcionario: Optional[Funcionario], funcionario_id: int, *_) -> list:
+    keys = [("get_funcionario", funcionario_id), ("list_funcionarios",)]
+    if funcionario is not None:
+        keys.append(("get_funcionario_by_nome", funcionario.nome))
+    return keys
+
+
+def _previous_nome_keys(service: "MockFuncionarioService", funcionario_id: int, *_) -> list:
+    previous = service.get_funcionario(funcionario_id)
+    return [("get_funcionario_by_nome", previous.nome)] if previous else []
+
+
+FUNCIONARIO_CACHE_SPEC = CacheSpec(
+    reads={
+        "get_funcionario": None,
+        "get_funcionario_by_nome": None,
+        "list_funcionarios": None,
+        "get_funcionario_servico": None,
+        "list_funcionario_servicos": None,
+    },
+    writes={
+        "create_funcionario": Invalidates(
+            after=lambda funcionario, payload: _funcionario_keys(funcionario, funcionario.id),
+        ),
+        "update_funcionario": Invalidates(after=_funcionario_keys, before=_previous_nome_keys),
+        "update_status": Invalidates(after=_funcionario_keys),
+        "create_or_update_funcionario_servico": Invalidates(
+            after=lambda assignment, payload: [
+                ("get_funcionario_servico", payload.funcionario_id, payload.servico_id),
+                ("list_funcionario_servicos", payload.funcionario_id),
+            ],
+        ),
+    },
+    clears=("bulk_load",),
+)
+
 
 class MockFuncionarioService:
     """
@@ -54,6 +94,18 @@ class MockFuncionarioService:
 
         # funcionario_servico entries keyed by (funcionario_id, servico_id)
         self._funcionario_servicos: Dict[Tuple[int, int], FuncionarioServico] = {}
+        self._revision = 0
+        # Appointments reference staff by name, so keep a name index.
+        self._by_nome: Dict[str, int] = {f.nome: f.id for f in self._funcionarios.values()}
+        self._hooks: List[FuncionarioHooks] = []
+
+    def register_hook(self, hook: FuncionarioHooks) -> None:
+        self._hooks.append(hook)
+
+    @property
+    def revision(self) -> int:
+        """Monotonic counter bumped on every funcionario/funcionario_servico mutation."""
+        return self._revision
 
     # Funcionario CRUD
 
@@ -63,6 +115,12 @@ class MockFuncionarioService:
     def get_funcionario(self, funcionario_id: int) -> Optional[Funcionario]:
         return self._funcionarios.get(funcionario_id)
 
+    def get_funcionario_by_nome(self, nome: str) -> Optional[Funcionario]:
+        identifier = self._by_nome.get(nome)
+        if identifier is None:
+            return None
+        return self._funcionarios.get(identifier)
+
     def create_funcionario(self, payload: FuncionarioCreate) -> Funcionario:
         identifier = next(self._id_sequence)
         now = datetime.utcnow()
@@ -73,6 +131,10 @@ class MockFuncionarioService:
             **payload.model_dump(),
         )
         self._funcionarios[identifier] = funcionario
+        self._by_nome[funcionario.nome] = identifier
+        self._revision += 1
+        for hook in self._hooks:
+            hook.funcionario_created(funcionario)
         return funcionario
 
     def update_funcionario(
@@ -91,6 +153,12 @@ class MockFuncionarioService:
             }
         )
         self._funcionarios[funcionario_id] = updated
+        if updated.nome != existing.nome:
+            self._by_nome.pop(existing.nome, None)
+            self._by_nome[updated.nome] = funcionario_id
+        self._revision += 1
+        for hook in self._hooks:
+            hook.funcionario_updated(existing, updated)
         return updated
 
     def update_status(
@@ -105,10 +173,40 @@ class MockFuncionarioService:
             update={"ativo": payload.ativo, "updated_at": datetime.utcnow()}
         )
         self._funcionarios[funcionario_id] = updated
+        self._revision += 1
+        for hook in self._hooks:
+            hook.funcionario_updated(existing, updated)
         return updated
 
+    def bulk_load(
+        self,
+        funcionarios: Iterable[Funcionario],
+        funcionario_servicos: Iterable[FuncionarioServico] = (),
+    ) -> int:
+        """
+        Load already-built funcionarios and service assignments (fixtures,
+        synthetic data) keeping their ids. Returns the number of funcionarios loaded.
+        """
+        loaded = 0
+        for funcionario in funcionarios:
+            self._funcionarios[funcionario.id] = funcionario
+            self._by_nome[funcionario.nome] = funcionario.id
+            loaded += 1
+        for assignment in funcionario_servicos:
+            self._funcionario_servicos[(assignment.funcionario_id, assignment.servico_id)] = assignment
+        self._id_sequence = count(max(self._funcionarios, default=0) + 1)
+        self._revision += 1
+        return loaded
+
     # Funcionario x Servico
 
+    def get_funcionario_servico(
+        self,
+        funcionario_id: int,
+        servico_id: int,
+    ) -> Optional[FuncionarioServico]:
+        return self._funcionario_servicos.get((funcionario_id, servico_id))
+
     def list_funcionario_servicos(self, funcionario_id: int) -> Iterable[FuncionarioServico]:
         return sorted(
             (
@@ -130,9 +228,25 @@ class MockFuncionarioService:
                 update=payload.model_dump(exclude={"funcionario_id", "servico_id"}, exclude_unset=True),
             )
             self._funcionario_servicos[key] = updated
+            self._revision += 1
+            for hook in self._hooks:
+                hook.funcionario_servico_changed(existing, updated)
             return updated
 
         created = FuncionarioServico(**payload.model_dump())
         self._funcionario_servicos[key] = created
+        self._revision += 1
+        for hook in self._hooks:
+            hook.funcionario_servico_changed(None, created)
         return created
 
+    def list_all_funcionario_servicos(self) -> Iterable[FuncionarioServico]:
+        """Every assignment, ordered by (funcionario_id, servico_id)."""
+        return [self._funcionario_servicos[key] for key in sorted(self._funcionario_servicos)]
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        return {
+            "funcionarios": len(self._funcionarios),
+            "funcionario_servicos": len(self._funcionario_servicos),
+        }
@@ -0,0 +1,75 @@
+"""
+Listener interfaces for service mutations.
+
+Services call every registered hook synchronously right after a mutation is
+applied. Implementations must be cheap (O(1) per call, O(n) per batch) and must
+not raise.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from ..models.appointments import Appointment
+from ..models.clients import Cliente
+from ..models.endereco import Endereco
+from ..models.funcionarios import Funcionario, FuncionarioServico
+from ..models.servicos import Servico
+
+
+class AppointmentHooks:
+    def appointment_created(self, appointment: Appointment) -> None:
+        pass
+
+    def appointment_status_changed(self, previous: Appointment, updated: Appointment) -> None:
+        pass
+
+    def appointments_status_changed(self, changes: List[Tuple[Appointment, Appointment]]) -> None:
+        """
+        Status changes applied together (bulk updates, the end-of-day sweep),
+        as `(previous, updated)` pairs in order. Called once per batch; the
+        default forwards each pair to `appointment_status_changed`.
+        """
+        for previous, updated in changes:
+            self.appointment_status_changed(previous, updated)
+
+    def appointment_updated(self, previous: Appointment, updated: Appointment) -> None:
+        """Fields other than status changed (e.g. rescheduled or reassigned)."""
+        pass
+
+
+class ClientHooks:
+    def client_created(self, client: Cliente) -> None:
+        pass
+
+    def client_credit_changed(self, previous: Cliente, updated: Cliente) -> None:
+        pass
+
+    def client_merged(self, previous: Cliente, updated: Cliente, duplicate: Cliente) -> None:
+        """`duplicate` was folded into `previous` (now `updated`) and removed."""
+        pass
+
+    def client_addresses_updated(self, client_id: int, previous: List[Endereco], updated: List[Endereco]) -> None:
+        """The client's addresses were created or replaced; both lists are complete."""
+        pass
+
+
+class FuncionarioHooks:
+    def funcionario_created(self, funcionario: Funcionario) -> None:
+        pass
+
+    def funcionario_updated(self, previous: Funcionario, updated: Funcionario) -> None:
+        """Any field changed, including `ativo` and `salario_fixo_mensal`."""
+        pass
+
+    def funcionario_servico_changed(self, previous: Optional[FuncionarioServico], updated: FuncionarioServico) -> None:
+        """A `funcionario_servico` price/duration/commission was created (`previous` None) or changed."""
+        pass
+
+
+class ServicoHooks:
+    def servico_created(self, servico: Servico) -> None:
+        pass
+
+    def servico_updated(self, previous: Servico, updated: Servico) -> None:
+        pass
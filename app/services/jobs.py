@@ -0,0 +1,240 @@
+"""
+Periodic work run by the in-process scheduler: subscription charges,
+recurring expenses, appointment reminders and daily maintenance (including
+the end-of-day auto-completion of past appointments, reconciliation of
+package sessions and the full client duplicate scan).
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+
+from ..core.scheduler import Job, Scheduler
+from ..models.appointments import ACTIVE_STATUSES, Appointment
+from ..models.financeiro import AssinaturaMensal, DespesaRecorrente
+from .appointments import InMemoryAppointmentService
+from .dedup import ClientDedupService
+from .financeiro import MockFinanceiroService, next_monthly_date
+from .hooks import AppointmentHooks
+from .pacotes import MockPacoteService
+from .payroll import PayrollService
+from .recorrencia import RecurringAppointmentService
+from .reminders import ReminderService
+
+CHARGE_TIME = time(6, 0)
+EXPENSE_TIME = time(6, 0)
+DAILY_MAINTENANCE_TIME = time(1, 0)
+END_OF_DAY_TIME = time(23, 30)
+# Before the package reconciliation, so it sees the sessions the sweep consumed.
+AUTO_COMPLETE_TIME = time(23, 0)
+REMINDER_LEAD = timedelta(hours=24)
+
+KIND_SUBSCRIPTION_CHARGE = "assinatura.cobranca"
+KIND_RECURRING_EXPENSE = "despesa.recorrente"
+KIND_REMINDER = "agendamento.lembrete"
+KIND_RECURRING_MATERIALIZE = "recorrencia.materializar"
+KIND_PAYROLL = "folha.calcular"
+KIND_PACKAGE_RECONCILE = "pacote.reconciliar"
+KIND_AUTO_COMPLETE = "agendamento.concluir"
+KIND_CLIENT_DEDUP = "cliente.duplicados"
+
+
+def _monthly(day: int, at: time, until: Optional[date]):
+    """Recurrence for "every month on `day` at `at`" that stops after `until`."""
+
+    def reschedule(previous_due: datetime) -> Optional[datetime]:
+        next_day = next_monthly_date(day, previous_due.date() + timedelta(days=1))
+        if until is not None and next_day > until:
+            return None
+        return datetime.combine(next_day, at)
+
+    return reschedule
+
+
+def _daily(at: time):
+    def reschedule(previous_due: datetime) -> Optional[datetime]:
+        return datetime.combine(previous_due.date() + timedelta(days=1), at)
+
+    return reschedule
+
+
+def _by_competencia(jobs: List[Job]) -> Dict[date, List[int]]:
+    grouped: Dict[date, List[int]] = defaultdict(list)
+    for job in jobs:
+        grouped[job.due.date().replace(day=1)].append(job.payload)
+    return grouped
+
+
+class ScheduledJobs(AppointmentHooks):
+    """
+    Registers the application's periodic jobs on a `Scheduler` and keeps
+    reminder jobs in sync with appointment changes (as an appointment hook).
+    """
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        *,
+        appointment_service: InMemoryAppointmentService,
+        financeiro_service: MockFinanceiroService,
+        reminder_service: ReminderService,
+        recurring_service: RecurringAppointmentService,
+        payroll_service: PayrollService,
+        pacote_service: MockPacoteService,
+        dedup_service: Optional[ClientDedupService] = None,
+        auto_complete_lookback: Optional[timedelta] = timedelta(days=7),
+        status_batch_size: int = 500,
+    ):
+        self._scheduler = scheduler
+        self._appointment_service = appointment_service
+        self._financeiro_service = financeiro_service
+        self._reminder_service = reminder_service
+        self._recurring_service = recurring_service
+        self._payroll_service = payroll_service
+        self._pacote_service = pacote_service
+        self._dedup_service = dedup_service
+        self._auto_complete_lookback = auto_complete_lookback
+        self._status_batch_size = status_batch_size
+
+        scheduler.register_handler(KIND_SUBSCRIPTION_CHARGE, self._charge_subscriptions)
+        scheduler.register_handler(KIND_RECURRING_EXPENSE, self._generate_expenses)
+        scheduler.register_handler(KIND_REMINDER, self._send_reminders)
+        scheduler.register_handler(KIND_RECURRING_MATERIALIZE, self._materialize_recurring)
+        scheduler.register_handler(KIND_PAYROLL, self._run_payroll)
+        scheduler.register_handler(KIND_PACKAGE_RECONCILE, self._reconcile_packages)
+        scheduler.register_handler(KIND_AUTO_COMPLETE, self._complete_past_appointments)
+        scheduler.register_handler(KIND_CLIENT_DEDUP, self._scan_duplicates)
+
+    def install(self, now: Optional[datetime] = None) -> None:
+        """Schedule jobs for everything currently in the stores."""
+        now = now or self._scheduler.clock.now()
+        for assinatura in self._financeiro_service.list_assinaturas():
+            self.schedule_assinatura(assinatura, now)
+        for despesa in self._financeiro_service.list_despesas_recorrentes():
+            self.schedule_despesa_recorrente(despesa, now)
+        for appointment in self._appointment_service.list_appointments_between(now, datetime.max):
+            self._schedule_reminder(appointment, now)
+
+        tomorrow = now.date() + timedelta(days=1)
+        for kind in (KIND_RECURRING_MATERIALIZE, KIND_PAYROLL):
+            self._scheduler.schedule(
+                kind,
+                kind,
+                datetime.combine(tomorrow, DAILY_MAINTENANCE_TIME),
+                reschedule=_daily(DAILY_MAINTENANCE_TIME),
+            )
+        if self._dedup_service is not None:
+            # Right away, to index the clients already in the store, then nightly.
+            self._scheduler.schedule(
+                KIND_CLIENT_DEDUP,
+                KIND_CLIENT_DEDUP,
+                now,
+                reschedule=_daily(DAILY_MAINTENANCE_TIME),
+            )
+        daily = [(KIND_PACKAGE_RECONCILE, END_OF_DAY_TIME)]
+        if self._auto_complete_lookback is not None:
+            daily.append((KIND_AUTO_COMPLETE, AUTO_COMPLETE_TIME))
+        for kind, at in daily:
+            due = datetime.combine(now.date(), at)
+            if due < now:
+                due += timedelta(days=1)
+            self._scheduler.schedule(kind, kind, due, reschedule=_daily(at))
+
+    def schedule_assinatura(self, assinatura: AssinaturaMensal, now: Optional[datetime] = None) -> None:
+        now = now or self._scheduler.clock.now()
+        key = f"{KIND_SUBSCRIPTION_CHARGE}:{assinatura.id}"
+        first = next_monthly_date(assinatura.dia_cobranca, max(now.date(), assinatura.data_inicio))
+        if datetime.combine(first, CHARGE_TIME) < now:
+            first = next_monthly_date(assinatura.dia_cobranca, first + timedelta(days=1))
+        if not assinatura.ativo or (assinatura.data_fim and first > assinatura.data_fim):
+            self._scheduler.cancel(key)
+            return
+        self._scheduler.schedule(
+            key,
+            KIND_SUBSCRIPTION_CHARGE,
+            datetime.combine(first, CHARGE_TIME),
+            assinatura.id,
+            reschedule=_monthly(assinatura.dia_cobranca, CHARGE_TIME, assinatura.data_fim),
+        )
+
+    def schedule_despesa_recorrente(self, despesa: DespesaRecorrente, now: Optional[datetime] = None) -> None:
+        now = now or self._scheduler.clock.now()
+        key = f"{KIND_RECURRING_EXPENSE}:{despesa.id}"
+        first = next_monthly_date(despesa.dia_vencimento, max(now.date(), despesa.data_inicio))
+        if datetime.combine(first, EXPENSE_TIME) < now:
+            first = next_monthly_date(despesa.dia_vencimento, first + timedelta(days=1))
+        if not despesa.ativo or (despesa.data_fim and first > despesa.data_fim):
+            self._scheduler.cancel(key)
+            return
+        self._scheduler.schedule(
+            key,
+            KIND_RECURRING_EXPENSE,
+            datetime.combine(first, EXPENSE_TIME),
+            despesa.id,
+            reschedule=_monthly(despesa.dia_vencimento, EXPENSE_TIME, despesa.data_fim),
+        )
+
+    # Appointment hooks keep one reminder job per upcoming appointment.
+
+    def appointment_created(self, appointment: Appointment) -> None:
+        self._schedule_reminder(appointment)
+
+    def appointment_status_changed(self, previous: Appointment, updated: Appointment) -> None:
+        self._schedule_reminder(updated)
+
+    def appointment_updated(self, previous: Appointment, updated: Appointment) -> None:
+        self._schedule_reminder(updated)
+
+    def _schedule_reminder(self, appointment: Appointment, now: Optional[datetime] = None) -> None:
+        now = now or self._scheduler.clock.now()
+        key = f"{KIND_REMINDER}:{appointment.id}"
+        if appointment.status not in ACTIVE_STATUSES or appointment.start_time <= now:
+            self._scheduler.cancel(key)
+            return
+        # Round to the minute so reminders due together run as one batch.
+        due = max(now, appointment.start_time - REMINDER_LEAD).replace(second=0, microsecond=0)
+        self._scheduler.schedule(key, KIND_REMINDER, due, appointment.id)
+
+    # Handlers: each receives every job of its kind due in the same tick.
+
+    def _charge_subscriptions(self, jobs: List[Job], now: datetime) -> None:
+        for competencia, ids in _by_competencia(jobs).items():
+            self._financeiro_service.charge_subscriptions(ids, competencia)
+
+    def _generate_expenses(self, jobs: List[Job], now: datetime) -> None:
+        for competencia, ids in _by_competencia(jobs).items():
+            self._financeiro_service.generate_recurring_expenses(ids, competencia)
+
+    def _send_reminders(self, jobs: List[Job], now: datetime) -> None:
+        self._reminder_service.send_reminders(job.payload for job in jobs)
+
+    def _materialize_recurring(self, jobs: List[Job], now: datetime) -> None:
+        self._recurring_service.materialize(today=now.date())
+
+    def _run_payroll(self, jobs: List[Job], now: datetime) -> None:
+        today = now.date()
+        if today.day == 1:
+            # Close the previous competencia with what completed on its last day.
+            self._payroll_service.run_payroll(today - timedelta(days=1))
+        self._payroll_service.run_payroll(today)
+
+    async def _complete_past_appointments(self, jobs: List[Job], now: datetime) -> None:
+        if self._auto_complete_lookback is None:
+            return
+        await self._appointment_service.sweep_past_appointments(
+            now - self._auto_complete_lookback,
+            now,
+            batch_size=self._status_batch_size,
+        )
+
+    async def _scan_duplicates(self, jobs: List[Job], now: datetime) -> None:
+        if self._dedup_service is not None:
+            await self._dedup_service.scan()
+
+    def _reconcile_packages(self, jobs: List[Job], now: datetime) -> None:
+        start = datetime.combine(now.date(), time.min)
+        self._pacote_service.reconcile(
+            self._appointment_service.list_appointments_between(start, start + timedelta(days=1))
+        )
@@ -0,0 +1,317 @@
+"""
+Lead capture.
+
+`POST /public/leads` validates the form and hands it to `LeadIntake.submit`,
+which only appends it to a bounded in-memory buffer; the request returns
+`202` right away. When the buffer is full, `submit` refuses the lead and
+the route answers `503` with `Retry-After`, so a burst the pipeline can't
+keep up with pushes back on the forms instead of growing memory.
+
+A background task drains the buffer in batches. For each batch it
+normalizes contacts, attributes each lead to a `como_conheceu` (its
+`como_conheceu_id`, else its `origem` matched by name), looks up all of
+the batch's e-mails and phones among clients in one call, and saves the
+batch under one lock: leads of existing clients are not stored, repeats of
+a known lead (same e-mail or phone, also within the batch) are merged into
+it, and the rest become new leads. `spa_leads_total{empresa, outcome}`
+counts accepted, rejected, created, duplicate and existing-client leads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from itertools import count, islice
+from threading import Lock
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..core.metrics import metrics
+from ..models.leads import ComoConheceu, Lead, LeadAtribuicao, LeadCreate, LeadOutcome
+from .contacts import contact_keys, fold_text
+
+logger = logging.getLogger(__name__)
+
+LEADS = metrics.counter(
+    "spa_leads_total",
+    "Leads by outcome: accepted/rejected at intake, created/duplicate/existing_client/failed once processed.",
+    ("empresa", "outcome"),
+)
+LEAD_BATCH_LATENCY = metrics.histogram(
+    "spa_lead_batch_duration_seconds",
+    "Time to deduplicate and save one batch of leads.",
+    ("empresa",),
+)
+
+
+class MockLeadService:
+    """
+    In-memory mock for `lead` and `como_conheceu`.
+
+    Leads are indexed by normalized e-mail and phone; a lead sharing either
+    with a stored one is a duplicate of it.
+    """
+
+    def __init__(self):
+        self._sequence = count(1)
+        self._leads: Dict[int, Lead] = {}
+        # Normalized e-mail/phone -> lead id
+        self._by_contact: Dict[str, int] = {}
+        self._como_conheceu: Dict[int, ComoConheceu] = {
+            item.id: item
+            for item in (
+                ComoConheceu(id=1, descricao="Instagram"),
+                ComoConheceu(id=2, descricao="Google"),
+                ComoConheceu(id=3, descricao="Facebook"),
+                ComoConheceu(id=4, descricao="Indicação"),
+                ComoConheceu(id=5, descricao="Outro"),
+            )
+        }
+        self._como_conheceu_by_name = {fold_text(item.descricao): item.id for item in self._como_conheceu.values()}
+        # como_conheceu_id -> outcome -> leads
+        self._atribuicao: Dict[Optional[int], Dict[LeadOutcome, int]] = {}
+        self._lock = Lock()
+
+    def list_como_conheceu(self) -> List[ComoConheceu]:
+        return sorted(self._como_conheceu.values(), key=lambda item: item.id)
+
+    def resolve_como_conheceu(self, como_conheceu_id: Optional[int], origem: Optional[str]) -> Optional[int]:
+        """Active `como_conheceu` given by id, else matching `origem` by name, else None."""
+        if como_conheceu_id is not None:
+            item = self._como_conheceu.get(como_conheceu_id)
+            if item is not None and item.ativo:
+                return item.id
+        if origem:
+            identifier = self._como_conheceu_by_name.get(fold_text(origem))
+            if identifier is not None and self._como_conheceu[identifier].ativo:
+                return identifier
+        return None
+
+    def get_lead(self, lead_id: int) -> Optional[Lead]:
+        return self._leads.get(lead_id)
+
+    def list_leads(
+        self,
+        como_conheceu_id: Optional[int] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> List[Lead]:
+        """Newest first."""
+        leads: Iterable[Lead] = reversed(self._leads.values())
+        if como_conheceu_id is not None:
+            leads = (lead for lead in leads if lead.como_conheceu_id == como_conheceu_id)
+        return list(islice(leads, offset, offset + limit))
+
+    def save_leads(
+        self,
+        leads: Sequence[Tuple[LeadCreate, Optional[int], List[str]]],
+        client_contacts: Dict[str, int],
+    ) -> Dict[LeadOutcome, int]:
+        """
+        Save `(lead, como_conheceu_id, contact keys)` entries, skipping
+        those whose contacts belong to a client (`client_contacts`) and
+        merging repeats into the stored lead. Returns counts per outcome.
+        """
+        outcomes: Dict[LeadOutcome, int] = {"created": 0, "duplicate": 0, "existing_client": 0}
+        now = datetime.utcnow()
+        with self._lock:
+            for payload, como_conheceu_id, contacts in leads:
+                if any(contact in client_contacts for contact in contacts):
+                    outcome: LeadOutcome = "existing_client"
+                else:
+                    existing_id = next((self._by_contact[c] for c in contacts if c in self._by_contact), None)
+                    if existing_id is not None:
+                        self._merge(self._leads[existing_id], payload, como_conheceu_id, contacts, now)
+                        outcome = "duplicate"
+                    else:
+                        self._create(payload, como_conheceu_id, contacts, now)
+                        outcome = "created"
+                outcomes[outcome] += 1
+                counts = self._atribuicao.setdefault(como_conheceu_id, {})
+                counts[outcome] = counts.get(outcome, 0) + 1
+        return outcomes
+
+    def _create(self, payload: LeadCreate, como_conheceu_id: Optional[int], contacts: List[str], now: datetime) -> None:
+        lead = Lead(
+            id=next(self._sequence),
+            nome=payload.nome,
+            email=payload.email,
+            telefone=payload.telefone,
+            como_conheceu_id=como_conheceu_id,
+            servico_buscado_id=payload.servico_buscado_id,
+            obs=payload.obs,
+            created_at=now,
+            updated_at=now,
+        )
+        self._leads[lead.id] = lead
+        for contact in contacts:
+            self._by_contact.setdefault(contact, lead.id)
+
+    def _merge(
+        self,
+        lead: Lead,
+        payload: LeadCreate,
+        como_conheceu_id: Optional[int],
+        contacts: List[str],
+        now: datetime,
+    ) -> None:
+        # Keep the first attribution; fill in what the first submission lacked.
+        updated = lead.model_copy(
+            update={
+                "telefone": lead.telefone or payload.telefone,
+                "como_conheceu_id": lead.como_conheceu_id or como_conheceu_id,
+                "servico_buscado_id": lead.servico_buscado_id or payload.servico_buscado_id,
+                "obs": lead.obs or payload.obs,
+                "ocorrencias": lead.ocorrencias + 1,
+                "updated_at": now,
+            }
+        )
+        self._leads[lead.id] = updated
+        for contact in contacts:
+            self._by_contact.setdefault(contact, lead.id)
+
+    def atribuicao(self) -> List[LeadAtribuicao]:
+        """Processed leads per `como_conheceu` and outcome."""
+        with self._lock:
+            counts = {key: dict(value) for key, value in self._atribuicao.items()}
+        rows = []
+        for como_conheceu_id, outcomes in counts.items():
+            item = self._como_conheceu.get(como_conheceu_id) if como_conheceu_id is not None else None
+            rows.append(
+                LeadAtribuicao(
+                    como_conheceu_id=como_conheceu_id,
+                    descricao=item.descricao if item else None,
+                    **outcomes,
+                )
+            )
+        return sorted(rows, key=lambda row: (row.como_conheceu_id is None, row.como_conheceu_id or 0))
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        return {"leads": len(self._leads), "lead_contacts": len(self._by_contact)}
+
+
+class LeadIntake:
+    """
+    Bounded ingest buffer in front of `MockLeadService`, drained in batches
+    by a background task (`start()` / `stop()`). Without a running task
+    (scripts, tooling) leads wait in the buffer until `drain()`.
+    """
+
+    def __init__(
+        self,
+        lead_service: MockLeadService,
+        client_service,
+        *,
+        buffer_size: int = 50000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        empresa: str = "",
+    ):
+        self._lead_service = lead_service
+        self._client_service = client_service
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._empresa = empresa
+        self._buffer: Deque[LeadCreate] = deque()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    @property
+    def depth(self) -> int:
+        return len(self._buffer)
+
+    def submit(self, lead: LeadCreate) -> bool:
+        """Buffer `lead`; False when the buffer is full (the caller should retry later)."""
+        if len(self._buffer) >= self.buffer_size:
+            LEADS.inc((self._empresa, "rejected"))
+            return False
+        self._buffer.append(lead)
+        LEADS.inc((self._empresa, "accepted"))
+        if self._wakeup is not None and len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Process what is still buffered and stop the background task."""
+        if self._task is not None:
+            # Not cancelled: a batch in flight would be lost.
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            self._wakeup = None
+            self._stopping = False
+        await self.drain()
+
+    async def drain(self) -> int:
+        """Process everything buffered now. Returns the number of leads processed."""
+        processed = 0
+        while self._buffer:
+            processed += await self.process(self._take())
+        return processed
+
+    def _take(self) -> List[LeadCreate]:
+        buffer = self._buffer
+        return [buffer.popleft() for _ in range(min(self.batch_size, len(buffer)))]
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            if len(self._buffer) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+            try:
+                await self.drain()
+            except Exception:
+                logger.exception("Lead batch processing failed")
+
+    async def process(self, batch: Iterable[LeadCreate]) -> int:
+        start = time.perf_counter()
+        resolve = self._lead_service.resolve_como_conheceu
+        entries = [
+            (lead, resolve(lead.como_conheceu_id, lead.origem), contact_keys(lead.email, lead.telefone))
+            for lead in batch
+        ]
+        if not entries:
+            return 0
+        try:
+            contacts = {contact for _, _, keys in entries for contact in keys}
+            client_contacts = await self._client_service.find_clients_by_contact(contacts)
+            outcomes = self._lead_service.save_leads(entries, client_contacts)
+        except Exception:
+            LEADS.inc((self._empresa, "failed"), len(entries))
+            raise
+        for outcome, amount in outcomes.items():
+            if amount:
+                LEADS.inc((self._empresa, outcome), amount)
+        LEAD_BATCH_LATENCY.observe((self._empresa,), time.perf_counter() - start)
+        return len(entries)
+
+
+_intakes: Dict[str, LeadIntake] = {}
+
+
+def register_lead_metrics(intake: LeadIntake, empresa: str = "") -> None:
+    """Expose `spa_lead_buffer_depth{empresa}`. Each empresa registers its own intake."""
+    _intakes[empresa] = intake
+    metrics.register_collector(
+        "spa_lead_buffer_depth",
+        "Leads accepted and waiting to be processed.",
+        ("empresa",),
+        lambda: {(tenant,): intake.depth for tenant, intake in list(_intakes.items())},
+    )
+
+
+__all__ = ["LeadIntake", "MockLeadService", "register_lead_metrics"]
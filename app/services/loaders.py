@@ -0,0 +1,123 @@
+"""
+DataLoader-style batching for composite reads.
+
+A `DataLoader` collects the keys requested with `load()` during one pass of
+the event loop and resolves all of them with a single call to its batch
+function. Code can then be written per entity ("load this client's
+addresses") while the services see one batched call per relation. Loaders
+also memoize per key, so they are meant to live for a single request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, Set, TypeVar
+
+from ..models.appointments import ACTIVE_STATUSES
+from ..models.clients import ClienteProfile
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchFunction = Callable[[List[K]], Awaitable[Dict[K, V]]]
+
+
+class DataLoader(Generic[K, V]):
+    def __init__(self, batch: BatchFunction, default: Any = None):
+        self._batch = batch
+        self._default = default
+        self._futures: Dict[K, "asyncio.Future[V]"] = {}
+        self._pending: List[K] = []
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    def load(self, key: K) -> "asyncio.Future[V]":
+        future = self._futures.get(key)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = self._futures[key] = loop.create_future()
+        if not self._pending:
+            # Runs after every coroutine started in this pass has queued its keys.
+            loop.call_soon(self._schedule_dispatch)
+        self._pending.append(key)
+        return future
+
+    async def load_many(self, keys: List[K]) -> List[V]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _schedule_dispatch(self) -> None:
+        # Keep a reference: the loop only holds weak references to tasks.
+        task = asyncio.ensure_future(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self) -> None:
+        keys, self._pending = self._pending, []
+        try:
+            values = await self._batch(keys)
+        except Exception as exc:
+            for key in keys:
+                self._futures.pop(key).set_exception(exc)
+            return
+        for key in keys:
+            self._futures[key].set_result(values.get(key, self._default))
+
+
+async def _sync(function: Callable[..., Dict[K, V]], *args: Any) -> Dict[K, V]:
+    return function(*args)
+
+
+class ClientProfileLoader:
+    """
+    Builds `ClienteProfile`s for many clients with one batched call per
+    relation: clients, addresses, upcoming appointments and packages.
+    """
+
+    def __init__(
+        self,
+        client_service,
+        appointment_service,
+        pacote_service,
+        *,
+        now: Optional[datetime] = None,
+        upcoming_limit: int = 10,
+        horizon_days: int = 365,
+    ):
+        now = now or datetime.now()
+        end = now + timedelta(days=horizon_days)
+        self.upcoming_limit = upcoming_limit
+        self.clients = DataLoader(client_service.get_clients)
+        self.enderecos = DataLoader(client_service.list_client_enderecos, default=[])
+        self.appointments = DataLoader(
+            lambda ids: _sync(appointment_service.list_clients_appointments_between, ids, now, end),
+            default=[],
+        )
+        self.pacotes = DataLoader(
+            lambda ids: _sync(pacote_service.list_pacotes_clientes, ids),
+            default=[],
+        )
+
+    async def load(self, client_id: int) -> Optional[ClienteProfile]:
+        client, enderecos, appointments, pacotes = await asyncio.gather(
+            self.clients.load(client_id),
+            self.enderecos.load(client_id),
+            self.appointments.load(client_id),
+            self.pacotes.load(client_id),
+        )
+        if client is None:
+            return None
+        upcoming = [appt for appt in appointments if appt.status in ACTIVE_STATUSES]
+        return ClienteProfile(
+            cliente=client,
+            enderecos=enderecos,
+            proximos_agendamentos=upcoming[: self.upcoming_limit],
+            pacotes_ativos=[pacote for pacote in pacotes if pacote.quantidade_disponivel > 0],
+            saldo_credito=client.saldo_credito,
+        )
+
+    async def load_many(self, client_ids: List[int]) -> List[Optional[ClienteProfile]]:
+        return list(await asyncio.gather(*(self.load(client_id) for client_id in client_ids)))
+
+
+__all__ = ["ClientProfileLoader", "DataLoader"]
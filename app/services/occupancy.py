@@ -0,0 +1,324 @@
+"""
+Staff utilization and occupancy heatmaps.
+
+`OccupancyService` keeps a columnar copy of the appointment store: NumPy
+arrays of start and end minute, staff code and whether the appointment
+holds its slot (everything but cancellations). The copy follows the
+store's change log (`revision` / `changed_since`), so after the first build
+a query only converts the appointments changed since the previous one.
+
+Booked minutes per staff, day and time bucket are computed without looping
+over appointments. With `F(t)` the minutes a professional has booked before
+minute `t`, a bucket `[a, b)` holds `F(b) - F(a)`, and
+`F(t) = sum(t - s for s < t) - sum(t - e for e < t)` over the starts `s`
+and ends `e` of their appointments. A point `p` inside a bucket adds
+`b - p` to it and the bucket width to every later bucket, so two
+`bincount`s per staff and a cumulative sum give every bucket at once, in
+time linear in appointments plus buckets. Overlapping appointments add up,
+so a bucket can go over its capacity (over-booking).
+
+Capacity is the part of each bucket inside working hours (`WORK_DAY_START`
+to `WORK_DAY_END`) on working weekdays (`WORK_WEEKDAYS`), the same for
+every professional: staff have no individual schedules yet.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+from math import gcd
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models.appointments import CANCELED_STATUSES, Appointment
+from ..models.dashboard import OcupacaoHeatmap, OcupacaoProfissional
+from .appointments import InMemoryAppointmentService
+
+MINUTES_PER_DAY = 24 * 60
+BUCKET_SIZES = (15, 30, 60, 120)
+MAX_DAYS = 366
+
+# Above this share of changed rows, rebuilding the columns is cheaper than patching them.
+REBUILD_RATIO = 0.1
+
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def _minutes(values: Iterable[datetime]) -> np.ndarray:
+    """Wall-clock minutes since the epoch."""
+    return np.fromiter(
+        ((value.toordinal() - _EPOCH) * MINUTES_PER_DAY + value.hour * 60 + value.minute for value in values),
+        dtype=np.int64,
+    )
+
+
+def _day_minute(dia: date) -> int:
+    return (dia.toordinal() - _EPOCH) * MINUTES_PER_DAY
+
+
+def _percent(booked: np.ndarray, capacity: np.ndarray) -> List[Any]:
+    """`booked / capacity` in percent, rounded, with None where there is no capacity."""
+    capacity = np.broadcast_to(capacity, booked.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = np.round(100.0 * booked / capacity, 1)
+    return np.where(capacity > 0, values, None).tolist()
+
+
+class OccupancyService:
+    """Utilization of each professional's working hours, from the appointment store."""
+
+    def __init__(
+        self,
+        appointment_service: InMemoryAppointmentService,
+        funcionario_service: Any,
+        *,
+        work_start: time = time(8, 0),
+        work_end: time = time(20, 0),
+        weekdays: Iterable[int] = (0, 1, 2, 3, 4, 5),
+    ):
+        self._appointment_service = appointment_service
+        self._funcionario_service = funcionario_service
+        self.work_start = work_start
+        self.work_end = work_end
+        self.weekdays = frozenset(weekdays)
+        self._opens = work_start.hour * 60 + work_start.minute
+        self._closes = work_end.hour * 60 + work_end.minute
+
+        self._revision = -1
+        self._ids = np.empty(0, dtype=np.int64)
+        self._start = np.empty(0, dtype=np.int64)
+        self._end = np.empty(0, dtype=np.int64)
+        self._staff = np.empty(0, dtype=np.int32)
+        self._booked = np.empty(0, dtype=bool)
+        # appointment id -> row
+        self._rows: Dict[int, int] = {}
+        self._staff_codes: Dict[str, int] = {}
+        self._staff_names: List[str] = []
+        self._lock = Lock()
+
+    # Columnar copy of the store
+
+    def _code(self, staff_member: str) -> int:
+        code = self._staff_codes.get(staff_member)
+        if code is None:
+            code = self._staff_codes[staff_member] = len(self._staff_names)
+            self._staff_names.append(staff_member)
+        return code
+
+    def _columns(self, appointments: Sequence[Appointment]) -> Tuple[np.ndarray, ...]:
+        count = len(appointments)
+        return (
+            np.fromiter((appointment.id for appointment in appointments), dtype=np.int64, count=count),
+            _minutes(appointment.start_time for appointment in appointments),
+            _minutes(appointment.end_time for appointment in appointments),
+            np.fromiter((self._code(appointment.staff_member) for appointment in appointments), dtype=np.int32, count=count),
+            np.fromiter(
+                (appointment.status not in CANCELED_STATUSES for appointment in appointments), dtype=bool, count=count
+            ),
+        )
+
+    def _refresh(self) -> None:
+        # Called with the lock held.
+        service = self._appointment_service
+        revision = service.revision
+        if revision == self._revision:
+            return
+        changed = service.changed_since(self._revision) if self._revision >= 0 else None
+        if changed is None or len(changed) > max(1000, REBUILD_RATIO * len(self._rows)):
+            appointments = list(service.list_appointments())
+            self._ids, self._start, self._end, self._staff, self._booked = self._columns(appointments)
+            self._rows = {identifier: row for row, identifier in enumerate(self._ids.tolist())}
+        else:
+            self._patch(changed)
+        # Changes made while reading are applied again next time.
+        self._revision = revision
+
+    def _patch(self, changed: List[int]) -> None:
+        added: List[Appointment] = []
+        for appointment_id in changed:
+            appointment = self._appointment_service.get_appointment(appointment_id)
+            if appointment is None:
+                continue
+            row = self._rows.get(appointment_id)
+            if row is None:
+                added.append(appointment)
+                continue
+            self._start[row], self._end[row] = _minutes((appointment.start_time, appointment.end_time))
+            self._staff[row] = self._code(appointment.staff_member)
+            self._booked[row] = appointment.status not in CANCELED_STATUSES
+        if added:
+            first = len(self._ids)
+            columns = self._columns(added)
+            self._ids, self._start, self._end, self._staff, self._booked = (
+                np.concatenate((current, new))
+                for current, new in zip((self._ids, self._start, self._end, self._staff, self._booked), columns)
+            )
+            for offset, appointment in enumerate(added):
+                self._rows[appointment.id] = first + offset
+
+    # Queries
+
+    def heatmap(
+        self,
+        inicio: date,
+        fim: date,
+        *,
+        intervalo_minutos: int = 60,
+        staff_member: Optional[str] = None,
+        detalhado: bool = False,
+    ) -> OcupacaoHeatmap:
+        """
+        Utilization from `inicio` to `fim` (inclusive) in buckets of
+        `intervalo_minutos`. Raises `ValueError` for an invalid range or bucket.
+        """
+        if intervalo_minutos not in BUCKET_SIZES:
+            raise ValueError(f"intervalo_minutos must be one of {', '.join(map(str, BUCKET_SIZES))}")
+        days = (fim - inicio).days + 1
+        if days < 1 or days > MAX_DAYS:
+            raise ValueError(f"The range must cover between 1 and {MAX_DAYS} days")
+        span = days * MINUTES_PER_DAY
+        origin = _day_minute(inicio)
+
+        with self._lock:
+            self._refresh()
+            selected = self._booked & (self._start < origin + span) & (self._end > origin)
+            starts = self._start[selected] - origin
+            ends = self._end[selected] - origin
+            codes = self._staff[selected]
+            staff_names = list(self._staff_names)
+
+        if staff_member is not None:
+            names = [staff_member]
+        else:
+            active = {
+                funcionario.nome
+                for funcionario in self._funcionario_service.list_funcionarios()
+                if funcionario.ativo and funcionario.tipo_funcionario != "ADMINISTRATIVO"
+            }
+            names = sorted(active | {staff_names[code] for code in np.unique(codes).tolist()})
+
+        # Staff code -> row in `names`, -1 for staff left out.
+        lookup = np.full(len(staff_names) + 1, -1, dtype=np.int64)
+        for row, name in enumerate(names):
+            if name in self._staff_codes:
+                lookup[self._staff_codes[name]] = row
+        rows = lookup[codes]
+        keep = rows >= 0
+        # Booked minutes on a grid fine enough that working hours start and
+        # end on its edges, summed into buckets once split in and out of them.
+        step = gcd(intervalo_minutos, self._opens, self._closes)
+        booked = self._booked_minutes(
+            rows[keep],
+            np.clip(starts[keep], 0, span),
+            np.clip(ends[keep], 0, span),
+            len(names),
+            span,
+            step,
+        ).reshape(len(names), days, MINUTES_PER_DAY // intervalo_minutos, intervalo_minutos // step)
+        working = self._working(inicio, days, step).reshape(days, MINUTES_PER_DAY // intervalo_minutos, -1)
+        inside = (booked * working).sum(axis=3)
+        capacity = working.sum(axis=2) * step
+        return self._summarize(inicio, days, intervalo_minutos, names, booked.sum(axis=3), inside, capacity, detalhado)
+
+    @staticmethod
+    def _booked_minutes(
+        rows: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        staff_count: int,
+        span: int,
+        bucket: int,
+    ) -> np.ndarray:
+        """Booked minutes per (staff row, bucket) over `[0, span)`."""
+        # One extra bucket takes the ends clipped to `span`.
+        buckets = span // bucket + 1
+
+        def after(points: np.ndarray) -> np.ndarray:
+            # Bucket `[a, a + bucket)` gets `F(a + bucket) - F(a)` of `sum(t - p for p < t)`:
+            # `a + bucket - p` from the points inside it, `bucket` from each earlier one.
+            index = rows * buckets + points // bucket
+            size = staff_count * buckets
+            inside = np.bincount(index, weights=bucket - points % bucket, minlength=size).reshape(staff_count, buckets)
+            counts = np.bincount(index, minlength=size).reshape(staff_count, buckets)
+            earlier = np.cumsum(counts, axis=1) - counts
+            return inside.astype(np.int64) + bucket * earlier
+
+        return (after(starts) - after(ends))[:, :-1]
+
+    def _working(self, inicio: date, days: int, step: int) -> np.ndarray:
+        """Whether each (day, `step`-minute slot) lies in working hours."""
+        slots = np.arange(0, MINUTES_PER_DAY, step)
+        hours = (slots >= self._opens) & (slots < self._closes)
+        weekdays = (inicio.weekday() + np.arange(days)) % 7
+        return np.isin(weekdays, sorted(self.weekdays))[:, None] & hours[None, :]
+
+    def _summarize(
+        self,
+        inicio: date,
+        days: int,
+        bucket: int,
+        names: List[str],
+        booked: np.ndarray,
+        inside: np.ndarray,
+        capacity: np.ndarray,
+        detalhado: bool,
+    ) -> OcupacaoHeatmap:
+        open_buckets = np.flatnonzero(capacity.any(axis=0))
+        window = slice(open_buckets[0], open_buckets[-1] + 1) if len(open_buckets) else slice(0, 0)
+
+        staff_booked = inside.sum(axis=(1, 2))
+        staff_outside = booked.sum(axis=(1, 2)) - staff_booked
+        available = int(capacity.sum())
+        overbooked = (inside > capacity).sum(axis=(1, 2))
+        staff_utilization = _percent(staff_booked.astype(float), np.array(float(available)))
+
+        weekdays = (inicio.weekday() + np.arange(days)) % 7
+        by_weekday = (weekdays[None, :] == np.arange(7)[:, None]).astype(np.int64)
+        windowed = inside[:, :, window]
+        windowed_capacity = capacity[:, window]
+
+        return OcupacaoHeatmap(
+            inicio=inicio,
+            fim=inicio + timedelta(days=days - 1),
+            intervalo_minutos=bucket,
+            horarios=[f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(window.start * bucket, window.stop * bucket, bucket)],
+            dias=[inicio + timedelta(days=offset) for offset in range(days)],
+            utilizacao=_percent(staff_booked.sum(keepdims=True).astype(float), np.array(float(available * len(names))))[0]
+            if names
+            else None,
+            profissionais=[
+                OcupacaoProfissional(
+                    staff_member=name,
+                    minutos_agendados=int(staff_booked[row]),
+                    minutos_fora_do_horario=int(staff_outside[row]),
+                    minutos_disponiveis=available,
+                    utilizacao=staff_utilization[row],
+                    intervalos_sobrecarregados=int(overbooked[row]),
+                )
+                for row, name in enumerate(names)
+            ],
+            profissional_horario=_percent(windowed.sum(axis=1), windowed_capacity.sum(axis=0)),
+            profissional_dia=_percent(inside.sum(axis=2), capacity.sum(axis=1)),
+            dia_semana_horario=_percent(
+                by_weekday @ windowed.sum(axis=0),
+                (by_weekday @ windowed_capacity) * len(names),
+            ),
+            matriz=_percent(windowed, windowed_capacity) if detalhado else None,
+        )
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        return {"occupancy_rows": len(self._rows)}
+
+
+def parse_weekdays(value: str) -> List[int]:
+    """`WORK_WEEKDAYS` ("0,1,2,3,4,5", 0 = Monday) as a list of weekdays."""
+    weekdays = [int(part) for part in value.split(",") if part.strip()]
+    if any(day < 0 or day > 6 for day in weekdays):
+        raise ValueError(f"Invalid WORK_WEEKDAYS: {value!r}")
+    return weekdays
+
+
+__all__ = ["BUCKET_SIZES", "MAX_DAYS", "OccupancyService", "parse_weekdays"]
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import count
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..models.appointments import Appointment, AppointmentStatus
+from ..models.pacotes import (
+    Pacote,
+    PacoteCliente,
+    PacoteClienteCreate,
+    PacoteCreate,
+    ReconciliacaoPacotes,
+)
+from .hooks import AppointmentHooks
+from .servicos import MockServicoService
+
+
+class PacoteSemSaldo(ValueError):
+    """The package has no sessions left to consume."""
+
+
+class MockPacoteService(AppointmentHooks):
+    """
+    In-memory mock for `pacote` and `pacote_cliente`.
+
+    Sessions are consumed when a PACOTE appointment completes and refunded
+    when it leaves the completed status. Each consumption is keyed by
+    appointment id, so an appointment consumes at most one session no matter
+    how many times (or from how many devices) it is marked complete.
+
+    Every `pacote_cliente` has its own lock; consuming from one package never
+    waits on another. The registry lock is only taken to sell a package.
+    """
+
+    def __init__(self, servico_service: MockServicoService):
+        self._servico_service = servico_service
+
+        self._pacote_sequence = count(1)
+        self._pacotes: Dict[int, Pacote] = {}
+
+        self._pacote_cliente_sequence = count(1)
+        self._pacotes_cliente: Dict[int, PacoteCliente] = {}
+        self._locks: Dict[int, Lock] = {}
+        # pacote_cliente id -> appointment ids that consumed one of its sessions
+        self._consumed_by: Dict[int, Set[int]] = {}
+        # appointment id -> pacote_cliente id it consumed from
+        self._consumptions: Dict[int, int] = {}
+        # cliente_id -> package ids, in id order
+        self._by_cliente: Dict[int, List[int]] = defaultdict(list)
+        # (cliente_id, servico_id) -> package ids, oldest purchase first
+        self._by_cliente_servico: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        # Completed appointments that could not consume (no balance left)
+        self._sem_saldo: Set[int] = set()
+
+        self._registry_lock = Lock()
+
+    # Pacotes
+
+    def list_pacotes(self) -> Iterable[Pacote]:
+        return sorted(self._pacotes.values(), key=lambda p: p.id)
+
+    def get_pacote(self, pacote_id: int) -> Optional[Pacote]:
+        return self._pacotes.get(pacote_id)
+
+    def create_pacote(self, payload: PacoteCreate) -> Pacote:
+        identifier = next(self._pacote_sequence)
+        now = datetime.utcnow()
+        pacote = Pacote(id=identifier, created_at=now, updated_at=now, **payload.model_dump())
+        self._pacotes[identifier] = pacote
+        return pacote
+
+    # Pacotes de clientes
+
+    def list_pacotes_cliente(self, cliente_id: int) -> Iterable[PacoteCliente]:
+        return [self._pacotes_cliente[identifier] for identifier in self._by_cliente.get(cliente_id, ())]
+
+    def list_pacotes_clientes(self, cliente_ids: Iterable[int]) -> Dict[int, List[PacoteCliente]]:
+        """Packages of each client, ordered by id."""
+        return {cliente_id: list(self.list_pacotes_cliente(cliente_id)) for cliente_id in cliente_ids}
+
+    def get_pacote_cliente(self, pacote_cliente_id: int) -> Optional[PacoteCliente]:
+        return self._pacotes_cliente.get(pacote_cliente_id)
+
+    def sell_pacote(self, payload: PacoteClienteCreate) -> Optional[PacoteCliente]:
+        pacote = self._pacotes.get(payload.pacote_id)
+        if not pacote:
+            return None
+        now = datetime.utcnow()
+        with self._registry_lock:
+            identifier = next(self._pacote_cliente_sequence)
+            pacote_cliente = PacoteCliente(
+                id=identifier,
+                pacote_id=pacote.id,
+                servico_id=pacote.servico_id,
+                cliente_id=payload.cliente_id,
+                data_compra=payload.data_compra or date.today(),
+                quantidade_contratada=pacote.quantidade_sessoes,
+                valor_total=payload.valor_total if payload.valor_total is not None else pacote.valor_total,
+                observacoes=payload.observacoes,
+                created_at=now,
+                updated_at=now,
+            )
+            # Lock and consumption set exist before the package is visible.
+            self._locks[identifier] = Lock()
+            self._consumed_by[identifier] = set()
+            self._pacotes_cliente[identifier] = pacote_cliente
+            self._by_cliente[pacote_cliente.cliente_id].append(identifier)
+            active = self._by_cliente_servico[(pacote_cliente.cliente_id, pacote_cliente.servico_id)]
+            active.append(identifier)
+            active.sort(key=lambda pid: (self._pacotes_cliente[pid].data_compra, pid))
+        return pacote_cliente
+
+    def reassign_cliente(self, cliente_id: int, novo_cliente_id: int) -> List[PacoteCliente]:
+        """Move every package of `cliente_id` to `novo_cliente_id` (client merges)."""
+        moved: List[PacoteCliente] = []
+        with self._registry_lock:
+            identifiers = self._by_cliente.pop(cliente_id, [])
+            for identifier in identifiers:
+                with self._locks[identifier]:
+                    pacote_cliente = self._pacotes_cliente[identifier].model_copy(
+                        update={"cliente_id": novo_cliente_id, "updated_at": datetime.utcnow()}
+                    )
+                    self._pacotes_cliente[identifier] = pacote_cliente
+                moved.append(pacote_cliente)
+                active = self._by_cliente_servico[(novo_cliente_id, pacote_cliente.servico_id)]
+                active.append(identifier)
+                active.sort(key=lambda pid: (self._pacotes_cliente[pid].data_compra, pid))
+            for pacote_cliente in moved:
+                self._by_cliente_servico.pop((cliente_id, pacote_cliente.servico_id), None)
+            if identifiers:
+                self._by_cliente[novo_cliente_id] = sorted(self._by_cliente[novo_cliente_id] + identifiers)
+        return moved
+
+    def find_active(self, cliente_id: int, servico_id: int) -> Optional[PacoteCliente]:
+        """Oldest package of the client for the service that still has sessions."""
+        for identifier in list(self._by_cliente_servico.get((cliente_id, servico_id), ())):
+            pacote_cliente = self._pacotes_cliente[identifier]
+            if pacote_cliente.quantidade_disponivel > 0:
+                return pacote_cliente
+        return None
+
+    def resolve_for_appointment(self, appointment: Appointment) -> Optional[PacoteCliente]:
+        """Package an appointment of type PACOTE draws its session from."""
+        if appointment.pacote_cliente_id is not None:
+            return self._pacotes_cliente.get(appointment.pacote_cliente_id)
+        servico = self._servico_service.get_servico_by_nome(appointment.service)
+        if not servico:
+            return None
+        return self.find_active(appointment.client_id, servico.id)
+
+    def has_session_for(self, appointment: Appointment) -> bool:
+        """Whether completing `appointment` can consume (or already consumed) a session."""
+        if appointment.id in self._consumptions:
+            return True
+        pacote_cliente = self.resolve_for_appointment(appointment)
+        return pacote_cliente is not None and pacote_cliente.quantidade_disponivel > 0
+
+    def without_sessions(self, appointments: Iterable[Appointment]) -> Set[int]:
+        """
+        Ids of the PACOTE `appointments` that would find no session left if
+        all of them were completed together, drawing in order the way
+        `consume` does (oldest package first when none is pinned).
+        """
+        # pacote_cliente id -> sessions left after the appointments seen so far
+        remaining: Dict[int, int] = {}
+        seen: Set[int] = set()
+        missing: Set[int] = set()
+        for appointment in appointments:
+            if appointment.id in seen or appointment.id in self._consumptions:
+                continue
+            seen.add(appointment.id)
+            for pacote_cliente in self._candidates_for(appointment):
+                left = remaining.setdefault(pacote_cliente.id, pacote_cliente.quantidade_disponivel)
+                if left > 0:
+                    remaining[pacote_cliente.id] = left - 1
+                    break
+            else:
+                missing.add(appointment.id)
+        return missing
+
+    def _candidates_for(self, appointment: Appointment) -> List[PacoteCliente]:
+        if appointment.pacote_cliente_id is not None:
+            pacote_cliente = self._pacotes_cliente.get(appointment.pacote_cliente_id)
+            return [pacote_cliente] if pacote_cliente else []
+        servico = self._servico_service.get_servico_by_nome(appointment.service)
+        if not servico:
+            return []
+        return [
+            self._pacotes_cliente[identifier]
+            for identifier in list(self._by_cliente_servico.get((appointment.client_id, servico.id), ()))
+        ]
+
+    # Consumption
+
+    def consume(self, pacote_cliente_id: int, appointment_id: int) -> PacoteCliente:
+        """
+        Consume one session for `appointment_id`. Idempotent: an appointment
+        that already consumed from the package leaves it unchanged.
+        Raises `PacoteSemSaldo` when no session is left.
+        """
+        lock = self._locks.get(pacote_cliente_id)
+        if lock is None:
+            raise KeyError(pacote_cliente_id)
+        with lock:
+            pacote_cliente = self._pacotes_cliente[pacote_cliente_id]
+            consumed = self._consumed_by[pacote_cliente_id]
+            if appointment_id in consumed:
+                return pacote_cliente
+            if pacote_cliente.quantidade_disponivel <= 0:
+                raise PacoteSemSaldo(f"Pacote {pacote_cliente_id} has no sessions left")
+            consumed.add(appointment_id)
+            self._consumptions[appointment_id] = pacote_cliente_id
+            updated = self._with_usage(pacote_cliente, len(consumed))
+            self._pacotes_cliente[pacote_cliente_id] = updated
+        self._sem_saldo.discard(appointment_id)
+        return updated
+
+    def refund(self, appointment_id: int) -> Optional[PacoteCliente]:
+        """Give back the session consumed by `appointment_id`, if any."""
+        self._sem_saldo.discard(appointment_id)
+        pacote_cliente_id = self._consumptions.get(appointment_id)
+        if pacote_cliente_id is None:
+            return None
+        with self._locks[pacote_cliente_id]:
+            consumed = self._consumed_by[pacote_cliente_id]
+            if appointment_id not in consumed:
+                return self._pacotes_cliente[pacote_cliente_id]
+            consumed.discard(appointment_id)
+            self._consumptions.pop(appointment_id, None)
+            updated = self._with_usage(self._pacotes_cliente[pacote_cliente_id], len(consumed))
+            self._pacotes_cliente[pacote_cliente_id] = updated
+        return updated
+
+    def _with_usage(self, pacote_cliente: PacoteCliente, utilizada: int) -> PacoteCliente:
+        # Callers hold the package lock.
+        por_sessao = pacote_cliente.valor_total / pacote_cliente.quantidade_contratada
+        return pacote_cliente.model_copy(
+            update={
+                "quantidade_utilizada": utilizada,
+                "valor_utilizado": (por_sessao * utilizada).quantize(Decimal("0.01")),
+                "updated_at": datetime.utcnow(),
+            }
+        )
+
+    # Appointment hooks
+
+    def appointment_status_changed(self, previous: Appointment, updated: Appointment) -> None:
+        if updated.tipo != "PACOTE" or previous.status == updated.status:
+            return
+        if updated.status == AppointmentStatus.completed:
+            self._consume_for(updated)
+        elif previous.status == AppointmentStatus.completed:
+            self.refund(updated.id)
+
+    def _consume_for(self, appointment: Appointment) -> bool:
+        pacote_cliente = self.resolve_for_appointment(appointment)
+        if pacote_cliente is None:
+            self._sem_saldo.add(appointment.id)
+            return False
+        try:
+            self.consume(pacote_cliente.id, appointment.id)
+        except PacoteSemSaldo:
+            # Hooks must not raise; left for the end-of-day reconciliation.
+            self._sem_saldo.add(appointment.id)
+            return False
+        return True
+
+    # Reconciliation
+
+    def reconcile(self, appointments: Iterable[Appointment]) -> ReconciliacaoPacotes:
+        """
+        Bulk end-of-day pass over PACOTE appointments: consume sessions for
+        completed appointments that have none, refund sessions of
+        appointments that are no longer completed, and fix any package whose
+        `quantidade_utilizada` drifted from its consumption records.
+        """
+        resultado = ReconciliacaoPacotes()
+        completed: Set[int] = set()
+        for appointment in appointments:
+            if appointment.tipo != "PACOTE":
+                continue
+            if appointment.status == AppointmentStatus.completed:
+                completed.add(appointment.id)
+                if appointment.id not in self._consumptions:
+                    if self._consume_for(appointment):
+                        resultado.consumos_aplicados.append(appointment.id)
+                    else:
+                        resultado.sem_saldo.append(appointment.id)
+            elif appointment.id in self._consumptions:
+                self.refund(appointment.id)
+                resultado.consumos_estornados.append(appointment.id)
+
+        for pacote_cliente_id, lock in list(self._locks.items()):
+            with lock:
+                pacote_cliente = self._pacotes_cliente[pacote_cliente_id]
+                consumed = self._consumed_by[pacote_cliente_id]
+                if pacote_cliente.quantidade_utilizada != len(consumed):
+                    self._pacotes_cliente[pacote_cliente_id] = self._with_usage(pacote_cliente, len(consumed))
+                    resultado.pacotes_corrigidos.append(pacote_cliente_id)
+
+        resultado.sem_saldo = sorted(set(resultado.sem_saldo) | (self._sem_saldo & completed))
+        return resultado
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        return {"pacotes": len(self._pacotes), "pacotes_cliente": len(self._pacotes_cliente)}
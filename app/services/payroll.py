@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models.appointments import Appointment, AppointmentStatus
+from ..models.funcionarios import Funcionario
+from ..models.payroll import FolhaPagamento
+from .appointments import InMemoryAppointmentService
+from .funcionarios import MockFuncionarioService
+from .pricing import effective_price
+from .servicos import MockServicoService
+
+CENTS = Decimal("0.01")
+
+
+def competencia_bounds(competencia: date) -> Tuple[datetime, datetime]:
+    """Return the `[start, end)` datetimes covering the month of `competencia`."""
+    start = datetime(competencia.year, competencia.month, 1)
+    if competencia.month == 12:
+        end = datetime(competencia.year + 1, 1, 1)
+    else:
+        end = datetime(competencia.year, competencia.month + 1, 1)
+    return start, end
+
+
+@dataclass
+class _PayrollSnapshot:
+    """Per-competencia state kept between runs so re-runs can be incremental."""
+
+    appointment_revision: int = 0
+    funcionario_revision: int = -1
+    servico_revision: int = -1
+    # appointment id -> (funcionario_id, valor, comissao)
+    lines: Dict[int, Tuple[int, Decimal, Decimal]] = field(default_factory=dict)
+    # funcionario_id -> [quantidade, valor, comissao]
+    totals: Dict[int, List] = field(default_factory=dict)
+
+    def add(self, appointment_id: int, line: Tuple[int, Decimal, Decimal]) -> None:
+        self.lines[appointment_id] = line
+        funcionario_id, valor, comissao = line
+        total = self.totals.setdefault(funcionario_id, [0, Decimal("0.00"), Decimal("0.00")])
+        total[0] += 1
+        total[1] += valor
+        total[2] += comissao
+
+    def remove(self, appointment_id: int) -> None:
+        line = self.lines.pop(appointment_id, None)
+        if line is None:
+            return
+        funcionario_id, valor, comissao = line
+        total = self.totals[funcionario_id]
+        total[0] -= 1
+        total[1] -= valor
+        total[2] -= comissao
+
+
+class PayrollService:
+    """
+    Computes `folha_pagamento_profissional` rows: fixed salary plus commission
+    over completed appointments of the competencia (month).
+
+    The first run for a competencia makes a single pass over the appointment
+    time index. Later runs only revisit appointments changed since the previous
+    run, unless staff or catalog data changed, in which case it runs in full.
+    """
+
+    def __init__(
+        self,
+        appointment_service: InMemoryAppointmentService,
+        funcionario_service: MockFuncionarioService,
+        servico_service: MockServicoService,
+    ):
+        self._appointment_service = appointment_service
+        self._funcionario_service = funcionario_service
+        self._servico_service = servico_service
+        self._snapshots: Dict[date, _PayrollSnapshot] = {}
+        # folha rows keyed by competencia, then funcionario_id
+        self._folhas: Dict[date, Dict[int, FolhaPagamento]] = {}
+        self._lock = Lock()
+
+    def list_folhas(self, competencia: date) -> Iterable[FolhaPagamento]:
+        rows = self._folhas.get(competencia.replace(day=1), {})
+        return sorted(rows.values(), key=lambda row: row.funcionario_id)
+
+    def run_payroll(self, competencia: date, *, full: bool = False) -> List[FolhaPagamento]:
+        competencia = competencia.replace(day=1)
+        with self._lock:
+            snapshot = self._snapshots.get(competencia)
+            stale = (
+                snapshot is None
+                or snapshot.funcionario_revision != self._funcionario_service.revision
+                or snapshot.servico_revision != self._servico_service.revision
+            )
+            if full or stale:
+                snapshot = self._compute_full(competencia)
+            else:
+                self._apply_changes(competencia, snapshot)
+            self._snapshots[competencia] = snapshot
+            return self._write_batch(competencia, snapshot)
+
+    def _compute_full(self, competencia: date) -> _PayrollSnapshot:
+        snapshot = _PayrollSnapshot(
+            appointment_revision=self._appointment_service.revision,
+            funcionario_revision=self._funcionario_service.revision,
+            servico_revision=self._servico_service.revision,
+        )
+        staff_by_nome = self._staff_by_nome()
+        start, end = competencia_bounds(competencia)
+        for appointment in self._appointment_service.list_appointments_between(start, end):
+            line = self._line_for(appointment, staff_by_nome)
+            if line:
+                snapshot.add(appointment.id, line)
+        return snapshot
+
+    def _apply_changes(self, competencia: date, snapshot: _PayrollSnapshot) -> None:
+        changed = self._appointment_service.changed_since(snapshot.appointment_revision)
+        snapshot.appointment_revision = self._appointment_service.revision
+        if not changed:
+            return
+
+        staff_by_nome = self._staff_by_nome()
+        start, end = competencia_bounds(competencia)
+        for appointment_id in changed:
+            snapshot.remove(appointment_id)
+            appointment = self._appointment_service.get_appointment(appointment_id)
+            if not appointment or not (start <= appointment.start_time < end):
+                continue
+            line = self._line_for(appointment, staff_by_nome)
+            if line:
+                snapshot.add(appointment_id, line)
+
+    def _staff_by_nome(self) -> Dict[str, Funcionario]:
+        # Appointments still reference staff by name; resolve once per run.
+        return {f.nome: f for f in self._funcionario_service.list_funcionarios()}
+
+    def _line_for(
+        self,
+        appointment: Appointment,
+        staff_by_nome: Dict[str, Funcionario],
+    ) -> Optional[Tuple[int, Decimal, Decimal]]:
+        if appointment.status != AppointmentStatus.completed:
+            return None
+        funcionario = staff_by_nome.get(appointment.staff_member)
+        servico = self._servico_service.get_servico_by_nome(appointment.service)
+        if funcionario is None or servico is None:
+            return None
+
+        price = effective_price(
+            funcionario.id, servico, self._funcionario_service.get_funcionario_servico(funcionario.id, servico.id)
+        )
+        valor = price.preco
+        comissao = Decimal("0.00")
+        if funcionario.elegivel_comissao:
+            comissao = (valor * price.comissao_percentual / Decimal("100")).quantize(CENTS)
+        return funcionario.id, valor, comissao
+
+    def _write_batch(self, competencia: date, snapshot: _PayrollSnapshot) -> List[FolhaPagamento]:
+        now = datetime.utcnow()
+        previous = self._folhas.get(competencia, {})
+        rows: Dict[int, FolhaPagamento] = {}
+
+        for funcionario in self._funcionario_service.list_funcionarios():
+            quantidade, valor, comissao = snapshot.totals.get(
+                funcionario.id, [0, Decimal("0.00"), Decimal("0.00")]
+            )
+            if not funcionario.ativo and not quantidade:
+                continue
+            salario = funcionario.salario_fixo_mensal
+            existing = previous.get(funcionario.id)
+            rows[funcionario.id] = FolhaPagamento(
+                funcionario_id=funcionario.id,
+                competencia=competencia,
+                salario_fixo=salario,
+                quantidade_atendimentos=quantidade,
+                valor_atendimentos=valor.quantize(CENTS),
+                total_comissao=comissao.quantize(CENTS),
+                total_bruto=(salario + comissao).quantize(CENTS),
+                created_at=existing.created_at if existing else now,
+                updated_at=now,
+            )
+
+        # Replace the whole competencia at once so readers never see a partial run.
+        self._folhas[competencia] = rows
+        return sorted(rows.values(), key=lambda row: row.funcionario_id)
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        return {"folhas": sum(len(rows) for rows in self._folhas.values())}
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Optional
+
+from ..models.appointments import Appointment
+from ..models.funcionarios import FuncionarioServico
+from ..models.servicos import Servico
+from .funcionarios import MockFuncionarioService
+from .servicos import MockServicoService
+
+
+@dataclass(frozen=True)
+class ServicePrice:
+    """Effective price/duration/commission of a service performed by a funcionario."""
+
+    funcionario_id: int
+    servico_id: int
+    preco: Decimal
+    duracao_min: int
+    comissao_percentual: Decimal
+
+
+def effective_price(funcionario_id: int, servico: Servico, override: Optional[FuncionarioServico]) -> ServicePrice:
+    """Price of `servico` by a funcionario, applying their `funcionario_servico` override if any."""
+    preco = servico.preco_base
+    duracao = servico.duracao_base_min
+    comissao = Decimal("0.00")
+    if override:
+        # A zero price means "not set" for the funcionario (NULL in the schema).
+        if override.preco_base_funcionario:
+            preco = override.preco_base_funcionario
+        if override.duracao_base_min_func:
+            duracao = override.duracao_base_min_func
+        comissao = override.comissao_percentual
+
+    return ServicePrice(
+        funcionario_id=funcionario_id,
+        servico_id=servico.id,
+        preco=preco,
+        duracao_min=duracao,
+        comissao_percentual=comissao,
+    )
+
+
+class ServicePriceResolver:
+    """
+    Resolves `funcionario_servico` overrides, falling back to the `servico`
+    base values when the funcionario has no specific price or duration.
+    """
+
+    def __init__(
+        self,
+        funcionario_service: MockFuncionarioService,
+        servico_service: MockServicoService,
+    ):
+        self._funcionario_service = funcionario_service
+        self._servico_service = servico_service
+
+    def resolve_appointment(self, appointment: Appointment) -> Optional[ServicePrice]:
+        """Resolve the price of an appointment, which references staff and service by name."""
+        funcionario = self._funcionario_service.get_funcionario_by_nome(appointment.staff_member)
+        servico = self._servico_service.get_servico_by_nome(appointment.service)
+        if not funcionario or not servico:
+            return None
+        return self.resolve(funcionario.id, servico.id)
+
+    def resolve(self, funcionario_id: int, servico_id: int) -> Optional[ServicePrice]:
+        servico = self._servico_service.get_servico(servico_id)
+        if not servico:
+            return None
+
+        override = self._funcionario_service.get_funcionario_servico(funcionario_id, servico_id)
+        return effective_price(funcionario_id, servico, override)
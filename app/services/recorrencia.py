@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from itertools import count
+from threading import RLock
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..models.appointments import AppointmentCreate, AppointmentStatus
+from ..models.recorrencia import (
+    AgendamentoRecorrente,
+    AgendamentoRecorrenteCreate,
+    AgendamentoRecorrenteUpdate,
+    MaterializacaoResultado,
+    OcorrenciaRecorrente,
+)
+from .appointments import InMemoryAppointmentService
+from .funcionarios import MockFuncionarioService
+from .servicos import MockServicoService
+
+
+def iter_occurrence_dates(rule: AgendamentoRecorrente, start: date, end: date) -> Iterator[date]:
+    """Lazily yield the dates in `[start, end)` on which `rule` occurs."""
+    first = max(start, rule.data_inicio)
+    last = end if rule.data_fim is None else min(end, rule.data_fim + timedelta(days=1))
+    # Schema uses 0=domingo; Python's weekday() uses 0=monday.
+    weekday = (rule.dia_semana - 1) % 7
+    current = first + timedelta(days=(weekday - first.weekday()) % 7)
+    while current < last:
+        yield current
+        current += timedelta(days=7)
+
+
+def occurrence_bounds(rule: AgendamentoRecorrente, dia: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(dia, rule.hora_inicio)
+    return start, start + timedelta(minutes=rule.duracao_minutos)
+
+
+def _week_key(dia: date) -> date:
+    # Weekly rules have at most one occurrence per week, so materialized
+    # occurrences are keyed by week: changing the weekday reschedules them.
+    return dia - timedelta(days=dia.weekday())
+
+
+class RecurringAppointmentService:
+    """
+    In-memory mock for `agendamento_recorrente`.
+
+    Rules are stored compactly and expanded lazily for any window. Concrete
+    appointments are only materialized up to a rolling horizon; editing a rule
+    reschedules, cancels or creates just the future occurrences that changed.
+    """
+
+    def __init__(
+        self,
+        appointment_service: InMemoryAppointmentService,
+        funcionario_service: MockFuncionarioService,
+        servico_service: MockServicoService,
+        *,
+        horizon_days: int = 28,
+    ):
+        self._appointment_service = appointment_service
+        self._funcionario_service = funcionario_service
+        self._servico_service = servico_service
+        self.horizon_days = horizon_days
+
+        self._id_sequence = count(1)
+        self._rules: Dict[int, AgendamentoRecorrente] = {}
+        # rule id -> week key -> materialized appointment id
+        self._materialized: Dict[int, Dict[date, int]] = {}
+        # rule id -> date up to which (exclusive) occurrences were materialized
+        self._horizon: Dict[int, date] = {}
+        # rule id -> first occurrence before the horizon left without an
+        # appointment (conflict, missing staff or service); retried next run.
+        self._retry_from: Dict[int, date] = {}
+        self._lock = RLock()
+
+    # Rules
+
+    def list_rules(self) -> Iterable[AgendamentoRecorrente]:
+        return sorted(self._rules.values(), key=lambda rule: rule.id)
+
+    def get_rule(self, rule_id: int) -> Optional[AgendamentoRecorrente]:
+        return self._rules.get(rule_id)
+
+    def create_rule(self, payload: AgendamentoRecorrenteCreate) -> AgendamentoRecorrente:
+        with self._lock:
+            identifier = next(self._id_sequence)
+            now = datetime.utcnow()
+            rule = AgendamentoRecorrente(id=identifier, created_at=now, updated_at=now, **payload.model_dump())
+            self._rules[identifier] = rule
+            self._materialized[identifier] = {}
+        return rule
+
+    def update_rule(
+        self,
+        rule_id: int,
+        payload: AgendamentoRecorrenteUpdate,
+        *,
+        today: Optional[date] = None,
+    ) -> Optional[Tuple[AgendamentoRecorrente, MaterializacaoResultado]]:
+        """Raises `ValueError` (a pydantic `ValidationError`) if the updated rule is invalid."""
+        today = today or date.today()
+        with self._lock:
+            existing = self._rules.get(rule_id)
+            if not existing:
+                return None
+            # Validated as a whole before it replaces the stored rule.
+            rule = AgendamentoRecorrente.model_validate(
+                {**existing.model_dump(), **payload.model_dump(exclude_unset=True), "updated_at": datetime.utcnow()}
+            )
+            self._rules[rule_id] = rule
+            return rule, self._resync_future(rule, today)
+
+    def reassign_cliente(self, cliente_id: int, novo_cliente_id: int) -> List[AgendamentoRecorrente]:
+        """
+        Move the rules of `cliente_id` to `novo_cliente_id` (client merges).
+        Occurrences already materialized are moved with the appointments.
+        """
+        moved: List[AgendamentoRecorrente] = []
+        with self._lock:
+            for rule in list(self._rules.values()):
+                if rule.cliente_id == cliente_id:
+                    updated = rule.model_copy(update={"cliente_id": novo_cliente_id, "updated_at": datetime.utcnow()})
+                    self._rules[rule.id] = updated
+                    moved.append(updated)
+        return moved
+
+    # Occurrences
+
+    def iter_occurrences(self, rule_id: int, start: date, end: date) -> Iterator[OcorrenciaRecorrente]:
+        """Lazily expand a rule over `[start, end)`, linking materialized appointments."""
+        rule = self._rules.get(rule_id)
+        if not rule:
+            return
+        materialized = self._materialized.get(rule_id, {})
+        for dia in iter_occurrence_dates(rule, start, end):
+            start_time, end_time = occurrence_bounds(rule, dia)
+            yield OcorrenciaRecorrente(
+                agendamento_recorrente_id=rule_id,
+                start_time=start_time,
+                end_time=end_time,
+                appointment_id=materialized.get(_week_key(dia)),
+            )
+
+    def materialize(
+        self,
+        *,
+        today: Optional[date] = None,
+        rule_ids: Optional[Iterable[int]] = None,
+    ) -> MaterializacaoResultado:
+        """Create appointments for active rules up to `today + horizon_days`."""
+        today = today or date.today()
+        horizon = today + timedelta(days=self.horizon_days)
+        resultado = MaterializacaoResultado()
+        with self._lock:
+            ids = list(rule_ids) if rule_ids is not None else list(self._rules)
+            for rule_id in ids:
+                rule = self._rules.get(rule_id)
+                if not rule or not rule.ativo:
+                    continue
+                start = max(today, self._retry_from.get(rule_id, self._horizon.get(rule_id, today)))
+                if start >= horizon:
+                    continue
+                pending = self._create_occurrences(rule, iter_occurrence_dates(rule, start, horizon), resultado)
+                self._horizon[rule_id] = max(horizon, self._horizon.get(rule_id, horizon))
+                self._set_retry(rule_id, pending)
+        return resultado
+
+    # Internals (callers hold the lock)
+
+    def _appointment_fields(self, rule: AgendamentoRecorrente) -> Optional[Tuple[str, str]]:
+        funcionario = self._funcionario_service.get_funcionario(rule.profissional_id)
+        servico = self._servico_service.get_servico(rule.servico_id)
+        if not funcionario or not servico:
+            return None
+        return funcionario.nome, servico.nome
+
+    def _create_occurrences(
+        self,
+        rule: AgendamentoRecorrente,
+        dates: Iterable[date],
+        resultado: MaterializacaoResultado,
+    ) -> Optional[date]:
+        """Materialize `dates` (ascending); returns the first one left without an appointment."""
+        dates = list(dates)
+        fields = self._appointment_fields(rule)
+        if fields is None:
+            return dates[0] if dates else None
+        staff_member, service = fields
+        materialized = self._materialized.setdefault(rule.id, {})
+
+        requests: List[AppointmentCreate] = []
+        weeks: List[date] = []
+        pending: Optional[date] = None
+        for dia in dates:
+            week = _week_key(dia)
+            if week in materialized:
+                continue
+            start_time, end_time = occurrence_bounds(rule, dia)
+            if self._appointment_service.find_conflicts(staff_member, start_time, end_time):
+                resultado.conflitos.append(
+                    OcorrenciaRecorrente(agendamento_recorrente_id=rule.id, start_time=start_time, end_time=end_time)
+                )
+                pending = pending or dia
+                continue
+            requests.append(
+                AppointmentCreate(
+                    client_id=rule.cliente_id,
+                    staff_member=staff_member,
+                    service=service,
+                    start_time=start_time,
+                    end_time=end_time,
+                )
+            )
+            weeks.append(week)
+
+        created = self._appointment_service.bulk_create_appointments(
+            requests,
+            agendamento_recorrente_id=rule.id,
+        )
+        for week, appointment in zip(weeks, created):
+            materialized[week] = appointment.id
+        resultado.criados += len(created)
+        return pending
+
+    def _resync_future(self, rule: AgendamentoRecorrente, today: date) -> MaterializacaoResultado:
+        resultado = MaterializacaoResultado()
+        window_end = self._horizon.get(rule.id, today)
+        desired: Dict[date, date] = {}
+        if rule.ativo:
+            desired = {_week_key(dia): dia for dia in iter_occurrence_dates(rule, today, window_end)}
+        fields = self._appointment_fields(rule)
+        materialized = self._materialized.setdefault(rule.id, {})
+
+        for week, appointment_id in list(materialized.items()):
+            appointment = self._appointment_service.get_appointment(appointment_id)
+            if (
+                not appointment
+                or appointment.start_time.date() < today
+                or appointment.status != AppointmentStatus.scheduled
+            ):
+                desired.pop(week, None)
+                continue
+
+            dia = desired.pop(week, None)
+            if dia is None or fields is None:
+                self._appointment_service.update_status(appointment_id, AppointmentStatus.canceled)
+                del materialized[week]
+                resultado.cancelados += 1
+                continue
+
+            staff_member, service = fields
+            start_time, end_time = occurrence_bounds(rule, dia)
+            changes = {
+                "staff_member": staff_member,
+                "service": service,
+                "start_time": start_time,
+                "end_time": end_time,
+            }
+            if all(getattr(appointment, key) == value for key, value in changes.items()):
+                continue
+            if self._appointment_service.find_conflicts(staff_member, start_time, end_time, ignore_id=appointment_id):
+                resultado.conflitos.append(
+                    OcorrenciaRecorrente(
+                        agendamento_recorrente_id=rule.id,
+                        start_time=start_time,
+                        end_time=end_time,
+                        appointment_id=appointment_id,
+                    )
+                )
+                continue
+            self._appointment_service.update_appointment(appointment_id, **changes)
+            resultado.atualizados += 1
+
+        # Weeks in the materialized window that had no occurrence before.
+        self._set_retry(rule.id, self._create_occurrences(rule, sorted(desired.values()), resultado))
+        return resultado
+
+    def _set_retry(self, rule_id: int, pending: Optional[date]) -> None:
+        if pending is None:
+            self._retry_from.pop(rule_id, None)
+        else:
+            self._retry_from[rule_id] = pending
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        return {"regras": len(self._rules)}
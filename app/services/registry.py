@@ -0,0 +1,383 @@
+"""
+Shared service instances.
+
+Routers use their services from here so every router works on the same
+in-memory stores (e.g. appointments created through `/appointments` show up
+in `/clients/{id}/appointments` and in staff agendas).
+
+Stores are partitioned by tenant: every `empresa` gets its own `Services`
+(stores, indexes, caches, counters, event bus and scheduler), and
+`registry.<service>` resolves to the services of the empresa current for the
+request (`app.core.tenancy.current_empresa`, set by the auth layer), or of
+the default empresa outside requests. Only users are shared, since logging
+in is what selects the empresa, along with the audit log, whose records
+carry their empresa.
+
+Services are built lazily: importing this module (and therefore importing
+the routers) does not create any store or seed data. The application builds
+them during its lifespan startup through `get_services()`; scripts and
+tooling get the same instances on first attribute access
+(`registry.appointment_service`). Route code must therefore reach services
+through the module (`registry.client_service.get_client(...)`) at call time
+instead of binding them with `from registry import ...` at import time
+(which would also pin them to one tenant).
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, fields
+from datetime import timedelta
+from threading import Lock
+from typing import Any, Dict, Optional, Union
+
+from ..core.config import Settings, get_settings
+from ..core.metrics import instrument_service, register_store_sizes
+from ..core.scheduler import FileLeaseStore, InMemoryLeaseStore, Scheduler
+from ..core.tenancy import current_empresa
+from .appointments import InMemoryAppointmentService
+from .audit import AuditHooks, AuditLog, FileAuditSink, MemoryAuditSink, register_audit_metrics
+from .caching import CachedService, register_cache_metrics
+from .catalog import CatalogService
+from .clients import CLIENT_CACHE_SPEC, MockClientService
+from .dashboard import DashboardCounters
+from .dedup import ClientDedupService
+from .events import EventBus, EventBusHooks
+from .financeiro import MockFinanceiroService
+from .funcionarios import FUNCIONARIO_CACHE_SPEC, MockFuncionarioService
+from .jobs import ScheduledJobs
+from .leads import LeadIntake, MockLeadService, register_lead_metrics
+from .occupancy import OccupancyService, parse_weekdays
+from .pacotes import MockPacoteService
+from .payroll import PayrollService
+from .pricing import ServicePriceResolver
+from .recorrencia import RecurringAppointmentService
+from .reminders import ReminderService
+from .servicos import SERVICO_CACHE_SPEC, MockServicoService
+from .users import InMemoryUserService
+
+
+@dataclass
+class Services:
+    appointment_service: InMemoryAppointmentService
+    client_service: Union[MockClientService, CachedService]
+    funcionario_service: Union[MockFuncionarioService, CachedService]
+    servico_service: Union[MockServicoService, CachedService]
+    user_service: InMemoryUserService
+    financeiro_service: MockFinanceiroService
+    reminder_service: ReminderService
+    price_resolver: ServicePriceResolver
+    payroll_service: PayrollService
+    recurring_service: RecurringAppointmentService
+    pacote_service: MockPacoteService
+    dashboard_counters: DashboardCounters
+    event_bus: EventBus
+    scheduler: Scheduler
+    scheduled_jobs: ScheduledJobs
+    lead_service: MockLeadService
+    lead_intake: LeadIntake
+    dedup_service: ClientDedupService
+    occupancy_service: OccupancyService
+    catalog_service: CatalogService
+    audit_log: Optional[AuditLog] = None
+
+
+def build_services(
+    settings: Optional[Settings] = None,
+    *,
+    empresa_id: Optional[int] = None,
+    user_service: Optional[InMemoryUserService] = None,
+    audit_log: Optional[AuditLog] = None,
+) -> Services:
+    """
+    Create every service of one empresa and wire caches, hooks, scheduled
+    jobs and instrumentation. Pass `user_service` to share users between
+    tenants (it is then neither instrumented nor measured again), and
+    `audit_log` to record this empresa's mutations there.
+    """
+    settings = settings or get_settings()
+    empresa_id = settings.default_empresa_id if empresa_id is None else empresa_id
+
+    appointment_service = InMemoryAppointmentService()
+    client_service = MockClientService()
+    funcionario_service = MockFuncionarioService()
+    servico_service = MockServicoService()
+    financeiro_service = MockFinanceiroService()
+    lead_service = MockLeadService()
+
+    instrumented = {
+        "appointments": appointment_service,
+        "clients": client_service,
+        "funcionarios": funcionario_service,
+        "servicos": servico_service,
+        "financeiro": financeiro_service,
+        "leads": lead_service,
+    }
+    if user_service is None:
+        user_service = instrumented["users"] = InMemoryUserService()
+    if settings.metrics_enabled:
+        # Before the caches wrap them, so the timings are storage calls (misses).
+        for name, service in instrumented.items():
+            instrument_service(service, name, exclude=("register_hook", "store_sizes"))
+
+    if settings.cache_enabled:
+        cache_options = dict(max_size=settings.cache_max_size, ttl=settings.cache_ttl_seconds)
+        client_service = CachedService(client_service, CLIENT_CACHE_SPEC, "clients", **cache_options)
+        funcionario_service = CachedService(
+            funcionario_service, FUNCIONARIO_CACHE_SPEC, "funcionarios", **cache_options
+        )
+        servico_service = CachedService(servico_service, SERVICO_CACHE_SPEC, "servicos", **cache_options)
+        if settings.metrics_enabled:
+            register_cache_metrics(
+                (service.cache for service in (client_service, funcionario_service, servico_service)),
+                empresa=str(empresa_id),
+            )
+
+    reminder_service = ReminderService(appointment_service)
+    price_resolver = ServicePriceResolver(funcionario_service, servico_service)
+    payroll_service = PayrollService(appointment_service, funcionario_service, servico_service)
+
+    recurring_service = RecurringAppointmentService(
+        appointment_service,
+        funcionario_service,
+        servico_service,
+        horizon_days=settings.recurring_horizon_days,
+    )
+
+    pacote_service = MockPacoteService(servico_service)
+    appointment_service.register_hook(pacote_service)
+
+    catalog_service = CatalogService(funcionario_service, servico_service, client_service, pacote_service)
+    funcionario_service.register_hook(catalog_service)
+    servico_service.register_hook(catalog_service)
+
+    dashboard_counters = DashboardCounters(appointment_service, client_service, price_resolver)
+    appointment_service.register_hook(dashboard_counters)
+    client_service.register_hook(dashboard_counters)
+
+    event_bus = EventBus(
+        history_size=settings.event_history_size,
+        queue_size=settings.event_queue_size,
+    )
+    event_bus_hooks = EventBusHooks(event_bus)
+    appointment_service.register_hook(event_bus_hooks)
+    client_service.register_hook(event_bus_hooks)
+
+    dedup_service = ClientDedupService(
+        client_service,
+        appointment_service,
+        pacote_service,
+        recurring_service,
+        financeiro_service,
+        min_score=settings.dedup_min_score,
+        max_block_size=settings.dedup_max_block_size,
+    )
+    client_service.register_hook(dedup_service)
+
+    occupancy_service = OccupancyService(
+        appointment_service,
+        funcionario_service,
+        work_start=settings.work_day_start,
+        work_end=settings.work_day_end,
+        weekdays=parse_weekdays(settings.work_weekdays),
+    )
+
+    scheduler = Scheduler(
+        lease_store=(
+            # Job keys repeat across tenants, so each gets its own leases.
+            FileLeaseStore(os.path.join(settings.scheduler_lease_dir, f"empresa-{empresa_id}"))
+            if settings.scheduler_lease_dir
+            else InMemoryLeaseStore()
+        ),
+        lease_ttl=settings.scheduler_lease_ttl_seconds,
+    )
+    scheduled_jobs = ScheduledJobs(
+        scheduler,
+        appointment_service=appointment_service,
+        financeiro_service=financeiro_service,
+        reminder_service=reminder_service,
+        recurring_service=recurring_service,
+        payroll_service=payroll_service,
+        pacote_service=pacote_service,
+        dedup_service=dedup_service,
+        auto_complete_lookback=(
+            timedelta(days=settings.auto_complete_lookback_days) if settings.auto_complete_enabled else None
+        ),
+        status_batch_size=settings.status_batch_size,
+    )
+    appointment_service.register_hook(scheduled_jobs)
+
+    lead_intake = LeadIntake(
+        lead_service,
+        client_service,
+        buffer_size=settings.lead_buffer_size,
+        batch_size=settings.lead_batch_size,
+        flush_interval=settings.lead_flush_interval_seconds,
+        empresa=str(empresa_id),
+    )
+
+    if audit_log is not None:
+        audit_hooks = AuditHooks(audit_log, empresa_id)
+        appointment_service.register_hook(audit_hooks)
+        client_service.register_hook(audit_hooks)
+        funcionario_service.register_hook(audit_hooks)
+
+    if settings.metrics_enabled:
+        late = {
+            "reminders": reminder_service,
+            "payroll": payroll_service,
+            "recorrencias": recurring_service,
+            "pacotes": pacote_service,
+            "dedup": dedup_service,
+            "ocupacao": occupancy_service,
+            "catalogo": catalog_service,
+        }
+        for name, service in late.items():
+            instrument_service(service, name, exclude=("register_hook", "store_sizes"))
+        instrumented.update(late)
+        register_store_sizes(
+            {name: service.store_sizes for name, service in instrumented.items()},
+            empresa=str(empresa_id),
+        )
+        register_lead_metrics(lead_intake, empresa=str(empresa_id))
+
+    return Services(
+        appointment_service=appointment_service,
+        client_service=client_service,
+        funcionario_service=funcionario_service,
+        servico_service=servico_service,
+        user_service=user_service,
+        financeiro_service=financeiro_service,
+        reminder_service=reminder_service,
+        price_resolver=price_resolver,
+        payroll_service=payroll_service,
+        recurring_service=recurring_service,
+        pacote_service=pacote_service,
+        dashboard_counters=dashboard_counters,
+        event_bus=event_bus,
+        scheduler=scheduler,
+        scheduled_jobs=scheduled_jobs,
+        lead_service=lead_service,
+        lead_intake=lead_intake,
+        dedup_service=dedup_service,
+        occupancy_service=occupancy_service,
+        catalog_service=catalog_service,
+        audit_log=audit_log,
+    )
+
+
+def build_audit_log(settings: Optional[Settings] = None) -> Optional[AuditLog]:
+    """The audit log described by `settings`, or `None` when auditing is off."""
+    settings = settings or get_settings()
+    if not settings.audit_enabled:
+        return None
+    if settings.audit_dir:
+        sink = FileAuditSink(settings.audit_dir, settings.audit_max_bytes, settings.audit_backup_count)
+    else:
+        sink = MemoryAuditSink(settings.audit_memory_records)
+    audit_log = AuditLog(
+        sink,
+        queue_size=settings.audit_queue_size,
+        overflow=settings.audit_overflow,
+        batch_size=settings.audit_batch_size,
+        flush_interval=settings.audit_flush_interval_seconds,
+        block_timeout=settings.audit_block_timeout_seconds,
+    )
+    if settings.metrics_enabled:
+        register_audit_metrics(audit_log)
+    return audit_log
+
+
+_SERVICE_NAMES = frozenset(field.name for field in fields(Services))
+_tenants: Dict[int, Services] = {}
+_default_empresa_id: Optional[int] = None
+_user_service: Optional[InMemoryUserService] = None
+_audit_log: Optional[AuditLog] = None
+_build_lock = Lock()
+
+
+def get_services(empresa_id: Optional[int] = None) -> Services:
+    """
+    Return the services of `empresa_id` (default: the current empresa),
+    building them on the first call.
+    """
+    global _default_empresa_id, _user_service
+    if empresa_id is None:
+        empresa_id = current_empresa.get()
+        if empresa_id is None:
+            empresa_id = _default_empresa_id
+    services = _tenants.get(empresa_id) if empresa_id is not None else None
+    if services is None:
+        with _build_lock:
+            settings = get_settings()
+            if _default_empresa_id is None:
+                _default_empresa_id = settings.default_empresa_id
+            if empresa_id is None:
+                empresa_id = _default_empresa_id
+            services = _tenants.get(empresa_id)
+            if services is None:
+                services = build_services(
+                    settings,
+                    empresa_id=empresa_id,
+                    user_service=_user_service,
+                    audit_log=_shared_audit_log(settings),
+                )
+                _user_service = services.user_service
+                _tenants[empresa_id] = services
+    return services
+
+
+def _shared_audit_log(settings: Settings) -> Optional[AuditLog]:
+    # Called with `_build_lock` held.
+    global _audit_log
+    if _audit_log is None:
+        _audit_log = build_audit_log(settings)
+    return _audit_log
+
+
+def get_audit_log() -> Optional[AuditLog]:
+    """The audit log shared by every empresa, or `None` when auditing is off."""
+    with _build_lock:
+        return _shared_audit_log(get_settings())
+
+
+def built_tenants() -> Dict[int, Services]:
+    """Services of every empresa built so far, by empresa id."""
+    return dict(_tenants)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _SERVICE_NAMES:
+        return getattr(get_services(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "Services",
+    "appointment_service",
+    "audit_log",
+    "build_audit_log",
+    "build_services",
+    "built_tenants",
+    "catalog_service",
+    "client_service",
+    "dashboard_counters",
+    "dedup_service",
+    "event_bus",
+    "financeiro_service",
+    "funcionario_service",
+    "get_audit_log",
+    "get_services",
+    "lead_intake",
+    "lead_service",
+    "occupancy_service",
+    "pacote_service",
+    "payroll_service",
+    "price_resolver",
+    "recurring_service",
+    "reminder_service",
+    "scheduled_jobs",
+    "scheduler",
+    "servico_service",
+    "user_service",
+]
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Iterable, List
+
+from ..models.appointments import ACTIVE_STATUSES
+from ..models.financeiro import LembreteAgendamento
+from .appointments import InMemoryAppointmentService
+
+
+class ReminderService:
+    """
+    Outbox of appointment reminders. Delivery (SMS, e-mail, WhatsApp) is out
+    of scope for the mock; reminders are recorded once per appointment.
+    """
+
+    def __init__(self, appointment_service: InMemoryAppointmentService):
+        self._appointment_service = appointment_service
+        self._outbox: Dict[int, LembreteAgendamento] = {}
+        self._lock = Lock()
+
+    def list_reminders(self) -> Iterable[LembreteAgendamento]:
+        return sorted(self._outbox.values(), key=lambda r: r.start_time)
+
+    def send_reminders(self, appointment_ids: Iterable[int]) -> List[LembreteAgendamento]:
+        now = datetime.utcnow()
+        sent: List[LembreteAgendamento] = []
+        with self._lock:
+            for appointment_id in appointment_ids:
+                appointment = self._appointment_service.get_appointment(appointment_id)
+                if (
+                    not appointment
+                    or appointment.status not in ACTIVE_STATUSES
+                    or appointment_id in self._outbox
+                ):
+                    continue
+                reminder = LembreteAgendamento(
+                    appointment_id=appointment.id,
+                    client_id=appointment.client_id,
+                    staff_member=appointment.staff_member,
+                    start_time=appointment.start_time,
+                    created_at=now,
+                )
+                self._outbox[appointment_id] = reminder
+                sent.append(reminder)
+        return sent
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        return {"lembretes": len(self._outbox)}
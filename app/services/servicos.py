@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from itertools import count
+from typing import Dict, Iterable, List, Optional
+
+from ..models.servicos import Servico, ServicoCreate, ServicoUpdate
+from .caching import CacheSpec, Invalidates
+from .hooks import ServicoHooks
+
+
+def _servico_keys(servico: Optional[Servico], servico_id: int, *_) -> list:
+    keys = [("get_servico", servico_id), ("list_servicos",)]
+    if servico is not None:
+        keys.append(("get_servico_by_nome", servico.nome))
+    return keys
+
+
+def _previous_nome_keys(service: "MockServicoService", servico_id: int, *_) -> list:
+    previous = service.get_servico(servico_id)
+    return [("get_servico_by_nome", previous.nome)] if previous else []
+
+
+SERVICO_CACHE_SPEC = CacheSpec(
+    reads={"list_servicos": None, "get_servico": None, "get_servico_by_nome": None},
+    writes={
+        "create_servico": Invalidates(
+            after=lambda servico, payload: [
+                ("list_servicos",),
+                ("get_servico", servico.id),
+                ("get_servico_by_nome", servico.nome),
+            ],
+        ),
+        "update_servico": Invalidates(after=_servico_keys, before=_previous_nome_keys),
+    },
+)
+
+
+class MockServicoService:
+    """
+    In-memory mock for the `servico` table (service catalog).
+    """
+
+    def __init__(self):
+        now = datetime.utcnow()
+        seed = [
+            ("Signature Facial", 60, Decimal("140.00")),
+            ("Hot Stone Massage", 90, Decimal("180.00")),
+            ("Body Scrub", 45, Decimal("95.00")),
+            ("Deep Tissue Massage", 60, Decimal("160.00")),
+            ("Facial Treatment", 60, Decimal("120.00")),
+        ]
+        self._servicos: Dict[int, Servico] = {
+            identifier: Servico(
+                id=identifier,
+                nome=nome,
+                duracao_base_min=duracao,
+                preco_base=preco,
+                created_at=now,
+                updated_at=now,
+            )
+            for identifier, (nome, duracao, preco) in enumerate(seed, start=1)
+        }
+        self._id_sequence = count(len(self._servicos) + 1)
+        # Appointments reference services by name, so keep a name index.
+        self._by_nome: Dict[str, int] = {s.nome: s.id for s in self._servicos.values()}
+        self._revision = 0
+        self._hooks: List[ServicoHooks] = []
+
+    def register_hook(self, hook: ServicoHooks) -> None:
+        self._hooks.append(hook)
+
+    @property
+    def revision(self) -> int:
+        """Monotonic counter bumped on every catalog mutation."""
+        return self._revision
+
+    def list_servicos(self) -> Iterable[Servico]:
+        return sorted(self._servicos.values(), key=lambda s: s.nome)
+
+    def get_servico(self, servico_id: int) -> Optional[Servico]:
+        return self._servicos.get(servico_id)
+
+    def get_servico_by_nome(self, nome: str) -> Optional[Servico]:
+        identifier = self._by_nome.get(nome)
+        if identifier is None:
+            return None
+        return self._servicos.get(identifier)
+
+    def create_servico(self, payload: ServicoCreate) -> Servico:
+        identifier = next(self._id_sequence)
+        now = datetime.utcnow()
+        servico = Servico(id=identifier, created_at=now, updated_at=now, **payload.model_dump())
+        self._servicos[identifier] = servico
+        self._by_nome[servico.nome] = identifier
+        self._revision += 1
+        for hook in self._hooks:
+            hook.servico_created(servico)
+        return servico
+
+    def update_servico(self, servico_id: int, payload: ServicoUpdate) -> Optional[Servico]:
+        existing = self._servicos.get(servico_id)
+        if not existing:
+            return None
+        updated = existing.model_copy(
+            update={**payload.model_dump(exclude_unset=True), "updated_at": datetime.utcnow()}
+        )
+        self._servicos[servico_id] = updated
+        if updated.nome != existing.nome:
+            self._by_nome.pop(existing.nome, None)
+            self._by_nome[updated.nome] = servico_id
+        self._revision += 1
+        for hook in self._hooks:
+            hook.servico_updated(existing, updated)
+        return updated
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        return {"servicos": len(self._servicos)}
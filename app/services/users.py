@@ -14,6 +14,9 @@ class InMemoryUserService:
     It keeps extra fields (id, email, tipo_usuario, cliente_id, etc.) in the
     internal records so the mock aligns with the SQL model, while exposing the
     simplified `User` Pydantic model to the rest of the app.
+
+    Users are shared by every tenant: logging in is what determines the
+    `empresa_id` a session works on.
     """
 
     def __init__(self):
@@ -32,6 +35,7 @@ class InMemoryUserService:
                 "cliente_id": None,
                 "funcionario_id": None,
                 "ativo": True,
+                "empresa_id": 1,
                 "created_at": now,
                 "updated_at": now,
                 "role": Role.OWNER,
@@ -47,6 +51,7 @@ class InMemoryUserService:
                 "cliente_id": None,
                 "funcionario_id": None,
                 "ativo": True,
+                "empresa_id": 1,
                 "created_at": now,
                 "updated_at": now,
                 "role": Role.MANAGER,
@@ -62,6 +67,7 @@ class InMemoryUserService:
                 "cliente_id": None,
                 "funcionario_id": None,
                 "ativo": True,
+                "empresa_id": 1,
                 "created_at": now,
                 "updated_at": now,
                 "role": Role.STAFF,
@@ -78,6 +84,7 @@ class InMemoryUserService:
                 "cliente_id": 1,  # matches MockClientService client with id=1
                 "funcionario_id": None,
                 "ativo": True,
+                "empresa_id": 1,
                 "created_at": now,
                 "updated_at": now,
                 "role": Role.GUEST,
@@ -93,6 +100,7 @@ class InMemoryUserService:
                 "cliente_id": 2,  # matches MockClientService client with id=2
                 "funcionario_id": None,
                 "ativo": True,
+                "empresa_id": 1,
                 "created_at": now,
                 "updated_at": now,
                 "role": Role.GUEST,
@@ -100,6 +108,17 @@ class InMemoryUserService:
             },
         }
 
+    def bulk_load(self, records: Iterable[dict]) -> int:
+        """
+        Load `usuario` records (same layout as the internal records above,
+        keyed by username). Returns the number of records loaded.
+        """
+        loaded = 0
+        for record in records:
+            self._users[record["username"]] = dict(record)
+            loaded += 1
+        return loaded
+
     def authenticate(self, username: str, password: str) -> Optional[User]:
         record = self._users.get(username)
         if not record:
@@ -117,6 +136,7 @@ class InMemoryUserService:
             full_name=record.get("nome"),
             role=record.get("role", Role.STAFF),
             scopes=list(record.get("scopes", [])),
+            empresa_id=record.get("empresa_id"),
         )
 
     def list_users(self) -> Iterable[User]:
@@ -130,3 +150,7 @@ class InMemoryUserService:
                 role=record.get("role", Role.STAFF),
                 scopes=list(record.get("scopes", [])),
             )
+
+    def store_sizes(self) -> Dict[str, int]:
+        """Record counts per store, exposed as metrics."""
+        return {"usuarios": len(self._users)}
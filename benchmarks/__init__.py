@@ -0,0 +1,24 @@
+"""
+In-process load and latency benchmarks for the Spa Manager API.
+
+The app built by `create_app()` is driven through `httpx.ASGITransport`, so
+runs measure the application stack (middleware, routing, validation,
+services) without sockets or a server process.
+
+    python -m benchmarks run --mix front_desk --requests 5000 --output results.json
+    python -m benchmarks compare results.json benchmarks/baseline.json --threshold 0.15
+    python -m benchmarks dataset fixture.json.gz --scale 5 --seed 7
+    python -m benchmarks run --fixture fixture.json.gz      # or --scale 5
+    python -m benchmarks startup --runs 5
+"""
+
+import os
+
+# Set before anything imports `app`: settings are built once, on first use
+# (and the rate limiter reads them at import time). Benchmarks measure request
+# handling only; background jobs would add noise and a handful of virtual
+# users would quickly exhaust their rate limits.
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+# Keep the access log (and its cost) but not thousands of lines on the console.
+os.environ.setdefault("ACCESS_LOG_FILE", os.devnull)
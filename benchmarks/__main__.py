@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import date
+from typing import List, Optional
+
+from .scenarios import MIXES
+from .stats import compare
+
+
+def _print_report(report: dict) -> None:
+    header = f"{'route':45} {'count':>7} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["routes"].items()) + [("<total>", report["total"])]
+    for route, row in rows:
+        print(
+            f"{route:45} {row['count']:>7} {row['rps']:>9.1f} {row['p50_ms']:>9.3f} "
+            f"{row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f} {row['errors']:>7}"
+        )
+
+
+def _load(path: str) -> dict:
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def _check(report: dict, baseline_path: str, threshold: float, metric: str) -> int:
+    regressions = compare(report, _load(baseline_path), threshold, metric=metric)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {threshold:.0%} against {baseline_path}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {threshold:.0%} against {baseline_path}.")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run a request mix against the in-process app")
+    run_parser.add_argument("--mix", choices=sorted(MIXES), default="front_desk")
+    run_parser.add_argument("--requests", type=int, default=2000, help="Operations to run (after warmup)")
+    run_parser.add_argument("--concurrency", type=int, default=8, help="Concurrent virtual users")
+    run_parser.add_argument("--warmup", type=int, default=100)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--scale", type=float, help="Load a synthetic dataset of this scale first")
+    run_parser.add_argument("--fixture", help="Load a saved dataset fixture first")
+    run_parser.add_argument("--output", help="Write the JSON report to this file")
+    run_parser.add_argument("--baseline", help="Compare against this JSON report")
+    run_parser.add_argument("--threshold", type=float, default=0.15, help="Allowed regression (fraction)")
+    run_parser.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+
+    compare_parser = commands.add_parser("compare", help="Compare two JSON reports")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--threshold", type=float, default=0.15)
+    compare_parser.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms", "mean_ms"])
+
+    dataset_parser = commands.add_parser("dataset", help="Generate a synthetic dataset fixture")
+    dataset_parser.add_argument("output", help="Fixture path (gzip'd when it ends with .gz)")
+    dataset_parser.add_argument("--scale", type=float, default=1.0)
+    dataset_parser.add_argument("--seed", type=int, default=42)
+    dataset_parser.add_argument("--anchor", type=date.fromisoformat, help="Date splitting past/future appointments")
+
+    startup_parser = commands.add_parser("startup", help="Measure cold import, startup and first-request latency")
+    startup_parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to average over")
+    startup_parser.add_argument("--output", help="Write the JSON report to this file")
+
+    payload_parser = commands.add_parser("payload", help="Compare list payloads with and without ?fields=")
+    payload_parser.add_argument("--scale", type=float, default=0.25)
+    payload_parser.add_argument("--repeats", type=int, default=10)
+    payload_parser.add_argument("--output", help="Write the JSON report to this file")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "payload":
+        from .payload import print_report, run as run_payload
+
+        report = run_payload(args.scale, args.repeats)
+        print_report(report)
+        if args.output:
+            with open(args.output, "w") as handle:
+                json.dump(report, handle, indent=2)
+        return 0
+
+    if args.command == "startup":
+        from .startup import print_report, run as run_startup
+
+        report = run_startup(args.runs)
+        print_report(report)
+        if args.output:
+            with open(args.output, "w") as handle:
+                json.dump(report, handle, indent=2)
+        return 0
+
+    if args.command == "dataset":
+        from .dataset import generate, save
+
+        dataset = generate(args.scale, args.seed, anchor=args.anchor)
+        save(dataset, args.output)
+        print(json.dumps(dataset.meta, indent=2))
+        return 0
+
+    if args.command == "compare":
+        report = _load(args.results)
+        _print_report(report)
+        return _check(report, args.baseline, args.threshold, args.metric)
+
+    from .harness import run
+
+    dataset = None
+    if args.fixture:
+        from .dataset import load
+
+        dataset = load(args.fixture)
+    elif args.scale:
+        from .dataset import generate
+
+        dataset = generate(args.scale, args.seed)
+
+    report = run(
+        mix=args.mix,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        seed=args.seed,
+        warmup=args.warmup,
+        dataset=dataset,
+    )
+    _print_report(report)
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+    if args.baseline:
+        return _check(report, args.baseline, args.threshold, args.metric)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
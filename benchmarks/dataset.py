@@ -0,0 +1,337 @@
+"""
+Deterministic synthetic dataset for scale testing.
+
+`generate(scale, seed)` builds clients with addresses, staff with service
+assignments, user accounts and several years of appointments. At scale 1.0
+that is 1,000 clients, 10 staff and about 40,000 appointments, and sizes grow
+linearly, so scale 25 yields roughly a million appointments. The same
+scale, seed and anchor date always produce the same rows.
+
+Rows are built with `model_construct` (the generator only emits valid
+values) and loaded through each service's `bulk_load`, so generating and
+loading data stays cheap next to the benchmark itself. Datasets can be
+saved to and reloaded from a gzip'd JSON fixture.
+"""
+
+from __future__ import annotations
+
+import gzip
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.core.auth import Role
+from app.models.appointments import Appointment, AppointmentStatus
+from app.models.clients import Cliente
+from app.models.endereco import Endereco
+from app.models.funcionarios import Funcionario, FuncionarioServico
+from app.models.servicos import Servico
+
+# Generated ids start here so they never collide with the demo seed rows.
+ID_OFFSET = 1000
+
+CLIENTS_PER_SCALE = 1000
+STAFF_PER_SCALE = 10
+YEARS = 3
+OPENING_HOUR = 9
+CLOSING_HOUR = 19
+# Share of a technician's opening hours that ends up booked.
+OCCUPANCY = 0.55
+# Share of clients that have a login.
+CLIENT_USERS = 0.3
+
+PAST_STATUSES = ((AppointmentStatus.completed, 85), (AppointmentStatus.canceled, 11), (AppointmentStatus.scheduled, 4))
+FUTURE_STATUSES = ((AppointmentStatus.scheduled, 94), (AppointmentStatus.canceled, 6))
+
+FIRST_NAMES_F = ("Ana", "Beatriz", "Camila", "Carla", "Fernanda", "Gabriela", "Juliana", "Larissa", "Mariana", "Patricia", "Renata", "Tatiane")
+FIRST_NAMES_M = ("Bruno", "Carlos", "Diego", "Eduardo", "Felipe", "Gustavo", "Lucas", "Marcelo", "Paulo", "Rafael", "Rodrigo", "Thiago")
+LAST_NAMES = ("Almeida", "Barbosa", "Costa", "Ferreira", "Gomes", "Lima", "Martins", "Oliveira", "Pereira", "Ribeiro", "Santos", "Silva", "Souza")
+STREETS = ("Rua das Flores", "Av. Central", "Rua do Comércio", "Alameda dos Ipês", "Rua São João", "Av. Beira Mar", "Travessa da Paz")
+NEIGHBOURHOODS = ("Centro", "Jardins", "Vila Nova", "Boa Vista", "Santa Cruz", "Praia", "Zona Rural")
+CITIES = ("Cidade A", "Cidade B", "Cidade C")
+
+
+class UserRecord(BaseModel):
+    """A `usuario` row, in the layout `InMemoryUserService` keeps internally."""
+
+    id: int
+    username: str
+    nome: str
+    email: Optional[str] = None
+    senha_hash: str
+    tipo_usuario: str
+    cliente_id: Optional[int] = None
+    funcionario_id: Optional[int] = None
+    ativo: bool = True
+    created_at: datetime
+    updated_at: datetime
+    role: Role
+    scopes: List[str] = Field(default_factory=list)
+
+
+class Dataset(BaseModel):
+    meta: Dict[str, Any] = Field(default_factory=dict)
+    clientes: List[Cliente] = Field(default_factory=list)
+    enderecos: List[Endereco] = Field(default_factory=list)
+    funcionarios: List[Funcionario] = Field(default_factory=list)
+    funcionario_servicos: List[FuncionarioServico] = Field(default_factory=list)
+    usuarios: List[UserRecord] = Field(default_factory=list)
+    appointments: List[Appointment] = Field(default_factory=list)
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "clientes": len(self.clientes),
+            "enderecos": len(self.enderecos),
+            "funcionarios": len(self.funcionarios),
+            "funcionario_servicos": len(self.funcionario_servicos),
+            "usuarios": len(self.usuarios),
+            "appointments": len(self.appointments),
+        }
+
+
+def _weighted(rng: random.Random, choices) -> Any:
+    return rng.choices([value for value, _ in choices], weights=[weight for _, weight in choices])[0]
+
+
+def _person(rng: random.Random) -> tuple:
+    sexo = rng.choice(("F", "F", "M"))  # spa clientele skews female
+    first = rng.choice(FIRST_NAMES_F if sexo == "F" else FIRST_NAMES_M)
+    return sexo, f"{first} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def generate(
+    scale: float = 1.0,
+    seed: int = 42,
+    *,
+    anchor: Optional[date] = None,
+    servicos: Optional[Iterable[Servico]] = None,
+) -> Dataset:
+    """
+    Build a dataset of `scale` units. Appointments cover `YEARS` years, of
+    which the last three months lie after `anchor` (default: today).
+    """
+    rng = random.Random(seed)
+    anchor = anchor or date.today()
+    now = datetime.combine(anchor, time(8))
+    if servicos is None:
+        from app.services.servicos import MockServicoService
+
+        servicos = MockServicoService().list_servicos()
+    catalog = sorted(servicos, key=lambda servico: servico.id)
+
+    n_clients = max(1, int(CLIENTS_PER_SCALE * scale))
+    n_staff = max(1, int(STAFF_PER_SCALE * scale))
+    dataset = Dataset(
+        meta={"scale": scale, "seed": seed, "anchor": anchor.isoformat(), "generated_at": datetime.utcnow().isoformat()}
+    )
+
+    # Clients and addresses
+    endereco_id = ID_OFFSET
+    for offset in range(n_clients):
+        identifier = ID_OFFSET + offset
+        sexo, nome = _person(rng)
+        created = now - timedelta(days=rng.randrange(YEARS * 365))
+        dataset.clientes.append(
+            Cliente.model_construct(
+                id=identifier,
+                nome=nome,
+                sexo=sexo,
+                data_nascimento=date(rng.randint(1950, 2005), rng.randint(1, 12), rng.randint(1, 28)),
+                como_conheceu_id=None,
+                telefone=f"55{rng.randint(11, 99)}9{rng.randint(10000000, 99999999)}",
+                email=f"cliente{identifier}@example.com",
+                saldo_credito=Decimal(rng.choice((0, 0, 0, 50, 100, 250))).quantize(Decimal("0.01")),
+                observacoes=None,
+                created_at=created,
+                updated_at=created,
+            )
+        )
+        for tipo in rng.sample(("RESIDENCIAL", "COMERCIAL", "OUTRO"), k=_weighted(rng, ((1, 70), (2, 25), (3, 5)))):
+            endereco_id += 1
+            dataset.enderecos.append(
+                Endereco.model_construct(
+                    id=endereco_id,
+                    cliente_id=identifier,
+                    tipo=tipo,
+                    logradouro=rng.choice(STREETS),
+                    numero=str(rng.randint(1, 2000)),
+                    complemento=None,
+                    bairro_comunidade=rng.choice(NEIGHBOURHOODS),
+                    cidade_area=rng.choice(CITIES),
+                    referencia=None,
+                    created_at=created,
+                    updated_at=created,
+                )
+            )
+
+    # Staff, their service assignments and logins
+    technicians: List[tuple] = []
+    for offset in range(n_staff):
+        identifier = ID_OFFSET + offset
+        sexo, nome = _person(rng)
+        nome = f"{nome} ({identifier})"  # appointments reference staff by unique name
+        tipo = _weighted(rng, (("TECNICO", 80), ("AMBOS", 10), ("ADMINISTRATIVO", 10)))
+        created = now - timedelta(days=rng.randrange(YEARS * 365, (YEARS + 2) * 365))
+        dataset.funcionarios.append(
+            Funcionario.model_construct(
+                id=identifier,
+                nome=nome,
+                sexo=sexo,
+                tipo_funcionario=tipo,
+                email=f"funcionario{identifier}@example.com",
+                elegivel_comissao=tipo != "ADMINISTRATIVO",
+                salario_fixo_mensal=Decimal(rng.choice((0, 1500, 2200))).quantize(Decimal("0.01")),
+                ativo=rng.random() > 0.05,
+                created_at=created,
+                updated_at=created,
+            )
+        )
+        dataset.usuarios.append(
+            UserRecord.model_construct(
+                id=identifier,
+                username=f"funcionario{identifier}",
+                nome=nome,
+                email=f"funcionario{identifier}@example.com",
+                senha_hash=f"funcionario{identifier}",
+                tipo_usuario="FUNCIONARIO",
+                cliente_id=None,
+                funcionario_id=identifier,
+                ativo=True,
+                created_at=created,
+                updated_at=created,
+                role=Role.STAFF,
+                scopes=["appointments:write"],
+            )
+        )
+        if tipo == "ADMINISTRATIVO":
+            continue
+        skills = rng.sample(catalog, k=rng.randint(1, len(catalog)))
+        for servico in skills:
+            dataset.funcionario_servicos.append(
+                FuncionarioServico.model_construct(
+                    funcionario_id=identifier,
+                    servico_id=servico.id,
+                    duracao_base_min_func=rng.choice((None, None, servico.duracao_base_min + 15)),
+                    preco_base_funcionario=rng.choice(
+                        (Decimal("0.00"), (servico.preco_base * Decimal("1.1")).quantize(Decimal("0.01")))
+                    ),
+                    comissao_percentual=Decimal(rng.choice((10, 15, 20, 30))).quantize(Decimal("0.01")),
+                )
+            )
+        technicians.append((nome, skills))
+
+    # Client logins
+    for cliente in dataset.clientes:
+        if rng.random() >= CLIENT_USERS:
+            continue
+        dataset.usuarios.append(
+            UserRecord.model_construct(
+                id=ID_OFFSET + n_staff + cliente.id,
+                username=f"cliente{cliente.id}",
+                nome=cliente.nome,
+                email=cliente.email,
+                senha_hash=f"cliente{cliente.id}",
+                tipo_usuario="CLIENTE",
+                cliente_id=cliente.id,
+                funcionario_id=None,
+                ativo=True,
+                created_at=cliente.created_at,
+                updated_at=cliente.created_at,
+                role=Role.GUEST,
+                scopes=[],
+            )
+        )
+
+    # Appointments: each technician works a day as back-to-back slots, some left free.
+    # A few regulars book most of the sessions (roughly Pareto-shaped).
+    client_ids = [cliente.id for cliente in dataset.clientes]
+    client_weights = [1.0 / (rank + 1) ** 0.8 for rank in range(n_clients)]
+    cumulative: List[float] = []
+    total = 0.0
+    for weight in client_weights:
+        total += weight
+        cumulative.append(total)
+
+    first_day = anchor - timedelta(days=YEARS * 365 - 90)
+    last_day = anchor + timedelta(days=90)
+    appointment_id = ID_OFFSET
+    for nome, skills in technicians:
+        day = first_day
+        while day < last_day:
+            if day.weekday() != 6:  # closed on Sundays
+                cursor = datetime.combine(day, time(OPENING_HOUR))
+                closing = datetime.combine(day, time(CLOSING_HOUR))
+                while True:
+                    servico = rng.choice(skills)
+                    end = cursor + timedelta(minutes=servico.duracao_base_min)
+                    if end > closing:
+                        break
+                    if rng.random() < OCCUPANCY:
+                        appointment_id += 1
+                        statuses = PAST_STATUSES if cursor < now else FUTURE_STATUSES
+                        dataset.appointments.append(
+                            Appointment.model_construct(
+                                id=appointment_id,
+                                client_id=rng.choices(client_ids, cum_weights=cumulative)[0],
+                                staff_member=nome,
+                                service=servico.nome,
+                                start_time=cursor,
+                                end_time=end,
+                                status=_weighted(rng, statuses),
+                                tipo="AVULSO",
+                                pacote_cliente_id=None,
+                                agendamento_recorrente_id=None,
+                            )
+                        )
+                    # Slots start on the quarter hour.
+                    cursor = end + timedelta(minutes=(-end.minute) % 15)
+            day += timedelta(days=1)
+
+    dataset.meta["counts"] = dataset.counts()
+    return dataset
+
+
+def populate(
+    dataset: Dataset,
+    *,
+    client_service=None,
+    appointment_service=None,
+    funcionario_service=None,
+    user_service=None,
+) -> Dict[str, int]:
+    """
+    Bulk-load `dataset` into any services exposing `bulk_load` (defaults to
+    the shared registry instances). Hooks are bypassed, so rebuild derived
+    state afterwards; the app lifespan already rebuilds the dashboard counters.
+    """
+    if None in (client_service, appointment_service, funcionario_service, user_service):
+        from app.services import registry
+
+        client_service = client_service or registry.client_service
+        appointment_service = appointment_service or registry.appointment_service
+        funcionario_service = funcionario_service or registry.funcionario_service
+        user_service = user_service or registry.user_service
+
+    return {
+        "clientes": client_service.bulk_load(dataset.clientes, dataset.enderecos),
+        "funcionarios": funcionario_service.bulk_load(dataset.funcionarios, dataset.funcionario_servicos),
+        "usuarios": user_service.bulk_load(record.model_dump() for record in dataset.usuarios),
+        "appointments": appointment_service.bulk_load(dataset.appointments),
+    }
+
+
+def save(dataset: Dataset, path: str) -> None:
+    """Write `dataset` as JSON (gzip'd when `path` ends with `.gz`)."""
+    payload = dataset.model_dump_json().encode()
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wb") as handle:
+        handle.write(payload)
+
+
+def load(path: str) -> Dataset:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as handle:
+        return Dataset.model_validate_json(handle.read())
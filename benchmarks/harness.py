@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import platform
+import random
+import sys
+import time
+from itertools import count
+from typing import Dict, List, Optional
+
+import httpx
+
+from .dataset import Dataset, populate
+from .scenarios import DEMO_USERS, MIXES, Session, pick
+from .stats import Recorder, build_report
+
+async def _bootstrap(client: httpx.AsyncClient, session: Session) -> None:
+    """Log in every demo user and learn the ids the scenarios pick from."""
+    for role, (username, password) in DEMO_USERS.items():
+        response = await client.post("/auth/token", json={"username": username, "password": password})
+        response.raise_for_status()
+        session.tokens[role] = response.json()["access_token"]
+
+    owner = session.headers("owner")
+    clients = (await client.get("/clients/", headers=owner)).json()
+    staff = (await client.get("/staff/", headers=owner)).json()
+    services = (await client.get("/public/services")).json()
+    session.client_ids = [item["id"] for item in clients]
+    session.staff_ids = [item["id"] for item in staff]
+    session.staff_names = [item["nome"] for item in staff]
+    session.service_names = [item["name"] for item in services]
+
+
+async def run_benchmark(
+    *,
+    mix: str = "front_desk",
+    requests: int = 2000,
+    concurrency: int = 8,
+    seed: int = 42,
+    warmup: int = 100,
+    dataset: Optional[Dataset] = None,
+    app=None,
+) -> Dict[str, object]:
+    """
+    Run `requests` operations of `mix` with `concurrency` virtual users and
+    return the JSON-serializable report. A synthetic `dataset` is bulk-loaded
+    into the shared services first.
+    """
+    if dataset is not None:
+        populate(dataset)
+    if app is None:
+        from app.main import create_app
+
+        app = create_app()
+
+    transport = httpx.ASGITransport(app=app)
+    recorder = Recorder()
+    # ASGITransport does not drive the lifespan, so enter it explicitly.
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            template = Session(client=client, recorder=Recorder(), rng=random.Random(seed))
+            await _bootstrap(client, template)
+            slots = count()
+
+            def new_session(worker: int, target: Recorder) -> Session:
+                return Session(
+                    client=client,
+                    recorder=target,
+                    rng=random.Random(f"{seed}:{worker}"),
+                    tokens=dict(template.tokens),
+                    client_ids=template.client_ids,
+                    staff_ids=template.staff_ids,
+                    staff_names=template.staff_names,
+                    service_names=template.service_names,
+                    booking_slots=slots,
+                )
+
+            operations = MIXES[mix]
+
+            async def worker(session: Session, budget: List[int]) -> None:
+                while budget[0] > 0:
+                    budget[0] -= 1
+                    await pick(operations, session.rng)(session)
+
+            if warmup:
+                warm = [warmup]
+                await asyncio.gather(*(worker(new_session(-i - 1, Recorder()), warm) for i in range(concurrency)))
+
+            budget = [requests]
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(new_session(i, recorder), budget) for i in range(concurrency)))
+            wall = time.perf_counter() - started
+
+    return build_report(
+        recorder,
+        wall,
+        {
+            "mix": mix,
+            "operations": requests,
+            "concurrency": concurrency,
+            "seed": seed,
+            "dataset": dataset.meta if dataset is not None else None,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+    )
+
+
+def run(
+    *,
+    mix: str = "front_desk",
+    requests: int = 2000,
+    concurrency: int = 8,
+    seed: int = 42,
+    warmup: int = 100,
+    dataset: Optional[Dataset] = None,
+    app=None,
+) -> Dict[str, object]:
+    return asyncio.run(
+        run_benchmark(
+            mix=mix,
+            requests=requests,
+            concurrency=concurrency,
+            seed=seed,
+            warmup=warmup,
+            dataset=dataset,
+            app=app,
+        )
+    )
@@ -0,0 +1,83 @@
+"""
+Payload benchmark: response size and latency of list endpoints with and
+without a sparse fieldset (`?fields=`), over a synthetic dataset.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from app.core.config import get_settings
+
+# Measure serialization, not the service caches. Only read when the services
+# are built, so dropping settings cached by an earlier import is enough.
+os.environ.setdefault("CACHE_ENABLED", "false")
+get_settings.cache_clear()
+
+# (name, url, fields): each url is requested as-is and with the fieldset.
+CASES = (
+    ("clients", "/clients/", "id,nome,telefone"),
+    ("appointments", "/appointments/", "id,start_time,status"),
+)
+
+
+async def _measure(app, repeats: int) -> Dict[str, Dict[str, float]]:
+    import httpx
+
+    from .scenarios import DEMO_USERS
+
+    username, password = DEMO_USERS["owner"]
+    transport = httpx.ASGITransport(app=app)
+    results: Dict[str, Dict[str, float]] = {}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            response = await client.post("/auth/token", json={"username": username, "password": password})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            for name, url, fields in CASES:
+                for variant, params in (("full", {}), ("fields", {"fields": fields})):
+                    samples: List[float] = []
+                    size = 0
+                    for _ in range(repeats):
+                        start = time.perf_counter()
+                        response = await client.get(url, headers=headers, params=params)
+                        samples.append((time.perf_counter() - start) * 1000)
+                        response.raise_for_status()
+                        size = len(response.content)
+                    results[f"{name}_{variant}"] = {
+                        "bytes": size,
+                        "median_ms": round(statistics.median(samples), 3),
+                        "min_ms": round(min(samples), 3),
+                    }
+    return results
+
+
+def run(scale: float = 0.25, repeats: int = 10, seed: int = 42, app=None) -> Dict[str, object]:
+    """Load a dataset of `scale`, then time each case `repeats` times."""
+    from .dataset import generate, populate
+
+    dataset = generate(scale, seed)
+    populate(dataset)
+    if app is None:
+        from app.main import create_app
+
+        app = create_app()
+    cases = asyncio.run(_measure(app, repeats))
+    return {"scale": scale, "repeats": repeats, "python": sys.version.split()[0], "cases": cases}
+
+
+def print_report(report: Dict[str, object]) -> None:
+    header = f"{'case':25} {'bytes':>12} {'median ms':>10} {'min ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for case, row in report["cases"].items():
+        print(f"{case:25} {row['bytes']:>12} {row['median_ms']:>10.3f} {row['min_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    print_report(run(float(sys.argv[1]) if len(sys.argv) > 1 else 0.25))
@@ -0,0 +1,169 @@
+"""
+Scripted request mixes.
+
+An operation is an async callable issuing one or more requests through the
+`Session` and recording each under its route template. A mix is a weighted
+list of operations; every virtual user picks its next operation from the
+mix with a seeded RNG, so two runs with the same seed issue the same
+sequence of operations.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import count
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from .stats import Recorder
+
+DEMO_USERS: Dict[str, Tuple[str, str]] = {
+    "owner": ("gaby_dono", "gaby_dono"),
+    "manager": ("manager", "spa-manager"),
+    "staff": ("staff", "spa-staff"),
+}
+
+
+@dataclass
+class Session:
+    """A virtual user: HTTP client, tokens and the ids it can pick from."""
+
+    client: httpx.AsyncClient
+    recorder: Recorder
+    rng: random.Random
+    tokens: Dict[str, str] = field(default_factory=dict)
+    client_ids: List[int] = field(default_factory=list)
+    staff_ids: List[int] = field(default_factory=list)
+    staff_names: List[str] = field(default_factory=list)
+    service_names: List[str] = field(default_factory=list)
+    booking_slots: "count[int]" = field(default_factory=count)
+
+    def headers(self, role: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.tokens[role]}"}
+
+    async def request(
+        self,
+        route: str,
+        method: str,
+        url: str,
+        *,
+        role: Optional[str] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        headers = self.headers(role) if role else None
+        with self.recorder.measure(f"{method} {route}") as sample:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+            sample.status = response.status_code
+        return response
+
+
+Operation = Callable[[Session], Awaitable[None]]
+
+
+async def login(session: Session) -> None:
+    role = session.rng.choice(list(DEMO_USERS))
+    username, password = DEMO_USERS[role]
+    response = await session.request(
+        "/auth/token",
+        "POST",
+        "/auth/token",
+        json={"username": username, "password": password},
+    )
+    if response.status_code == 200:
+        session.tokens[role] = response.json()["access_token"]
+
+
+async def agenda_read(session: Session) -> None:
+    staff_id = session.rng.choice(session.staff_ids)
+    await session.request("/staff/{funcionario_id}/agenda", "GET", f"/staff/{staff_id}/agenda", role="manager")
+
+
+async def appointments_list(session: Session) -> None:
+    await session.request("/appointments/", "GET", "/appointments/", role="staff")
+
+
+async def booking(session: Session) -> None:
+    # Each booking gets its own future slot so runs never pile onto one hour.
+    slot = next(session.booking_slots)
+    start = datetime(2030, 1, 1, 8) + timedelta(hours=slot)
+    await session.request(
+        "/appointments/",
+        "POST",
+        "/appointments/",
+        role="manager",
+        json={
+            "client_id": session.rng.choice(session.client_ids),
+            "staff_member": session.rng.choice(session.staff_names),
+            "service": session.rng.choice(session.service_names),
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat(),
+        },
+    )
+
+
+async def credit_update(session: Session) -> None:
+    client_id = session.rng.choice(session.client_ids)
+    await session.request(
+        "/clients/{client_id}/saldo-credito",
+        "POST",
+        f"/clients/{client_id}/saldo-credito",
+        role="manager",
+        json={"delta": "10.00", "operation": "add"},
+    )
+
+
+async def client_search(session: Session) -> None:
+    # No search endpoint yet: list, then open one profile and its history.
+    await session.request("/clients/", "GET", "/clients/", role="staff")
+    client_id = session.rng.choice(session.client_ids)
+    await session.request("/clients/{client_id}", "GET", f"/clients/{client_id}", role="staff")
+    await session.request(
+        "/clients/{client_id}/appointments",
+        "GET",
+        f"/clients/{client_id}/appointments",
+        role="staff",
+    )
+
+
+async def dashboard(session: Session) -> None:
+    await session.request("/dashboard/", "GET", "/dashboard/", role="manager")
+
+
+async def public_services(session: Session) -> None:
+    await session.request("/public/services", "GET", "/public/services")
+
+
+Mix = Sequence[Tuple[int, Operation]]
+
+MIXES: Dict[str, Mix] = {
+    # Reception desk: mostly agenda and client lookups, some bookings.
+    "front_desk": (
+        (5, login),
+        (25, agenda_read),
+        (15, appointments_list),
+        (15, booking),
+        (10, credit_update),
+        (20, client_search),
+        (5, dashboard),
+        (5, public_services),
+    ),
+    "read_heavy": (
+        (40, agenda_read),
+        (20, appointments_list),
+        (30, client_search),
+        (10, dashboard),
+    ),
+    "write_heavy": (
+        (60, booking),
+        (40, credit_update),
+    ),
+    "auth": ((1, login),),
+}
+
+
+def pick(mix: Mix, rng: random.Random) -> Operation:
+    weights = [weight for weight, _ in mix]
+    return rng.choices([operation for _, operation in mix], weights=weights)[0]
@@ -0,0 +1,116 @@
+"""
+Startup benchmark: cold import, app construction, lifespan startup and the
+latency of the first requests after it.
+
+Every run happens in a fresh interpreter (`python -m benchmarks.startup
+--child`) so module caches from earlier runs do not hide import costs; the
+parent aggregates the phases over several runs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+# (name, method, url, authenticated) requested in order, each twice.
+FIRST_REQUESTS = (
+    ("openapi", "GET", "/openapi.json", False),
+    ("docs", "GET", "/docs", False),
+    ("public_services", "GET", "/public/services", False),
+    ("login", "POST", "/auth/token", False),
+    ("appointments", "GET", "/appointments/", True),
+)
+
+
+async def _requests(app, timings: Dict[str, float]) -> None:
+    import httpx
+
+    from .scenarios import DEMO_USERS
+
+    username, password = DEMO_USERS["owner"]
+    headers: Dict[str, str] = {}
+    transport = httpx.ASGITransport(app=app)
+
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        timings["startup_ms"] = (time.perf_counter() - start) * 1000
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for name, method, url, authenticated in FIRST_REQUESTS:
+                for attempt in ("first", "second"):
+                    kwargs = {"headers": headers if authenticated else {}}
+                    if method == "POST":
+                        kwargs["json"] = {"username": username, "password": password}
+                    start = time.perf_counter()
+                    response = await client.request(method, url, **kwargs)
+                    timings[f"{name}_{attempt}_ms"] = (time.perf_counter() - start) * 1000
+                    response.raise_for_status()
+                if name == "login":
+                    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _child() -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    from app.main import create_app
+
+    timings["import_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    app = create_app()
+    timings["create_app_ms"] = (time.perf_counter() - start) * 1000
+
+    asyncio.run(_requests(app, timings))
+    return timings
+
+
+def run(runs: int = 5) -> Dict[str, object]:
+    """Measure `runs` cold starts and return median/min/max per phase (ms)."""
+    env = dict(os.environ)
+    env.setdefault("SCHEDULER_ENABLED", "false")
+    env.setdefault("RATE_LIMIT_ENABLED", "false")
+    # The child reports its timings on stdout.
+    env.setdefault("ACCESS_LOG_FILE", os.devnull)
+    samples: List[Dict[str, float]] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child"],
+            check=True,
+            capture_output=True,
+            env=env,
+            text=True,
+        ).stdout
+        timings = json.loads(output.strip().splitlines()[-1])
+        timings["process_ms"] = (time.perf_counter() - start) * 1000
+        samples.append(timings)
+
+    phases = {}
+    for phase in samples[0]:
+        values = [sample[phase] for sample in samples]
+        phases[phase] = {
+            "median_ms": round(statistics.median(values), 3),
+            "min_ms": round(min(values), 3),
+            "max_ms": round(max(values), 3),
+        }
+    return {"runs": runs, "python": sys.version.split()[0], "phases": phases}
+
+
+def print_report(report: Dict[str, object]) -> None:
+    header = f"{'phase':30} {'median ms':>10} {'min ms':>10} {'max ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for phase, row in report["phases"].items():
+        print(f"{phase:30} {row['median_ms']:>10.3f} {row['min_ms']:>10.3f} {row['max_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--child"]:
+        print(json.dumps(_child()))
+    else:
+        print_report(run(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
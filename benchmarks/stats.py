@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+@dataclass
+class Sample:
+    status: int = 0
+
+
+class _Measure:
+    __slots__ = ("_recorder", "_route", "_start", "sample")
+
+    def __init__(self, recorder: Recorder, route: str):
+        self._recorder = recorder
+        self._route = route
+        self.sample = Sample()
+
+    def __enter__(self) -> Sample:
+        self._start = time.perf_counter()
+        return self.sample
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self._start
+        self._recorder.record(self._route, elapsed, self.sample.status if exc_type is None else 0)
+
+
+class Recorder:
+    """Collects raw latencies per route label."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def measure(self, route: str) -> _Measure:
+        return _Measure(self, route)
+
+    def record(self, route: str, seconds: float, status: int) -> None:
+        self.latencies[route].append(seconds)
+        self.statuses[route][status] += 1
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], statuses: Dict[int, int], wall_seconds: float) -> Dict[str, object]:
+    ordered = sorted(latencies)
+    # 0 is a transport failure; every 4xx (429s included) and 5xx is an error.
+    errors = sum(count for status, count in statuses.items() if not 200 <= status < 400)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "error_rate": round(errors / len(ordered), 4) if ordered else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "rps": round(len(ordered) / wall_seconds, 2) if wall_seconds else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def build_report(recorder: Recorder, wall_seconds: float, meta: Dict[str, object]) -> Dict[str, object]:
+    routes = {
+        route: summarize(latencies, recorder.statuses[route], wall_seconds)
+        for route, latencies in sorted(recorder.latencies.items())
+    }
+    all_latencies = [value for latencies in recorder.latencies.values() for value in latencies]
+    all_statuses: Dict[int, int] = defaultdict(int)
+    for statuses in recorder.statuses.values():
+        for status, count in statuses.items():
+            all_statuses[status] += count
+    return {
+        "meta": {**meta, "wall_seconds": round(wall_seconds, 3)},
+        "total": summarize(all_latencies, all_statuses, wall_seconds),
+        "routes": routes,
+    }
+
+
+def compare(
+    results: Dict[str, object],
+    baseline: Dict[str, object],
+    threshold: float,
+    *,
+    metric: str = "p95_ms",
+) -> List[str]:
+    """
+    Return human-readable regressions: routes whose `metric` latency grew, or
+    whose throughput dropped, by more than `threshold` (a fraction) compared
+    with the baseline, and routes whose error rate rose at all (a mix that
+    fails fast must not pass as a fast one). Routes missing from either side
+    are ignored.
+    """
+    regressions: List[str] = []
+    current_routes = dict(results.get("routes", {}))
+    baseline_routes = dict(baseline.get("routes", {}))
+    current_routes["<total>"] = results.get("total", {})
+    baseline_routes["<total>"] = baseline.get("total", {})
+
+    for route, before in sorted(baseline_routes.items()):
+        after: Optional[Dict[str, float]] = current_routes.get(route)
+        if not after or not before.get("count") or not after.get("count"):
+            continue
+        if before[metric] and after[metric] > before[metric] * (1 + threshold):
+            regressions.append(
+                f"{route}: {metric} {before[metric]:.3f} -> {after[metric]:.3f} "
+                f"(+{(after[metric] / before[metric] - 1) * 100:.1f}%)"
+            )
+        if before["rps"] and after["rps"] < before["rps"] * (1 - threshold):
+            regressions.append(
+                f"{route}: rps {before['rps']:.1f} -> {after['rps']:.1f} "
+                f"({(after['rps'] / before['rps'] - 1) * 100:.1f}%)"
+            )
+        before_errors, after_errors = _error_rate(before), _error_rate(after)
+        if after_errors > before_errors:
+            regressions.append(f"{route}: error rate {before_errors:.2%} -> {after_errors:.2%}")
+    return regressions
+
+
+def _error_rate(row: Dict[str, float]) -> float:
+    # Reports written before `error_rate` existed only have the error count.
+    return row.get("error_rate", row.get("errors", 0) / row["count"])
@@ -315,5 +315,19 @@ CREATE TABLE despesa (
 );
 CREATE INDEX idx_despesa_data_competencia ON despesa(data_competencia);
 
-
+-- Folha de pagamento por profissional
+-- Uma linha por funcionario e competencia (mes): salario fixo + comissoes dos atendimentos concluidos
+CREATE TABLE folha_pagamento_profissional (
+    id                      BIGSERIAL PRIMARY KEY,
+    funcionario_id          BIGINT NOT NULL REFERENCES funcionario(id),
+    competencia             DATE NOT NULL, --primeiro dia do mes de referencia
+    salario_fixo            NUMERIC(50,2) NOT NULL DEFAULT 0,
+    quantidade_atendimentos INTEGER NOT NULL DEFAULT 0,
+    valor_atendimentos      NUMERIC(50,2) NOT NULL DEFAULT 0,
+    total_comissao          NUMERIC(50,2) NOT NULL DEFAULT 0,
+    total_bruto             NUMERIC(50,2) NOT NULL DEFAULT 0,
+    created_at              TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at              TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (funcionario_id, competencia)
+);
 CREATE INDEX idx_folha_profissional ON folha_pagamento_profissional(funcionario_id);
\ No newline at end of file